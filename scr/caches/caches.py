@@ -0,0 +1,381 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from scr.constants import (CACHE_DIR, CACHE_HASH_BLOCK, CACHE_MAX_SIZE,
+                           CACHE_VERSION)
+from scr.indexes.indexes import INDEX_KINDS, Index
+from scr.schemas.schemas import TYPE_NAMES, TYPES
+from scr.tables.tables import Table, is_numeric
+
+# Сигнатуры файлов таблицы и индексов и формат длины заголовка
+MAGIC = b'CSVCACHE'
+INDEX_MAGIC = b'CSVINDEX'
+HEADER_LENGTH = struct.Struct('<Q')
+
+# Разделитель строковых значений в столбце
+SEPARATOR = '\0'
+
+# Выравнивание столбцов в файле, чтобы array('d') можно было отобразить
+ALIGNMENT = 8
+
+
+class TableCache:
+    """
+    Класс для дискового кэша разобранных CSV-файлов.
+
+    Для каждого файла хранится двоичная запись с типами полей и столбцами
+    таблицы `Table`: числовые столбцы записываются байтами `array('d')` и
+    `array('q')`, строковые и категориальные — текстом UTF-8 с
+    разделителем "\\0". Столбцы выровнены по 8 байтам, запись читается
+    через `mmap` без разбора CSV. Индексы полей таблицы (`scr.indexes`)
+    хранятся в отдельной записи рядом с записью таблицы и загружаются
+    вместе с ней.
+
+    Ключ записи вычисляется по пути, размеру, времени изменения и хешу
+    содержимого файла. Хеш считается по блокам в начале, середине и конце
+    файла, чтобы проверка не требовала чтения всего файла. Если общий
+    размер кэша превышает max_size байт, удаляются давно не
+    использованные записи.
+    """
+
+    def __init__(
+            self,
+            cache_dir: str = CACHE_DIR,
+            max_size: int = CACHE_MAX_SIZE * 1024 * 1024
+    ):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def load(
+            self,
+            file_path: str,
+            fields: Optional[Sequence[str]] = None,
+            signature: str = ''
+    ) -> Optional[tuple[Table, Dict[str, type]]]:
+        """
+        Возвращает таблицу и типы полей из кэша или None.
+
+        fields — поля, которыми ограничен разбор файла; таблицы с разными
+        наборами полей хранятся в разных записях. Если записи для fields
+        нет, нужные столбцы берутся из записи всего файла, а если в файле
+        нет какого-либо из полей — запись возвращается целиком. signature —
+        остальные параметры разбора, от которых зависят типы полей.
+        """
+        try:
+            entry = self._entry_path(file_path, fields, signature)
+        except OSError:
+            return None
+        if fields is not None and not entry.exists():
+            cached = self.load(file_path, signature=signature)
+            if cached is None or not set(fields) <= set(cached[1]):
+                return cached
+            table = cached[0].select(fields)
+            return table, table.field_types
+        try:
+            with open(entry, 'rb') as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) \
+                        as buffer:
+                    table = self._read_table(buffer)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, struct.error):
+            # Повреждённая запись не должна мешать разбору файла
+            self._remove(entry)
+            return None
+        # Время изменения записи отмечает её последнее использование
+        os.utime(entry)
+        self._load_indexes(entry, table)
+        return table, table.field_types
+
+    def store(
+            self,
+            file_path: str,
+            table: Table,
+            fields: Optional[Sequence[str]] = None,
+            signature: str = ''
+    ) -> None:
+        """
+        Сохраняет таблицу файла в кэш и удаляет лишние записи.
+
+        Ошибки записи не прерывают обработку: кэш только ускоряет
+        повторный запуск.
+        """
+        sections = self._sections(table)
+        if sections is None:
+            return
+        header = {
+            'version': CACHE_VERSION,
+            'byteorder': sys.byteorder,
+            'rows': len(table),
+            'fields': [
+                [field, TYPE_NAMES[field_type]]
+                for field, field_type in table.field_types.items()
+            ],
+            'sizes': [len(section) for section in sections],
+        }
+        try:
+            entry = self._entry_path(file_path, fields, signature)
+        except OSError:
+            return
+        self._write(entry, MAGIC, header, sections)
+
+    def store_indexes(
+            self,
+            file_path: str,
+            table: Table,
+            fields: Optional[Sequence[str]] = None,
+            signature: str = ''
+    ) -> None:
+        """
+        Сохраняет индексы таблицы рядом с её записью в кэше.
+
+        Индексы строятся лениво при выполнении запроса, поэтому
+        сохраняются отдельно от таблицы, уже после фильтрации. Если
+        таблица полей fields была взята из записи всего файла, индексы
+        сохраняются рядом с ней вместе с уже сохранёнными индексами
+        других полей.
+        """
+        if not table.indexes:
+            return
+        try:
+            entry = self._entry_path(file_path, fields, signature)
+            if fields is not None and not entry.exists():
+                entry = self._entry_path(file_path, signature=signature)
+        except OSError:
+            return
+        if not entry.exists():
+            return
+        indexes = {
+            **self._stored_indexes(entry, len(table)), **table.indexes
+        }
+        entries = []
+        sections: List[bytes] = []
+        for field, index in indexes.items():
+            index_sections = index.to_sections()
+            entries.append([
+                field, index.kind,
+                [len(section) for section in index_sections]
+            ])
+            sections.extend(index_sections)
+        header = {
+            'version': CACHE_VERSION,
+            'byteorder': sys.byteorder,
+            'rows': len(table),
+            'indexes': entries,
+        }
+        self._write(self._index_path(entry), INDEX_MAGIC, header, sections)
+
+    def _write(
+            self,
+            entry: Path,
+            magic: bytes,
+            header: Dict[str, Any],
+            sections: List[bytes]
+    ) -> None:
+        """Записывает заголовок и выровненные секции в запись кэша."""
+        header_bytes = json.dumps(header).encode('utf-8')
+        header_bytes += b' ' * self._padding(
+            len(magic) + HEADER_LENGTH.size + len(header_bytes)
+        )
+        size = len(magic) + HEADER_LENGTH.size + len(header_bytes) + sum(
+            len(section) + self._padding(len(section))
+            for section in sections
+        )
+        if size > self.max_size:
+            return
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Запись во временный файл и переименование: параллельные
+            # процессы не увидят запись частично
+            descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(magic)
+                file.write(HEADER_LENGTH.pack(len(header_bytes)))
+                file.write(header_bytes)
+                for section in sections:
+                    file.write(section)
+                    file.write(b'\0' * self._padding(len(section)))
+            os.replace(temp_path, entry)
+        except OSError:
+            return
+        self._evict()
+
+    def _entry_path(
+            self,
+            file_path: str,
+            fields: Optional[Sequence[str]] = None,
+            signature: str = ''
+    ) -> Path:
+        """Возвращает путь записи кэша для CSV-файла и параметров разбора."""
+        path = os.path.realpath(file_path)
+        stat = os.stat(path)
+        key = hashlib.blake2b(digest_size=16)
+        key.update(
+            f'{CACHE_VERSION}\0{path}\0{stat.st_size}\0{stat.st_mtime_ns}'
+            .encode('utf-8')
+        )
+        key.update(self._content_hash(path, stat.st_size))
+        if fields is not None:
+            key.update('\0'.join(['fields', *fields]).encode('utf-8'))
+        if signature:
+            key.update(f'\0signature\0{signature}'.encode('utf-8'))
+        return Path(self.cache_dir) / f'{key.hexdigest()}.bin'
+
+    @staticmethod
+    def _index_path(entry: Path) -> Path:
+        """Возвращает путь записи индексов для записи таблицы."""
+        return entry.with_name(f'{entry.stem}.idx.bin')
+
+    @staticmethod
+    def _content_hash(file_path: str, size: int) -> bytes:
+        """Хеширует блоки в начале, середине и конце файла."""
+        content = hashlib.blake2b(digest_size=16)
+        offsets = sorted({
+            0,
+            max(0, size // 2 - CACHE_HASH_BLOCK // 2),
+            max(0, size - CACHE_HASH_BLOCK)
+        })
+        with open(file_path, 'rb') as file:
+            for offset in offsets:
+                file.seek(offset)
+                content.update(file.read(CACHE_HASH_BLOCK))
+        return content.digest()
+
+    @staticmethod
+    def _sections(table: Table) -> Optional[List[bytes]]:
+        """
+        Возвращает байты столбцов таблицы.
+
+        Если строковое значение содержит разделитель "\\0", таблица не
+        кэшируется и возвращается None.
+        """
+        sections = []
+        for field, field_type in table.field_types.items():
+            column = table.column(field)
+            if is_numeric(field_type):
+                sections.append(column.tobytes())
+                continue
+            text = SEPARATOR.join(column)
+            if text.count(SEPARATOR) != max(len(column) - 1, 0):
+                return None
+            sections.append(text.encode('utf-8'))
+        return sections
+
+    @staticmethod
+    def _read_header(buffer: Any, magic: bytes) -> tuple[Dict[str, Any], int]:
+        """Возвращает заголовок записи кэша и смещение первой секции."""
+        if buffer[:len(magic)] != magic:
+            raise ValueError('Неверная сигнатура записи кэша')
+        offset = len(magic) + HEADER_LENGTH.size
+        (length,) = HEADER_LENGTH.unpack_from(buffer, len(magic))
+        header = json.loads(bytes(buffer[offset:offset + length]))
+        if header['version'] != CACHE_VERSION:
+            raise ValueError('Неподдерживаемая версия записи кэша')
+        return header, offset + length
+
+    def _read_table(self, buffer: Any) -> Table:
+        """Читает таблицу из отображённой в память записи кэша."""
+        header, offset = self._read_header(buffer, MAGIC)
+        table = Table({
+            field: TYPES[type_name] for field, type_name in header['fields']
+        })
+        rows = header['rows']
+        with memoryview(buffer) as view:
+            for (field, field_type), size in zip(
+                    table.field_types.items(), header['sizes']
+            ):
+                column = table.column(field)
+                with view[offset:offset + size] as section:
+                    if is_numeric(field_type):
+                        column.frombytes(section)
+                        if header['byteorder'] != sys.byteorder:
+                            column.byteswap()
+                    elif rows:
+                        text = str(section, 'utf-8')
+                        column.extend(map(sys.intern, text.split(SEPARATOR)))
+                offset += size + self._padding(size)
+                if len(column) != rows:
+                    raise ValueError('Повреждённый столбец записи кэша')
+        return table
+
+    def _load_indexes(self, entry: Path, table: Table) -> None:
+        """Добавляет в таблицу сохранённые индексы, если они есть."""
+        table.indexes.update({
+            field: index
+            for field, index in self._stored_indexes(entry, len(table)).items()
+            if field in table.field_types
+        })
+
+    def _stored_indexes(self, entry: Path, rows: int) -> Dict[str, Index]:
+        """Возвращает индексы, сохранённые рядом с записью таблицы."""
+        index_entry = self._index_path(entry)
+        try:
+            with open(index_entry, 'rb') as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) \
+                        as buffer:
+                    indexes = self._read_indexes(buffer, rows)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, KeyError, struct.error):
+            self._remove(index_entry)
+            return {}
+        os.utime(index_entry)
+        return indexes
+
+    def _read_indexes(self, buffer: Any, rows: int) -> Dict[str, Index]:
+        """Читает из отображённой в память записи индексы таблицы."""
+        header, offset = self._read_header(buffer, INDEX_MAGIC)
+        if header['rows'] != rows:
+            raise ValueError('Индексы относятся к другой таблице')
+        swap = header['byteorder'] != sys.byteorder
+        indexes = {}
+        with memoryview(buffer) as view:
+            for field, kind, sizes in header['indexes']:
+                sections = []
+                for size in sizes:
+                    sections.append(view[offset:offset + size])
+                    offset += size + self._padding(size)
+                try:
+                    index = INDEX_KINDS[kind].from_sections(sections, swap)
+                finally:
+                    for section in sections:
+                        section.release()
+                indexes[field] = index
+        return indexes
+
+    def _evict(self) -> None:
+        """Удаляет давно не использованные записи сверх max_size."""
+        entries = []
+        for entry in Path(self.cache_dir).glob('*.bin'):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_size:
+                break
+            self._remove(entry)
+            total -= size
+
+    @staticmethod
+    def _remove(entry: Path) -> None:
+        """Удаляет запись кэша, если она ещё существует."""
+        try:
+            os.remove(entry)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _padding(size: int) -> int:
+        """Количество байт до следующей выровненной границы."""
+        return -size % ALIGNMENT
@@ -3,8 +3,93 @@ from typing import Final
 # Регулярное выражение для парсинга одного условия: поле, оператор, значение
 WHERE_PATTERN: Final[str] = r'^(\w+)(=|!=|>=|<=|>|<)(.+)$'
 
+# Операции агрегации
+AGGREGATIONS: Final[tuple] = (
+    'avg', 'min', 'max', 'count', 'sum', 'var', 'stddev', 'median',
+    'p50', 'p95', 'p99', 'count_distinct',
+)
+
+# Режимы count_distinct: точный подсчёт и приближённый HyperLogLog
+DISTINCT_MODES: Final[tuple] = ('exact', 'hll')
+
+# Приближённые перцентили и соответствующие им доли
+PERCENTILES: Final[dict] = {'p50': 0.5, 'p95': 0.95, 'p99': 0.99}
+
 # Регулярное выражение для парсинга aggregation
-AGGR_PATTERN: Final[str] = r'^(\w+)=(avg|min|max)$'
+AGGR_PATTERN: Final[str] = rf'^(\w+)=({"|".join(AGGREGATIONS)})$'
+
+# Регулярное выражение для парсинга group-by: поля через запятую
+GROUP_PATTERN: Final[str] = r'^\s*\w+\s*(,\s*\w+\s*)*$'
+
+# Регулярное выражение для парсинга одного ключа order-by: поле, порядок
+# и необязательное место пустых значений
+ORDER_PATTERN: Final[str] = r'^(\w+)=(asc|desc)(?:\s+nulls\s+(first|last))?$'
+
+# Место пустых значений при сортировке по умолчанию
+NULLS_DEFAULT: Final[str] = 'last'
+
+# Путь к файлу, означающий чтение CSV из стандартного ввода
+STDIN_PATH: Final[str] = '-'
+
+# Минимальный размер файла в байтах для параллельного парсинга по частям
+CHUNK_MIN_SIZE: Final[int] = 64 * 1024 * 1024
+
+# Стадии плана выполнения запроса
+FILTER: Final[str] = 'filter'
+SORT: Final[str] = 'sort'
+TOP_K: Final[str] = 'top_k'
+EXTERNAL_SORT: Final[str] = 'external_sort'
+LIMIT: Final[str] = 'limit'
+AGGREGATE: Final[str] = 'aggregate'
+
+# Количество строк в одной записи pickle при сбросе порции на диск
+SPILL_BATCH_ROWS: Final[int] = 1024
+
+# Количество строк отчёта, накапливаемых перед записью в файл
+WRITE_BUFFER_ROWS: Final[int] = 1000
+
+# Количество первых строк, по которым вычисляется ширина столбцов таблицы
+TABLE_SAMPLE_ROWS: Final[int] = 1000
+
+# Папка для кэша разобранных CSV-файлов
+CACHE_DIR: Final[str] = '.cache'
+
+# Максимальный общий размер кэша в мегабайтах
+CACHE_MAX_SIZE: Final[int] = 1024
+
+# Размер блока файла в байтах, по которому вычисляется хеш содержимого
+CACHE_HASH_BLOCK: Final[int] = 1024 * 1024
+
+# Версия двоичного формата кэша, меняется и вместе с правилами разбора
+CACHE_VERSION: Final[int] = 3
+
+# Количество первых строк файла, по которым определяются типы полей
+INFER_ROWS: Final[int] = 100
+
+# Суффикс файла схемы, сохраняемого рядом с CSV-файлом
+SCHEMA_SUFFIX: Final[str] = '.schema.json'
+
+# Минимальное количество строк выборки для определения категориального поля
+CATEGORY_MIN_ROWS: Final[int] = 20
+
+# Максимальная доля различных значений в выборке для категориального поля
+CATEGORY_MAX_SHARE: Final[float] = 0.5
+
+# Размер верхнего уровня скетча KLL: больше — точнее перцентили
+KLL_K: Final[int] = 200
+
+# Точность HyperLogLog: 2^p регистров, относительная ошибка 1.04/sqrt(2^p)
+HLL_PRECISION: Final[int] = 14
+
+# Адрес и порт сервера запросов --serve по умолчанию
+SERVE_HOST: Final[str] = '127.0.0.1'
+SERVE_PORT: Final[int] = 8080
+
+# Интервал проверки изменений файлов сервером в секундах
+SERVE_POLL_INTERVAL: Final[float] = 1.0
 
-# Регулярное выражение для парсинга order-by
-ORDER_PATTERN: Final[str] = r'^(\w+)=(asc|desc)$'
+# Параметры запроса сервера, повторяющие аргументы командной строки
+QUERY_PARAMS: Final[tuple] = (
+    'where', 'order_by', 'aggregate', 'group_by', 'distinct', 'limit',
+    'offset',
+)
@@ -32,3 +32,15 @@ class InvalidCsvFormatError(ValueError):
     """Исключение для ошибок формата CSV-файла."""
 
     pass
+
+
+class UnsupportedEngineError(ValueError):
+    """Исключение для недоступного движка выполнения отчётов."""
+
+    pass
+
+
+class InvalidSchemaError(ValueError):
+    """Исключение для ошибок в файле схемы CSV."""
+
+    pass
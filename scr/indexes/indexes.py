@@ -0,0 +1,153 @@
+import json
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from typing import Dict, Iterable, List, Sequence, Union
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    """Создаёт массив из байтов или отображённого в память буфера."""
+    values = array(typecode)
+    values.frombytes(data)
+    return values
+
+
+class HashIndex:
+    """
+    Хеш-индекс строкового поля.
+
+    Для каждого значения в нижнем регистре хранит номера строк в
+    `array('i')` по возрастанию, поэтому условие = без учёта регистра
+    вычисляется поиском в словаре, без просмотра строк.
+    """
+
+    kind = 'hash'
+
+    def __init__(self, rows: Dict[str, array]):
+        self.rows = rows
+
+    @classmethod
+    def build(cls, folded: Iterable[str]) -> 'HashIndex':
+        """Строит индекс по значениям поля в нижнем регистре."""
+        rows: Dict[str, array] = {}
+        for index, value in enumerate(folded):
+            ids = rows.get(value)
+            if ids is None:
+                ids = rows[value] = array('i')
+            ids.append(index)
+        return cls(rows)
+
+    def lookup(self, values: Iterable[str]) -> Sequence[int]:
+        """Возвращает номера строк, равных одному из значений values."""
+        groups = [self.rows.get(value, ()) for value in values]
+        if len(groups) == 1:
+            return groups[0]
+        return list(chain.from_iterable(groups))
+
+    def to_sections(self) -> List[bytes]:
+        """Возвращает байты индекса: значения, размеры групп и номера."""
+        ids = array('i')
+        for rows in self.rows.values():
+            ids.extend(rows)
+        return [
+            json.dumps(list(self.rows), ensure_ascii=False).encode('utf-8'),
+            array('q', map(len, self.rows.values())).tobytes(),
+            ids.tobytes(),
+        ]
+
+    @classmethod
+    def from_sections(
+            cls, sections: Sequence[bytes], swap: bool = False
+    ) -> 'HashIndex':
+        """Восстанавливает индекс из байтов `to_sections`."""
+        keys = json.loads(bytes(sections[0]))
+        sizes = _from_bytes('q', sections[1])
+        ids = _from_bytes('i', sections[2])
+        if swap:
+            sizes.byteswap()
+            ids.byteswap()
+        if len(keys) != len(sizes) or sum(sizes) != len(ids):
+            raise ValueError('Повреждённый хеш-индекс')
+        rows = {}
+        offset = 0
+        for key, size in zip(keys, sizes):
+            rows[key] = ids[offset:offset + size]
+            offset += size
+        return cls(rows)
+
+
+class SortedIndex:
+    """
+    Отсортированный индекс числового поля.
+
+    Хранит номера строк в порядке возрастания значений и сами значения в
+    том же порядке. Строки для условий >, <, >=, <= и = находятся двоичным
+    поиском и образуют непрерывный отрезок `order`. Значения NaN в индекс
+    не входят: ни одно из этих сравнений для них не выполняется.
+    """
+
+    kind = 'sorted'
+
+    def __init__(self, order: array, values: array):
+        self.order = order
+        self.values = values
+
+    @classmethod
+    def build(cls, column: array) -> 'SortedIndex':
+        """Строит индекс по столбцу `array('d')` или `array('q')`."""
+        order = array('i', sorted(
+            (index for index, value in enumerate(column) if value == value),
+            key=column.__getitem__
+        ))
+        values = array(column.typecode, map(column.__getitem__, order))
+        return cls(order, values)
+
+    def lookup(self, operator: str, value: float) -> Sequence[int]:
+        """Возвращает номера строк, удовлетворяющих условию."""
+        values = self.values
+        if value != value:
+            return ()
+        start, stop = 0, len(values)
+        if operator in ('>=', '='):
+            start = bisect_left(values, value)
+        elif operator == '>':
+            start = bisect_right(values, value)
+        if operator in ('<=', '='):
+            stop = bisect_right(values, value)
+        elif operator == '<':
+            stop = bisect_left(values, value)
+        return self.order[start:stop]
+
+    def to_sections(self) -> List[bytes]:
+        """Возвращает байты индекса: тип значений, номера и значения."""
+        return [
+            self.values.typecode.encode('ascii'),
+            self.order.tobytes(),
+            self.values.tobytes(),
+        ]
+
+    @classmethod
+    def from_sections(
+            cls, sections: Sequence[bytes], swap: bool = False
+    ) -> 'SortedIndex':
+        """Восстанавливает индекс из байтов `to_sections`."""
+        typecode = bytes(sections[0]).decode('ascii')
+        if typecode not in ('d', 'q'):
+            raise ValueError('Неверный тип значений индекса')
+        order = _from_bytes('i', sections[1])
+        values = _from_bytes(typecode, sections[2])
+        if swap:
+            order.byteswap()
+            values.byteswap()
+        if len(order) != len(values):
+            raise ValueError('Повреждённый отсортированный индекс')
+        return cls(order, values)
+
+
+Index = Union[HashIndex, SortedIndex]
+
+# Классы индексов по имени вида в записи кэша
+INDEX_KINDS: Dict[str, type] = {
+    HashIndex.kind: HashIndex,
+    SortedIndex.kind: SortedIndex,
+}
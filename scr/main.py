@@ -1,21 +1,42 @@
 import argparse
-import json
+import os
 import re
 import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Union
+from typing import (Any, Callable, ContextManager, Dict, Iterable, Iterator,
+                    List, Optional, TextIO, Union)
 
 from tabulate import tabulate
 
 sys.path.append(str(Path(__file__).parent.parent))
 
-from scr.constants import AGGR_PATTERN, ORDER_PATTERN
+from scr.caches.caches import TableCache
+from scr.constants import (AGGR_PATTERN, AGGREGATIONS, CACHE_DIR,
+                           CACHE_MAX_SIZE, CHUNK_MIN_SIZE, DISTINCT_MODES,
+                           EXTERNAL_SORT, FILTER, GROUP_PATTERN, INFER_ROWS,
+                           LIMIT, NULLS_DEFAULT, ORDER_PATTERN, QUERY_PARAMS,
+                           SCHEMA_SUFFIX, SERVE_PORT, SORT, STDIN_PATH, TOP_K)
 from scr.exceptions import (InvalidAggregationError,
-                            InvalidFilterConditionError, InvalidSortError,
-                            UnsupportedFieldTypeError,
+                            InvalidFilterConditionError, InvalidSchemaError,
+                            InvalidSortError, UnsupportedFieldTypeError,
                             UnsupportedOperatorError)
-from scr.parsers.parsers import ParserCsv
-from scr.reports.reports import Aggregator, Filter, Sorter
+from scr.parsers.parsers import (ChunkedParserCsv, MmapParserCsv, ParseOptions,
+                                 ParserCsv)
+from scr.planner.planner import QueryPlanner
+from scr.reports.index_reports import IndexedFilter
+from scr.reports.numpy_reports import (NumpyAggregator, NumpyFilter,
+                                       NumpySorter, numpy_available)
+from scr.reports.reports import Aggregator, Filter, Sorter, SortKey
+from scr.schemas.schemas import (TYPE_NAMES, load_schema, load_sidecar_schema,
+                                 save_sidecar_schema)
+from scr.server.server import QueryServer
+from scr.tables.tables import Table, common_types, is_numeric
+from scr.writers.writers import (JsonWriter, NdjsonWriter, TextTableWriter,
+                                 missing_to_none)
 
 
 class ValidateFilesAction(argparse.Action):
@@ -23,13 +44,16 @@ class ValidateFilesAction(argparse.Action):
     Валидация параметра файла для обработки.
 
     Проверяет, является ли путь файлом, существует ли он и имеет ли правильное
-     расширение.
+     расширение. Путь "-" означает стандартный ввод и не проверяется.
     """
 
     def __call__(self, parser, namespace, values, option_string=None):
         """Проверка пути к файлу."""
         valid_files = []
         for file_path in values:
+            if file_path == STDIN_PATH:
+                valid_files.append(file_path)
+                continue
             path = Path(file_path)
             if not path.exists():
                 parser.error(f'Файл "{file_path}" не существует')
@@ -43,6 +67,31 @@ class ValidateFilesAction(argparse.Action):
         setattr(namespace, 'files', valid_files)
 
 
+def positive_int(value: str) -> int:
+    """Преобразует аргумент в целое положительное число."""
+    number = non_negative_int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f'ожидается число больше нуля, получено: {value}'
+        )
+    return number
+
+
+def non_negative_int(value: str) -> int:
+    """Преобразует аргумент в целое неотрицательное число."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f'ожидается целое число, получено: {value}'
+        )
+    if number < 0:
+        raise argparse.ArgumentTypeError(
+            f'ожидается неотрицательное число, получено: {value}'
+        )
+    return number
+
+
 def parse_arguments() -> argparse.Namespace:
     """Парсит аргументы выполнения скрипта."""
     parser = argparse.ArgumentParser(
@@ -53,12 +102,15 @@ def parse_arguments() -> argparse.Namespace:
         nargs='+',
         action=ValidateFilesAction,
         help='Пути к CSV-файлам для обработки (например, data1.csv data2.csv)'
+             ', "-" для чтения из стандартного ввода'
     )
     parser.add_argument(
         '--report',
-        choices=['terminal', 'json'],
+        choices=['terminal', 'plain', 'tsv', 'json', 'ndjson'],
         default='terminal',
-        help='Тип отчёта: "terminal" для вывода в терминал, "json" для JSON'
+        help='Тип отчёта: "terminal" для вывода в терминал, "plain" и "tsv" '
+             'для потокового вывода больших отчётов в терминал, "json" для '
+             'JSON, "ndjson" для JSON-объектов по одному на строку'
     )
     parser.add_argument(
         '--output',
@@ -74,14 +126,140 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         '--aggregate',
         help='Агрегация данных в формате "field=operation", например, '
-             '"rating=avg" или "price=min"'
+             '"rating=avg" или "price=p95". Несколько агрегаций '
+             'перечисляются через запятую и вычисляются за один проход, '
+             'например, "price=min,price=max,rating=avg". Операции: '
+             f'{", ".join(AGGREGATIONS)}'
+    )
+    parser.add_argument(
+        '--group-by',
+        help='Поля группировки через запятую для --aggregate, например, '
+             '"brand" или "brand,rating": агрегация вычисляется для каждой '
+             'группы строк с равными значениями полей'
+    )
+    parser.add_argument(
+        '--distinct',
+        choices=DISTINCT_MODES,
+        default='exact',
+        help='Режим count_distinct: exact — точный подсчёт множеством '
+             'значений, hll — приближённый подсчёт скетчем HyperLogLog '
+             'в фиксированной памяти (ошибка около 1%%)'
     )
     parser.add_argument(
         '--order-by',
         help='Сортировка данных в формате "field=order", например, "brand=asc"'
-             ' или "price=desc"'
+             ' или "price=desc". Несколько ключей перечисляются через '
+             'запятую: "brand=asc,price=desc". Пустые значения по умолчанию '
+             'идут в конце, "price=desc nulls first" ставит их в начало'
     )
-    return parser.parse_args()
+    parser.add_argument(
+        '--limit',
+        type=non_negative_int,
+        help='Максимальное количество строк в отчёте. Вместе с --order-by '
+             'первые строки выбираются без полной сортировки'
+    )
+    parser.add_argument(
+        '--offset',
+        type=non_negative_int,
+        default=0,
+        help='Количество строк, пропускаемых в начале отчёта (по умолчанию: 0)'
+    )
+    parser.add_argument(
+        '--sort-buffer',
+        type=positive_int,
+        help='Количество строк, сортируемых в памяти. Если данных больше, '
+             '--order-by выполняется внешней сортировкой через временные '
+             'файлы'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=positive_int,
+        default=1,
+        help='Количество процессов для параллельного парсинга файлов, '
+             'большие файлы делятся на части, если ядер процессора больше '
+             'одного (по умолчанию: 1)'
+    )
+    parser.add_argument(
+        '--engine',
+        choices=['python', 'numpy'],
+        default='python',
+        help='Движок выполнения отчётов: "python" (по умолчанию) или '
+             '"numpy" для векторных вычислений (требует пакет numpy)'
+    )
+    parser.add_argument(
+        '--reader',
+        choices=['csv', 'mmap'],
+        default='csv',
+        help='Способ чтения файлов: "csv" (по умолчанию) или "mmap" для '
+             'чтения файла, отображённого в память без декодирования '
+             'неиспользуемых полей'
+    )
+    parser.add_argument(
+        '--infer-rows',
+        type=positive_int,
+        default=INFER_ROWS,
+        help='Количество первых строк файла, по которым определяются типы '
+             f'полей (по умолчанию: {INFER_ROWS})'
+    )
+    parser.add_argument(
+        '--schema',
+        help='JSON-файл схемы с типами полей, например: '
+             '{"name": "str", "price": "float"}. Типы полей из схемы не '
+             'определяются по данным'
+    )
+    parser.add_argument(
+        '--save-schema',
+        action='store_true',
+        help='Сохранить типы полей в файл схемы рядом с CSV-файлом '
+             f'(имя файла с суффиксом {SCHEMA_SUFFIX}), при следующих '
+             'запусках схема загружается автоматически'
+    )
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='Сохранять разобранные файлы в двоичный кэш и загружать '
+             'неизменённые файлы из него без повторного парсинга'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=CACHE_DIR,
+        help=f'Папка кэша разобранных файлов (по умолчанию: {CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=positive_int,
+        default=CACHE_MAX_SIZE,
+        help='Максимальный размер кэша в мегабайтах, давно не '
+             f'использованные записи удаляются (по умолчанию: '
+             f'{CACHE_MAX_SIZE})'
+    )
+    parser.add_argument(
+        '--index',
+        action='store_true',
+        help='Фильтровать по индексам полей вместо просмотра всех строк. '
+             'Вместе с --cache построенные индексы сохраняются в кэш и '
+             'используются при следующих запусках. Несовместимо с '
+             '--engine numpy'
+    )
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Запустить локальный HTTP-сервер запросов: файлы разбираются '
+             'один раз и перезагружаются при изменении, запросы '
+             'выполняются по адресу /query с параметрами where, order_by, '
+             'aggregate, group_by, distinct, limit и offset'
+    )
+    parser.add_argument(
+        '--port',
+        type=positive_int,
+        default=SERVE_PORT,
+        help=f'Порт сервера запросов --serve (по умолчанию: {SERVE_PORT})'
+    )
+    args = parser.parse_args()
+    if args.index and args.engine == 'numpy':
+        parser.error('--index нельзя использовать вместе с --engine numpy: '
+                     'фильтрация по индексам выполняется без NumPy')
+    return args
 
 
 def validate_aggregate(
@@ -94,36 +272,93 @@ def validate_aggregate(
         )
     match = re.match(AGGR_PATTERN, aggregate)
     if not match:
+        operations = ', '.join(f'"{name}"' for name in AGGREGATIONS)
         raise InvalidAggregationError(
             'Неверный формат агрегации: должен быть "field=operation", где '
-            'operation в ["avg", "min", "max"]'
+            f'operation в [{operations}]'
         )
     field, operation = match.groups()
     if field not in field_types:
         raise InvalidAggregationError(f'Поле "{field}" отсутствует в данных')
-    if field_types[field] != float:
+    if operation != 'count_distinct' and not is_numeric(field_types[field]):
         raise UnsupportedFieldTypeError(
             f'Агрегация возможна только для числовых полей, "{field}" имеет '
-            f'тип {field_types[field]}')
+            f'тип {TYPE_NAMES[field_types[field]]}')
     return field, operation
 
 
+def validate_aggregates(
+        aggregate: str, field_types: Dict[str, type]
+) -> List[tuple[str, str]]:
+    """
+    Валидирует список агрегаций --aggregate через запятую.
+
+    Возвращает список (field, operation) в порядке перечисления.
+    """
+    if not aggregate:
+        return [validate_aggregate(aggregate, field_types)]
+    return [
+        validate_aggregate(item.strip(), field_types)
+        for item in aggregate.split(',')
+    ]
+
+
+def validate_group_by(
+        group_by: str, field_types: Dict[str, type]
+) -> List[str]:
+    """Валидирует аргумент --group-by, возвращает список полей."""
+    if not group_by or not group_by.strip():
+        raise InvalidAggregationError(
+            'Аргумент --group-by не может быть пустым'
+        )
+    if not re.match(GROUP_PATTERN, group_by):
+        raise InvalidAggregationError(
+            'Неверный формат группировки: должны быть поля через запятую, '
+            'например "brand" или "brand,rating"'
+        )
+    fields = list(dict.fromkeys(
+        field.strip() for field in group_by.split(',')
+    ))
+    for field in fields:
+        if field not in field_types:
+            raise InvalidAggregationError(
+                f'Поле "{field}" отсутствует в данных'
+            )
+    return fields
+
+
 def validate_order_by(
         order_by: str, field_types: Dict[str, type]
-) -> tuple[str, str]:
-    """Валидирует аргумент --order-by, возвращает (field, order)."""
+) -> List[SortKey]:
+    """
+    Валидирует аргумент --order-by с ключами через запятую.
+
+    Возвращает список (field, order, nulls) в порядке перечисления.
+    """
     if not order_by:
         raise InvalidSortError('Аргумент --order-by не может быть пустым')
-    match = re.match(ORDER_PATTERN, order_by)
-    if not match:
-        raise InvalidSortError(
-            'Неверный формат сортировки: должен быть "field=order", где order'
-            ' в ["asc", "desc"]'
-        )
-    field, order = match.groups()
-    if field not in field_types:
-        raise InvalidSortError(f'Поле "{field}" отсутствует в данных')
-    return field, order
+    keys = []
+    for item in order_by.split(','):
+        match = re.match(ORDER_PATTERN, item.strip())
+        if not match:
+            raise InvalidSortError(
+                'Неверный формат сортировки: должен быть "field=order", где '
+                'order в ["asc", "desc"], после порядка можно указать '
+                '"nulls first" или "nulls last"'
+            )
+        field, order, nulls = match.groups()
+        if field not in field_types:
+            raise InvalidSortError(f'Поле "{field}" отсутствует в данных')
+        keys.append((field, order, nulls or NULLS_DEFAULT))
+    return keys
+
+
+def report_description(where: str, aggregate: str = None) -> str:
+    """Возвращает описание отчёта для вывода в терминал."""
+    return (f'Агрегация товаров (условие: {where or "без фильтра"}, '
+            f'агрегация: {aggregate})') \
+        if aggregate else (f'Отфильтрованные товары (условие: '
+                           f'{where or "без фильтра"})')
 
 
 def print_table(
@@ -133,64 +368,540 @@ def print_table(
         where: str,
         aggregate: str = None
 ) -> None:
-    """Выводит таблицу в Таблица в терминал с описанием отчёта."""
-    description = (f'Агрегация товаров (условие: {where or "без фильтра"}, '
-                   f'агрегация: {aggregate})') \
-        if aggregate else (f'Отфильтрованные товары (условие: '
-                           f'{where or "без фильтра"})')
-    print(description + ':')
+    """
+    Выводит таблицу в Таблица в терминал с описанием отчёта.
+
+    Пустые значения NaN, как и None, выводятся пустыми ячейками.
+    """
+    print(report_description(where, aggregate) + ':')
+    data = [missing_to_none(row) for row in data]
     print(tabulate(data, headers=headers, tablefmt='grid', floatfmt=floatfmt))
 
 
-def save_json(data: Any, output: str, output_dir: str = 'export') -> None:
-    """Сохраняет данные в JSON-файл в указанной папке."""
+def print_stream_table(
+        rows: Iterable[Dict[str, Any]],
+        fmt: str,
+        floatfmt: str,
+        where: str,
+        aggregate: str = None
+) -> None:
+    """
+    Потоково выводит отчёт в терминал в формате plain или tsv.
+
+    Строки выводятся по мере чтения, без построения всей таблицы, поэтому
+    вывод удобно передавать в пейджер. Для tsv описание отчёта не
+    выводится, чтобы вывод можно было сразу обрабатывать другими
+    программами.
+    """
+    try:
+        if fmt != 'tsv':
+            print(report_description(where, aggregate) + ':')
+        TextTableWriter(sys.stdout, fmt, floatfmt).write(rows)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Читатель закрыл вывод (например, head или пейджер)
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(0)
+
+
+def save_json(
+        data: Any, output: str, output_dir: str = 'export', fmt: str = 'json'
+) -> None:
+    """
+    Сохраняет данные в JSON-файл в указанной папке.
+
+    Последовательность строк записывается потоково, без сборки всего
+    отчёта в памяти. При fmt="ndjson" каждая строка записывается
+    компактным объектом на отдельной строке файла.
+    """
     output_path = Path(output_dir)
     output_path.mkdir(exist_ok=True)
-    output_file = output_path / f'{output}.json' \
-        if not output.endswith('.json') else output_path / output
+    extension = f'.{fmt}'
+    output_file = output_path / f'{output}{extension}' \
+        if not output.endswith(extension) else output_path / output
+    writer_class = NdjsonWriter if fmt == 'ndjson' else JsonWriter
     try:
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            writer_class(f).write(data)
         print(f'Отчёт сохранён в файл: {output_file}')
     except Exception as e:
         print(f'Ошибка при сохранении JSON: {e}')
         sys.exit(1)
 
 
-def process_files(file_paths: List[str]) -> tuple[List[Any], Dict[str, type]]:
+def open_csv(file_path: str) -> ContextManager[TextIO]:
+    """Открывает CSV-файл для чтения, "-" означает стандартный ввод."""
+    if file_path == STDIN_PATH:
+        return nullcontext(sys.stdin)
+    return open(file_path, 'r', encoding='utf-8', newline='')
+
+
+def file_schema(
+        file_path: str, options: ParseOptions
+) -> Optional[Dict[str, type]]:
+    """
+    Возвращает схему файла.
+
+    Явно заданная схема важнее схемы, сохранённой рядом с CSV-файлом.
+    """
+    if options.schema is not None or file_path == STDIN_PATH:
+        return options.schema
+    return load_sidecar_schema(file_path)
+
+
+def cache_signature(file_path: str, options: ParseOptions) -> str:
+    """
+    Возвращает параметры разбора файла для ключа кэша.
+
+    В них входит и схема, сохранённая рядом с CSV-файлом, поэтому после
+    её изменения файл разбирается заново.
+    """
+    return options.signature(file_schema(file_path, options))
+
+
+def file_warn(
+        file_path: str, warn: Callable[[str], None] = print
+) -> Callable[[str], None]:
+    """Возвращает функцию, передающую warn предупреждение с путём файла."""
+    def warn_file(message: str) -> None:
+        warn(f'Файл "{file_path}": {message}')
+    return warn_file
+
+
+def create_parser(
+        file_path: str,
+        file: TextIO,
+        options: Optional[ParseOptions] = None,
+        warn: Callable[[str], None] = print
+) -> ParserCsv:
+    """
+    Создаёт парсер файла с указанными параметрами разбора.
+
+    Стандартный ввод нельзя отобразить в память, поэтому он всегда
+    читается модулем `csv`. Предупреждения о пропущенных строках
+    передаются функции warn с путём файла.
+    """
+    options = options or ParseOptions()
+    schema = file_schema(file_path, options)
+    warn = file_warn(file_path, warn)
+    if options.reader == 'mmap' and file_path != STDIN_PATH:
+        return MmapParserCsv(
+            file_path, options.fields, options.infer_rows, schema, warn
+        )
+    return ParserCsv(file, options.infer_rows, options.fields, schema, warn)
+
+
+def _save_schema(
+        file_path: str, field_types: Dict[str, type], options: ParseOptions
+) -> None:
+    """Сохраняет типы полей рядом с CSV-файлом, если это запрошено."""
+    if options.save_schema and field_types and file_path != STDIN_PATH:
+        save_sidecar_schema(file_path, field_types)
+
+
+def parse_file(
+        file_path: str,
+        executor: Optional[Executor] = None,
+        chunks: int = 1,
+        cache: Optional[TableCache] = None,
+        options: Optional[ParseOptions] = None
+) -> tuple[Optional[Table], Dict[str, type], List[str]]:
+    """
+    Функция читает и парсит один CSV-файл.
+
+    Возвращает таблицу (None при ошибке), словарь типов полей и список
+    предупреждений и сообщений об ошибках. Сообщения не печатаются
+    сразу, в том числе в процессах-обработчиках, чтобы при параллельном
+    парсинге их можно было вывести в порядке файлов. Если
+    передан пул процессов и chunks > 1, файл делится на chunks диапазонов,
+    которые парсятся параллельно. Если передан кэш, неизменённый файл
+    загружается из него, а разобранный файл сохраняется в кэш. Параметры
+    разбора задаются options.
+    """
+    options = options or ParseOptions()
+    use_cache = cache is not None and file_path != STDIN_PATH
+    if use_cache:
+        cached = cache.load(
+            file_path, options.fields, cache_signature(file_path, options)
+        )
+        if cached is not None:
+            _save_schema(file_path, cached[1], options)
+            return cached[0], cached[1], []
+    messages: List[str] = []
+    try:
+        with open_csv(file_path) as file:
+            try:
+                if executor is not None and chunks > 1:
+                    goods, types = ChunkedParserCsv(
+                        file_path,
+                        options.infer_rows,
+                        options.fields,
+                        file_schema(file_path, options),
+                        file_warn(file_path, messages.append)
+                    ).parse_table(executor, chunks)
+                else:
+                    goods, types = create_parser(
+                        file_path, file, options, messages.append
+                    ).parse_table()
+                _save_schema(file_path, types, options)
+                if use_cache and types:
+                    # Подпись берётся после сохранения схемы, чтобы
+                    # следующий запуск со схемой попал в эту запись
+                    cache.store(
+                        file_path, goods, options.fields,
+                        cache_signature(file_path, options)
+                    )
+                return goods, types, messages
+            except ValueError as e:
+                message = f'Ошибка данных в файле "{file_path}": {e}'
+            except Exception as e:
+                message = f'Ошибка при парсинге файла "{file_path}": {e}'
+    except Exception as e:
+        message = f'Ошибка при чтении файла "{file_path}": {e}'
+    return None, {}, messages + [message]
+
+
+def _is_large_file(file_path: str) -> bool:
+    """Проверяет, нужно ли парсить файл параллельно по диапазонам."""
+    if file_path == STDIN_PATH:
+        return False
+    try:
+        return os.path.getsize(file_path) >= CHUNK_MIN_SIZE
+    except OSError:
+        return False
+
+
+def _parse_files(
+        file_paths: List[str],
+        jobs: int,
+        cache: Optional[TableCache] = None,
+        options: Optional[ParseOptions] = None
+) -> Iterator[tuple[Optional[Table], Dict[str, type], List[str]]]:
+    """
+    Парсит файлы, при jobs > 1 — в пуле процессов.
+
+    Небольшие файлы парсятся целиком в отдельных процессах, большие
+    делятся на диапазоны байтов, которые парсятся параллельно, — не
+    больше частей, чем ядер процессора. Результаты возвращаются в порядке
+    входных файлов. Стандартный ввод всегда читается в основном процессе.
+    """
+    parse = partial(parse_file, cache=cache, options=options)
+    if jobs <= 1:
+        yield from map(parse, file_paths)
+        return
+    # На одном ядре части файла разбирались бы по очереди, а пересылка
+    # таблиц между процессами только замедлила бы разбор
+    chunks = min(jobs, os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            None if file_path == STDIN_PATH or (
+                chunks > 1 and _is_large_file(file_path)
+            ) else executor.submit(parse, file_path)
+            for file_path in file_paths
+        ]
+        for file_path, future in zip(file_paths, futures):
+            if future is not None:
+                yield future.result()
+            elif file_path == STDIN_PATH:
+                yield parse(file_path)
+            else:
+                yield parse(file_path, executor, chunks)
+
+
+def process_files(
+        file_paths: List[str],
+        jobs: int = 1,
+        cache: Optional[TableCache] = None,
+        options: Optional[ParseOptions] = None
+) -> tuple[Table, Dict[str, type]]:
     """
     Функция читает и парсит CSV-файлы.
 
-    Возвращает список объектов и словарь типов полей.
+    Возвращает колоночную таблицу `Table` и словарь типов полей. Файлы,
+    типы полей которых несовместимы с первым файлом, пропускаются, а
+    совместимые приводятся к общим типам (`common_types`). При
+    jobs > 1 файлы парсятся параллельно, а предупреждения и ошибки
+    выводятся в порядке входных файлов. Если передан кэш, неизменённые
+    файлы загружаются из него. Параметры разбора options передаются в
+    `parse_file`.
     """
-    combined_goods = []
+    combined_goods = None
     field_types = {}
+    results = _parse_files(file_paths, jobs, cache, options)
+    for file_path, (goods, types, errors) in zip(file_paths, results):
+        for message in errors:
+            print(message)
+        if not types:
+            continue
+        if combined_goods is None:
+            combined_goods = goods
+            field_types = types
+            continue
+        merged_types = common_types(field_types, types)
+        if merged_types is None:
+            print(
+                f'Предупреждение: файл "{file_path}" '
+                f'имеет разные типы полей и пропущен'
+            )
+            continue
+        if merged_types != field_types:
+            combined_goods = combined_goods.cast(merged_types)
+            field_types = merged_types
+        combined_goods.extend(goods.cast(merged_types))
+    if not combined_goods:
+        print('Ошибка: ни один файл не был успешно обработан.')
+        sys.exit(1)
+    return combined_goods, field_types
+
+
+def _iter_sources(
+        file_paths: List[str],
+        options: Optional[ParseOptions] = None
+) -> Iterator[tuple[str, Iterator[Any], Dict[str, type]]]:
+    """
+    Открывает CSV-файлы по очереди и возвращает их ленивые итераторы.
+
+    Файл остаётся открытым, пока потребитель не запросит следующий.
+    """
+    options = options or ParseOptions()
     for file_path in file_paths:
         try:
-            with open(file_path, 'r', encoding='utf-8', newline='') as file:
+            with open_csv(file_path) as file:
                 try:
-                    goods, types = ParserCsv(file).parse_data()
-                    combined_goods += goods
-                    if not field_types:
-                        field_types = types
-                    elif field_types != types:
-                        print(
-                            f'Предупреждение: файл "{file_path}" '
-                            f'имеет разные типы полей'
-                        )
-                except ValueError as e:
-                    print(f'Ошибка данных в файле "{file_path}": {e}')
-                    continue
+                    parser = create_parser(file_path, file, options)
+                    rows = _iter_saving_schema(
+                        file_path, parser, parser.iter_rows(), options
+                    )
                 except Exception as e:
                     print(f'Ошибка при парсинге файла "{file_path}": {e}')
                     continue
+                yield file_path, rows, parser.field_types
         except Exception as e:
             print(f'Ошибка при чтении файла "{file_path}": {e}')
             continue
-    if not combined_goods:
+
+
+def _iter_saving_schema(
+        file_path: str,
+        parser: ParserCsv,
+        rows: Iterator[Any],
+        options: ParseOptions
+) -> Iterator[Any]:
+    """
+    Отдаёт строки файла и сохраняет схему, когда файл прочитан до конца.
+
+    Типы полей берутся после последней строки: целое поле могло быть
+    расширено до дробного уже после выборки. Если чтение остановлено
+    раньше или прервано ошибкой, схема не сохраняется.
+    """
+    yield from rows
+    _save_schema(file_path, parser.field_types, options)
+
+
+def _iter_rows_safely(file_path: str, rows: Iterator[Any]) -> Iterator[Any]:
+    """Отдаёт строки файла, прерывая чтение файла при ошибке данных."""
+    try:
+        yield from rows
+    except ValueError as e:
+        print(f'Ошибка данных в файле "{file_path}": {e}')
+    except Exception as e:
+        print(f'Ошибка при парсинге файла "{file_path}": {e}')
+
+
+def stream_files(
+        file_paths: List[str],
+        options: Optional[ParseOptions] = None
+) -> tuple[Iterator[Any], Dict[str, type]]:
+    """
+    Функция читает CSV-файлы потоково, за один проход.
+
+    Возвращает ленивый итератор объектов и словарь типов полей первого
+    файла с данными. В отличие от `process_files`, строки не накапливаются
+    в памяти, поэтому при ошибке данных уже прочитанные строки файла
+    остаются в выборке, а чтение продолжается со следующего файла.
+    Файлы с несовместимыми типами полей пропускаются (`common_types`).
+    Параметры разбора задаются options.
+    """
+    sources = _iter_sources(file_paths, options)
+    for file_path, rows, field_types in sources:
+        if field_types:
+            break
+    else:
         print('Ошибка: ни один файл не был успешно обработан.')
         sys.exit(1)
-    return combined_goods, field_types
+
+    def iter_goods() -> Iterator[Any]:
+        yield from _iter_rows_safely(file_path, rows)
+        for other_path, other_rows, types in sources:
+            if not types:
+                continue
+            if common_types(field_types, types) is None:
+                print(
+                    f'Предупреждение: файл "{other_path}" '
+                    f'имеет разные типы полей и пропущен'
+                )
+                continue
+            yield from _iter_rows_safely(other_path, other_rows)
+
+    return iter_goods(), field_types
+
+
+def store_indexes(
+        file_paths: List[str],
+        table: Table,
+        loaded: Iterable[str],
+        cache: TableCache,
+        options: ParseOptions
+) -> None:
+    """
+    Сохраняет в кэш индексы, построенные при фильтрации таблицы.
+
+    Индексы хранятся для записи одного файла, поэтому для таблицы,
+    собранной из нескольких файлов, они не сохраняются. loaded — поля,
+    индексы которых уже были загружены из кэша.
+    """
+    if len(file_paths) != 1 or file_paths[0] == STDIN_PATH:
+        return
+    if not isinstance(table, Table) or not set(table.indexes) - set(loaded):
+        return
+    cache.store_indexes(
+        file_paths[0], table, options.fields,
+        cache_signature(file_paths[0], options)
+    )
+
+
+def limit_goods(
+        goods: Iterable[Any], limit: Optional[int], offset: int = 0
+) -> Union[List[Any], Table]:
+    """
+    Возвращает не больше limit строк, пропустив первые offset.
+
+    Ленивый источник читается только до последней нужной строки.
+    """
+    stop = None if limit is None else offset + limit
+    if isinstance(goods, Table):
+        return goods.take(range(len(goods))[offset:stop])
+    return list(islice(goods, offset, stop))
+
+
+def _query_int(query: Dict[str, str], name: str) -> Optional[int]:
+    """Возвращает целый неотрицательный параметр запроса или None."""
+    value = query.get(name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise ValueError(
+            f'Параметр {name} должен быть целым неотрицательным числом, '
+            f'получено: {value}'
+        )
+    return number
+
+
+def execute_query(
+        table: Table,
+        field_types: Dict[str, type],
+        query: Dict[str, str],
+        filter_class: type = Filter,
+        sorter_class: type = Sorter,
+        aggregator_class: type = Aggregator
+) -> Any:
+    """
+    Выполняет запрос сервера (`--serve`) к загруженной таблице.
+
+    Параметры query повторяют аргументы командной строки: where,
+    order_by, aggregate, group_by, distinct, limit и offset. Возвращает
+    словарь результатов агрегации, список групп или список строк в виде
+    словарей. Ошибки в параметрах вызывают исключения ValueError.
+    """
+    unknown = sorted(set(query) - set(QUERY_PARAMS))
+    if unknown:
+        raise ValueError(
+            f'Неизвестные параметры запроса: {", ".join(unknown)}'
+        )
+    distinct = query.get('distinct', 'exact')
+    if distinct not in DISTINCT_MODES:
+        raise InvalidAggregationError(
+            f'Недопустимый режим count_distinct: {distinct}'
+        )
+    if query.get('group_by') and not query.get('aggregate'):
+        raise InvalidAggregationError(
+            'group_by используется только вместе с aggregate'
+        )
+    # Таблица уже в памяти, поэтому план не использует потоковое чтение
+    plan = QueryPlanner(cached=True).plan(
+        query.get('where'), query.get('order_by'), query.get('aggregate'),
+        _query_int(query, 'limit'), _query_int(query, 'offset'),
+        query.get('group_by')
+    )
+
+    goods = table
+    if FILTER in plan.stages:
+        goods = filter_class(goods, field_types).filter_goods(plan.where)
+    if plan.order_by:
+        keys = validate_order_by(plan.order_by, field_types)
+        if SORT in plan.stages:
+            goods = sorter_class(goods, field_types).sort_goods_by(keys)
+        elif TOP_K in plan.stages:
+            goods = sorter_class(goods, field_types).top_goods_by(
+                keys, plan.limit, plan.offset
+            )
+    if LIMIT in plan.stages:
+        goods = limit_goods(goods, plan.limit, plan.offset)
+
+    if not plan.aggregate:
+        return [vars(good) for good in goods]
+    aggregates = validate_aggregates(plan.aggregate, field_types)
+    aggregator = aggregator_class(goods, field_types)
+    if plan.group_by:
+        return aggregator.calculate_group_aggregations(
+            validate_group_by(plan.group_by, field_types), aggregates,
+            distinct=distinct
+        )
+    return aggregator.calculate_aggregations(aggregates, distinct=distinct)
+
+
+def serve(
+        args: argparse.Namespace,
+        filter_class: type,
+        sorter_class: type,
+        aggregator_class: type
+) -> None:
+    """
+    Запускает сервер запросов `QueryServer` по аргументам --serve.
+
+    Файлы разбираются целиком, так как поля будущих запросов заранее
+    неизвестны. Стандартный ввод нельзя перечитать при изменении,
+    поэтому он не поддерживается.
+    """
+    if STDIN_PATH in args.files:
+        print('Ошибка: --serve не поддерживает чтение из стандартного ввода')
+        sys.exit(1)
+    try:
+        schema = load_schema(args.schema) if args.schema else None
+    except InvalidSchemaError as e:
+        print(f'Ошибка в схеме: {e}')
+        sys.exit(1)
+    cache = TableCache(args.cache_dir, args.cache_size * 1024 * 1024) \
+        if args.cache else None
+    options = ParseOptions(
+        args.reader, None, args.infer_rows, schema, args.save_schema
+    )
+    QueryServer(
+        partial(process_files, args.files, args.jobs, cache, options),
+        partial(
+            execute_query,
+            filter_class=filter_class,
+            sorter_class=sorter_class,
+            aggregator_class=aggregator_class
+        ),
+        args.files,
+        port=args.port
+    ).run()
 
 
 def main():
@@ -201,44 +912,157 @@ def main():
     """
     args = parse_arguments()
 
+    # Выбор движка выполнения отчётов
+    use_numpy = args.engine == 'numpy'
+    if use_numpy and not numpy_available():
+        print('Ошибка: движок numpy недоступен, установите пакет numpy')
+        sys.exit(1)
+    filter_class = NumpyFilter if use_numpy else Filter
+    if args.index:
+        filter_class = IndexedFilter
+    sorter_class = NumpySorter if use_numpy else Sorter
+    aggregator_class = NumpyAggregator if use_numpy else Aggregator
+
+    if args.serve:
+        serve(args, filter_class, sorter_class, aggregator_class)
+        return
+
+    if args.group_by and not args.aggregate:
+        print('Ошибка в агрегации: --group-by используется только вместе с '
+              '--aggregate')
+        sys.exit(1)
+
+    cache = TableCache(args.cache_dir, args.cache_size * 1024 * 1024) \
+        if args.cache else None
+
+    # План выполнения: лишние стадии убираются, фильтр и агрегация
+    # при потоковом чтении выполняются за один проход
+    plan = QueryPlanner(
+        use_numpy, args.sort_buffer, args.cache, args.index, args.jobs
+    ).plan(
+        args.where, args.order_by, args.aggregate, args.limit, args.offset,
+        args.group_by
+    )
+    if plan.streaming and args.jobs > 1:
+        print('Предупреждение: --jobs не действует вместе с --sort-buffer, '
+              'файлы читаются потоково в одном процессе')
+
     # Чтение и парсинг данных
-    goods, field_types = process_files(args.files)
+    try:
+        schema = load_schema(args.schema) if args.schema else None
+    except InvalidSchemaError as e:
+        print(f'Ошибка в схеме: {e}')
+        sys.exit(1)
+    # Разбираются только поля, нужные запросу
+    options = ParseOptions(
+        args.reader, plan.fields, args.infer_rows, schema, args.save_schema
+    )
+    if plan.streaming:
+        goods, field_types = stream_files(args.files, options)
+    else:
+        goods, field_types = process_files(
+            args.files, args.jobs, cache, options
+        )
 
     # Фильтрация данных, если указано условие
-    if args.where and args.where.strip():
+    if FILTER in plan.stages:
         try:
-            filter_report = Filter(goods, field_types)
-            goods = filter_report.filter_goods(args.where)
+            filter_report = filter_class(goods, field_types)
+            if plan.fused:
+                goods = filter_report.iter_goods(plan.where)
+            else:
+                table = goods
+                loaded = list(table.indexes) \
+                    if isinstance(table, Table) else []
+                goods = filter_report.filter_goods(plan.where)
+                if cache is not None and args.index:
+                    store_indexes(args.files, table, loaded, cache, options)
         except (InvalidFilterConditionError, UnsupportedOperatorError) as e:
             print(f'Ошибка в условии фильтрации: {e}')
             sys.exit(1)
 
-    # Сортировка данных, если указано
-    if args.order_by:
+    # Сортировка данных, если указано. Аргумент проверяется, даже если
+    # сортировка не влияет на результат и исключена из плана
+    if plan.order_by:
         try:
-            field, order = validate_order_by(args.order_by, field_types)
-            sorter = Sorter(goods, field_types)
-            goods = sorter.sort_goods(field, order)
+            keys = validate_order_by(plan.order_by, field_types)
+            if SORT in plan.stages:
+                sorter = sorter_class(goods, field_types)
+                goods = sorter.sort_goods_by(keys)
+            elif EXTERNAL_SORT in plan.stages:
+                sorter = sorter_class(goods, field_types)
+                goods = sorter.external_sort_goods_by(keys, plan.sort_buffer)
+            elif TOP_K in plan.stages:
+                sorter = sorter_class(goods, field_types)
+                goods = sorter.top_goods_by(keys, plan.limit, plan.offset)
         except InvalidSortError as e:
             print(f'Ошибка в сортировке: {e}')
             sys.exit(1)
 
+    # Ограничение количества строк без сортировки или после неё
+    if LIMIT in plan.stages:
+        goods = limit_goods(goods, plan.limit, plan.offset)
+
     # Обработка агрегации
-    if args.aggregate:
+    if args.aggregate and args.group_by:
+        try:
+            aggregates = validate_aggregates(args.aggregate, field_types)
+            group_by = validate_group_by(args.group_by, field_types)
+            aggregator = aggregator_class(goods, field_types)
+            groups = aggregator.calculate_group_aggregations(
+                group_by, aggregates, distinct=args.distinct
+            )
+            description = f'{args.aggregate}, группировка: {args.group_by}'
+            if args.report == 'terminal':
+                print_table(
+                    groups,
+                    headers='keys',
+                    floatfmt='.2f',
+                    where=args.where,
+                    aggregate=description
+                )
+            elif args.report in ('json', 'ndjson'):
+                save_json(groups, args.output, fmt=args.report)
+            elif args.report in ('plain', 'tsv'):
+                print_stream_table(
+                    groups,
+                    args.report,
+                    floatfmt='.2f',
+                    where=args.where,
+                    aggregate=description
+                )
+        except (InvalidAggregationError, UnsupportedFieldTypeError) as e:
+            print(f'Ошибка в агрегации: {e}')
+            sys.exit(1)
+    elif args.aggregate:
         try:
-            field, operation = validate_aggregate(args.aggregate, field_types)
-            aggregator = Aggregator(goods, field_types)
-            result = aggregator.calculate_aggregation(field, operation)
+            aggregates = validate_aggregates(args.aggregate, field_types)
+            aggregator = aggregator_class(goods, field_types)
+            # Все агрегации вычисляются за один проход и выводятся
+            # одной строкой
+            results = aggregator.calculate_aggregations(
+                aggregates, distinct=args.distinct
+            )
             if args.report == 'terminal':
                 print_table(
-                    [[result]],
-                    headers=[operation],
+                    [list(results.values())],
+                    headers=list(results),
                     floatfmt='.2f',
                     where=args.where,
                     aggregate=args.aggregate
                 )
             elif args.report == 'json':
-                save_json({operation: result}, args.output)
+                save_json(results, args.output)
+            elif args.report == 'ndjson':
+                save_json(results, args.output, fmt='ndjson')
+            elif args.report in ('plain', 'tsv'):
+                print_stream_table(
+                    [results],
+                    args.report,
+                    floatfmt='.2f',
+                    where=args.where,
+                    aggregate=args.aggregate
+                )
         except (InvalidAggregationError, UnsupportedFieldTypeError) as e:
             print(f'Ошибка в агрегации: {e}')
             sys.exit(1)
@@ -248,8 +1072,16 @@ def main():
             data = [good.__dict__ for good in goods]
             print_table(data, headers='keys', floatfmt='.1f', where=args.where)
         elif args.report == 'json':
-            data = [good.__dict__ for good in goods]
+            data = (good.__dict__ for good in goods)
             save_json(data, args.output)
+        elif args.report == 'ndjson':
+            data = (good.__dict__ for good in goods)
+            save_json(data, args.output, fmt='ndjson')
+        elif args.report in ('plain', 'tsv'):
+            data = (good.__dict__ for good in goods)
+            print_stream_table(
+                data, args.report, floatfmt='.1f', where=args.where
+            )
 
 
 if __name__ == '__main__':
@@ -1,73 +1,739 @@
 import csv
-from dataclasses import make_dataclass
-from typing import Any, Dict, List, TextIO
+import mmap
+import os
+from concurrent.futures import Executor
+from dataclasses import dataclass, make_dataclass
+from itertools import chain, islice
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, TextIO)
 
+from scr.constants import CATEGORY_MAX_SHARE, CATEGORY_MIN_ROWS, INFER_ROWS
 from scr.exceptions import InvalidCsvFormatError
+from scr.schemas.schemas import TYPE_NAMES
+from scr.tables.tables import Category, Table, common_types
+
+# Границы значений целого поля: столбец хранится в array('q')
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+# Пустое значение числового поля
+NAN = float('nan')
+
+# Вывод предупреждения о пропущенной строке
+Warn = Callable[[str], None]
+
+
+def _to_float(value: str) -> float:
+    """Преобразует значение к float, пустое значение — NaN."""
+    value = value.strip()
+    if not value:
+        return NAN
+    try:
+        return float(value)
+    except ValueError:
+        raise InvalidCsvFormatError(f'ожидается число, получено "{value}"')
+
+
+def _to_int(value: str) -> int:
+    """
+    Преобразует значение к int.
+
+    Дробная запись целого числа, например "999.0", тоже допускается.
+    Пустое значение в столбце `array('q')` не представить, поэтому оно
+    считается ошибкой.
+    """
+    value = value.strip()
+    if not value:
+        raise InvalidCsvFormatError(
+            'пустое значение целого поля, для пропусков нужен тип float'
+        )
+    try:
+        number = int(value)
+    except ValueError:
+        try:
+            number = float(value)
+        except ValueError:
+            number = None
+        if number is None or not number.is_integer():
+            raise InvalidCsvFormatError(
+                f'ожидается целое число, получено "{value}"'
+            )
+        number = int(number)
+    if not INT64_MIN <= number <= INT64_MAX:
+        raise InvalidCsvFormatError(
+            f'целое число вне допустимого диапазона: "{value}"'
+        )
+    return number
+
+
+def _is_int(value: str) -> bool:
+    """Проверяет, записано ли значение как целое число int64."""
+    try:
+        return INT64_MIN <= int(value) <= INT64_MAX
+    except ValueError:
+        return False
+
+
+def _is_float(value: str) -> bool:
+    """Проверяет, записано ли значение как число."""
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _to_str(value: str) -> str:
+    """Преобразует значение к str, удаляя пробелы по краям."""
+    return value.strip()
+
+
+# Функции преобразования значений CSV к типам полей
+CONVERTERS: Dict[type, Callable[[str], Any]] = {
+    float: _to_float,
+    int: _to_int,
+    str: _to_str,
+    Category: _to_str,
+}
+
+
+@dataclass
+class ParseOptions:
+    """
+    Параметры разбора CSV-файлов.
+
+    reader — способ чтения: "csv" или "mmap". fields — поля, которые
+    нужно разобрать, None означает все поля. infer_rows — количество
+    первых строк для определения типов. schema — явно заданные типы
+    полей. save_schema — сохранять типы полей в файл схемы рядом с
+    CSV-файлом.
+    """
+
+    reader: str = 'csv'
+    fields: Optional[List[str]] = None
+    infer_rows: int = INFER_ROWS
+    schema: Optional[Dict[str, type]] = None
+    save_schema: bool = False
+
+    def signature(self, schema: Optional[Dict[str, type]] = None) -> str:
+        """
+        Параметры, от которых зависят типы полей, для ключа кэша.
+
+        schema — схема, с которой разбирается файл, если она отличается
+        от явно заданной, например загружена из файла рядом с CSV-файлом.
+        """
+        if schema is None:
+            schema = self.schema or {}
+        types = ','.join(
+            f'{field}:{TYPE_NAMES[field_type]}'
+            for field, field_type in sorted(schema.items())
+        )
+        return f'{self.infer_rows}\0{types}'
 
 
 class ParserCsv:
-    """Класс для парсинга CSV."""
+    """
+    Класс для парсинга CSV.
+
+    Если задан fields, разбираются только перечисленные поля: значения
+    остальных столбцов не преобразуются и не сохраняются. Если какого-либо
+    поля из fields нет в заголовке, разбираются все столбцы. Типы полей из
+    schema не определяются по данным, остальные определяются по первым
+    infer_rows строкам. Пустые значения числовых полей становятся NaN.
+    Если после выборки в определённом как целое поле встречается дробное
+    или пустое значение, поле расширяется до дробного.
+    Предупреждения о пропущенных строках передаются функции warn.
+    """
 
-    def __init__(self, csv_file: TextIO):
+    def __init__(
+            self,
+            csv_file: TextIO,
+            infer_rows: int = INFER_ROWS,
+            fields: Optional[Sequence[str]] = None,
+            schema: Optional[Dict[str, type]] = None,
+            warn: Warn = print
+    ):
         self.csv_file = csv_file
+        self.infer_rows = infer_rows
+        self.fields = fields
+        self.schema = schema or {}
+        self.warn = warn
+        self.field_types: Dict[str, type] = {}
 
     def parse_data(self) -> tuple[List[Any], Dict[str, type]]:
         """
         Парсит CSV-файл и возвращает список объектов и словарь типов полей.
 
-        Читает CSV-файл, используя `csv.DictReader`, определяет типы данных
-        полей на основе первой строки (строка или число с плавающей точкой),
-        создаёт динамический класс `Good` с помощью
+        Читает CSV-файл, используя `csv.reader`, определяет типы данных
+        полей по схеме или по первым строкам (строка, категория, целое
+        или дробное число), создаёт динамический класс `Good` с помощью
         `dataclasses.make_dataclass` и преобразует строки CSV в объекты
         этого класса.
         """
-        reader = csv.DictReader(self.csv_file)
+        goods = list(self.iter_rows())
+        return goods, self.field_types
+
+    def iter_rows(self) -> Iterator[Any]:
+        """
+        Возвращает итератор объектов `Good`, читая CSV-файл за один проход.
+
+        Заголовок и первые `infer_rows` строк читаются сразу при вызове:
+        по ним определяются типы полей, которые доступны в `field_types`
+        ещё до начала итерации. Остальные строки читаются лениво, файл
+        не перематывается, поэтому источником может быть stdin или канал.
+        """
+        values = self._iter_values()
+        if not self.field_types:
+            return iter(())
+
+        # Создаём динамический класс Good
+        Good = make_dataclass(
+            'Good', list(self.field_types.items()), repr=True
+        )
+        return (Good(*row) for row in values)
+
+    def parse_table(self) -> tuple[Table, Dict[str, type]]:
+        """
+        Парсит CSV-файл в колоночную таблицу `Table`.
+
+        В отличие от `parse_data`, объекты `Good` для строк не создаются:
+        значения сразу складываются в столбцы таблицы.
+        """
+        values = self._iter_values()
+        field_types = self.field_types
+        table = Table(field_types)
+        for row in values:
+            if self.field_types is not field_types:
+                # Поле расширено до дробного после выборки
+                field_types = self.field_types
+                table = table.cast(field_types)
+            table.append(row)
+        return table, self.field_types
+
+    def _iter_values(self) -> Iterator[List[Any]]:
+        """
+        Читает заголовок и префикс, возвращает итератор значений строк.
+
+        Типы полей записываются в `field_types` сразу при вызове, значения
+        каждой строки возвращаются списком в порядке полей.
+        """
+        reader = csv.reader(self.csv_file)
+        header = next(reader, None)
 
         # Проверка наличия заголовков
-        if not reader.fieldnames:
+        if not header:
             raise InvalidCsvFormatError('CSV-файл не содержит заголовков')
+        indices = self._field_indices(header, self.fields)
+        fieldnames = [header[index] for index in indices]
 
-        # Получаем первую строку для анализа типов
-        try:
-            first_row = next(reader, None)
-            if first_row is None:
-                return [], {}
-        except StopIteration:
-            return [], {}
+        # Пустые строки пропускаются, как в csv.DictReader
+        records = (
+            [record[index] if index < len(record) else ''
+             for index in indices]
+            for record in reader if record
+        )
+
+        # Буферизуем префикс для анализа типов
+        sample_size = self._sample_size(
+            fieldnames, self.schema, self.infer_rows
+        )
+        prefix = []
+        prefix_lines = []
+        for record in islice(records, sample_size):
+            prefix.append(record)
+            prefix_lines.append(reader.line_num)
+        if not prefix:
+            self.field_types = {}
+            return iter(())
+
+        def line_number(index: int) -> int:
+            if index < len(prefix_lines):
+                return prefix_lines[index]
+            return reader.line_num
 
-        # Определяем типы полей по первой строке
+        self.field_types = self._resolve_types(
+            fieldnames, prefix, self.schema
+        )
+        return self._convert_rows(chain(prefix, records), line_number)
+
+    @staticmethod
+    def _field_indices(
+            header: List[str], fields: Optional[Sequence[str]]
+    ) -> List[int]:
+        """
+        Возвращает номера столбцов заголовка, входящих в fields.
+
+        Если какого-либо поля из fields нет в заголовке, возвращаются все
+        столбцы: тогда отсутствие поля обнаружит проверка запроса, а
+        файл с другим набором полей — сравнение типов полей файлов.
+        """
+        if fields is None or not set(fields) <= set(header):
+            return list(range(len(header)))
+        return [
+            index for index, field in enumerate(header) if field in fields
+        ]
+
+    @staticmethod
+    def _sample_size(
+            fieldnames: List[str], schema: Dict[str, type], infer_rows: int
+    ) -> int:
+        """
+        Возвращает количество строк префикса для определения типов.
+
+        Если типы всех полей заданы схемой, читается одна строка: только
+        чтобы проверить, что в файле есть данные.
+        """
+        if all(field in schema for field in fieldnames):
+            return 1
+        return max(infer_rows, 1)
+
+    @staticmethod
+    def _resolve_types(
+            fieldnames: List[str],
+            records: List[List[str]],
+            schema: Dict[str, type]
+    ) -> Dict[str, type]:
+        """Берёт типы полей из схемы, остальные определяет по записям."""
+        missing = [field for field in fieldnames if field not in schema]
+        inferred = ParserCsv._infer_types(
+            missing, [dict(zip(fieldnames, record)) for record in records]
+        ) if missing else {}
+        return {
+            field: schema[field] if field in schema else inferred[field]
+            for field in fieldnames
+        }
+
+    @staticmethod
+    def _infer_types(
+            fieldnames: List[str], rows: List[Dict[str, str]]
+    ) -> Dict[str, type]:
+        """
+        Определяет типы полей по буферизованным строкам.
+
+        Поле считается целым, если все его значения — целые числа, и
+        дробным, если все непустые значения преобразуются к float: пустое
+        значение числового поля при разборе становится NaN, а целый
+        столбец его не хранит. Тип целого поля уточняется и при разборе
+        строк после выборки (`_widen_types`). Остальные поля строковые;
+        поле считается категориальным, если в выборке не меньше
+        CATEGORY_MIN_ROWS строк, а различных значений не больше доли
+        CATEGORY_MAX_SHARE от числа строк.
+        """
         field_types = {}
-        for field in reader.fieldnames:
-            value = first_row.get(field, '').strip()
-            try:
-                float(value)
+        for field in fieldnames:
+            values = [row.get(field, '').strip() for row in rows]
+            present = [value for value in values if value]
+            if present and len(present) == len(values) \
+                    and all(map(_is_int, present)):
+                field_types[field] = int
+            elif present and all(map(_is_float, present)):
                 field_types[field] = float
-            except ValueError:
+            elif len(rows) >= CATEGORY_MIN_ROWS and \
+                    len(set(present)) <= len(rows) * CATEGORY_MAX_SHARE:
+                field_types[field] = Category
+            else:
                 field_types[field] = str
+        return field_types
 
-        # Создаём динамический класс Good
-        fields = [(field, field_types[field]) for field in reader.fieldnames]
-        Good = make_dataclass('Good', fields, repr=True)
-
-        # Перематываем файл на начало для повторного чтения
-        self.csv_file.seek(0)
-        reader = csv.DictReader(self.csv_file)
+    def _convert_rows(
+            self,
+            records: Iterable[List[str]],
+            line_number: Optional[Callable[[int], int]] = None
+    ) -> Iterator[List[Any]]:
+        """
+        Преобразует записи CSV в списки типизированных значений.
 
-        goods = []
-        for row in reader:
+        Если дробное или пустое значение встретилось в целом поле, тип
+        которого определён по выборке, `field_types` заменяется словарём с
+        дробным полем, и следующие строки преобразуются уже к нему.
+        Запись, значение которой не преобразуется к типу поля,
+        пропускается с сообщением. Номер строки файла выводится, если
+        передана функция line_number, возвращающая его по номеру записи.
+        """
+        converters = self._converters(self.field_types)
+        for index, record in enumerate(records):
             try:
-                kwargs = {}
-                for field in reader.fieldnames:
-                    value = row.get(field, '').strip()
-                    if field_types[field] == float:
-                        # Пустое значение как 0.0 для float
-                        value = float(value) if value else 0.0
-                    else:
-                        # Пустое значение как '' для str
-                        value = value if value else ''
-                    kwargs[field] = value
-                good = Good(**kwargs)
-                goods.append(good)
+                try:
+                    values = self._convert_record(record, converters)
+                except InvalidCsvFormatError:
+                    widened = self._widen_types(
+                        self.field_types, record, self.schema
+                    )
+                    if widened == self.field_types:
+                        raise
+                    self.field_types = widened
+                    converters = self._converters(widened)
+                    values = self._convert_record(record, converters)
             except InvalidCsvFormatError as e:
-                print(f'Пропущена строка {reader.line_num}: {e}')
-        return goods, field_types
+                line = f' {line_number(index)}' if line_number else ''
+                self.warn(f'Пропущена строка{line}: {e}')
+                continue
+            yield values
+
+    @staticmethod
+    def _widen_types(
+            field_types: Dict[str, type],
+            record: List[str],
+            schema: Dict[str, type]
+    ) -> Dict[str, type]:
+        """
+        Возвращает типы полей, в которых целые поля записи с дробным или
+        пустым значением заменены дробными.
+
+        Поля из schema не расширяются: значение, не подходящее под тип
+        из схемы, — ошибка данных.
+        """
+        widened = dict(field_types)
+        for (field, field_type), value in zip(field_types.items(), record):
+            if field_type is not int or field in schema:
+                continue
+            try:
+                _to_int(value)
+            except InvalidCsvFormatError:
+                value = value.strip()
+                if not value or _is_float(value):
+                    widened[field] = float
+        return widened
+
+    @staticmethod
+    def _converters(
+            field_types: Dict[str, type]
+    ) -> List[Callable[[str], Any]]:
+        """Возвращает функции преобразования значений для полей."""
+        return [CONVERTERS[field_type] for field_type in field_types.values()]
+
+    @staticmethod
+    def _convert_record(
+            record: List[str], converters: List[Callable[[str], Any]]
+    ) -> List[Any]:
+        """
+        Преобразует значения одной записи CSV к типам полей.
+
+        Пустое значение дробного поля считается NaN, строкового — ''.
+        """
+        return [convert(value) for convert, value in zip(converters, record)]
+
+
+class MmapParserCsv(ParserCsv):
+    """
+    Класс для парсинга CSV-файла, отображённого в память через `mmap`.
+
+    Строки файла читаются как байты, и декодируются только поля из
+    fields, остальные столбцы пропускаются. Строка без кавычек делится
+    по запятым методом `bytes.split`, строка с кавычками (в том числе
+    значение с переводом строки) разбирается модулем `csv`. Если fields
+    не задан, читаются все поля.
+    """
+
+    def __init__(
+            self,
+            file_path: str,
+            fields: Optional[Sequence[str]] = None,
+            infer_rows: int = INFER_ROWS,
+            schema: Optional[Dict[str, type]] = None,
+            warn: Warn = print
+    ):
+        super().__init__(None, infer_rows, fields, schema, warn)
+        self.file_path = file_path
+
+    def _iter_values(self) -> Iterator[List[Any]]:
+        """
+        Читает заголовок и префикс, возвращает итератор значений строк.
+
+        Файл остаётся отображённым в память, пока итератор не исчерпан.
+        """
+        with open(self.file_path, 'rb') as file:
+            if not os.fstat(file.fileno()).st_size:
+                raise InvalidCsvFormatError('CSV-файл не содержит заголовков')
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            lines = iter(buffer.readline, b'')
+            header = next(self._iter_records(lines, None), None)
+            if not header:
+                raise InvalidCsvFormatError('CSV-файл не содержит заголовков')
+            indices = self._field_indices(header, self.fields)
+            fieldnames = [header[index] for index in indices]
+            records = self._iter_records(lines, indices)
+            prefix = list(islice(records, self._sample_size(
+                fieldnames, self.schema, self.infer_rows
+            )))
+        except BaseException:
+            buffer.close()
+            raise
+        if not prefix:
+            buffer.close()
+            self.field_types = {}
+            return iter(())
+
+        self.field_types = self._resolve_types(
+            fieldnames, prefix, self.schema
+        )
+        return self._convert_mapped(buffer, chain(prefix, records))
+
+    def _convert_mapped(
+            self, buffer: mmap.mmap, records: Iterable[List[str]]
+    ) -> Iterator[List[Any]]:
+        """Преобразует записи к типам полей и закрывает отображение."""
+        try:
+            yield from self._convert_rows(records)
+        finally:
+            buffer.close()
+
+    @staticmethod
+    def _iter_records(
+            lines: Iterator[bytes], indices: Optional[List[int]]
+    ) -> Iterator[List[str]]:
+        """
+        Возвращает декодированные значения полей с номерами indices.
+
+        Пустые строки пропускаются, как в `csv.reader`. Недостающие поля
+        заполняются пустыми строками. При indices=None возвращаются все
+        поля записи.
+        """
+        for line in lines:
+            if b'"' in line:
+                # Значение в кавычках может содержать запятые и переводы
+                # строк: `csv.reader` забирает столько строк, сколько
+                # нужно для одной записи
+                text = (
+                    part.decode('utf-8') for part in chain([line], lines)
+                )
+                values = next(csv.reader(text), [])
+                if not values:
+                    continue
+                if indices is None:
+                    yield values
+                else:
+                    yield [
+                        values[index] if index < len(values) else ''
+                        for index in indices
+                    ]
+                continue
+
+            line = line.rstrip(b'\r\n')
+            if not line:
+                continue
+            parts = line.split(b',')
+            if indices is None:
+                yield [part.decode('utf-8') for part in parts]
+            else:
+                yield [
+                    parts[index].decode('utf-8') if index < len(parts) else ''
+                    for index in indices
+                ]
+
+
+def _read_records(
+        file_path: str,
+        start: int,
+        stop: int,
+        limit: Optional[int] = None
+) -> tuple[List[List[str]], int]:
+    """
+    Читает записи CSV, начинающиеся в диапазоне байтов [start, stop).
+
+    При указании limit читается не больше limit непустых записей.
+    Строки файла передаются в `csv.reader` по одной, а reader забирает
+    ровно столько строк, сколько нужно для записи. Поэтому после каждой
+    записи известно смещение её конца, даже если в кавычках есть перевод
+    строки. Возвращает записи и смещение конца последней из них.
+    """
+    position = start
+
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+
+        def iter_lines() -> Iterator[str]:
+            nonlocal position
+            for line in file:
+                position += len(line)
+                yield line.decode('utf-8')
+
+        reader = csv.reader(iter_lines())
+        records = []
+        end = start
+        while end < stop and (limit is None or len(records) < limit):
+            record = next(reader, None)
+            if record is None:
+                break
+            end = position
+            if record:
+                records.append(record)
+    return records, end
+
+
+def _parse_chunk(
+        file_path: str,
+        start: int,
+        stop: int,
+        field_types: Dict[str, type],
+        indices: List[int],
+        schema: Dict[str, type],
+        skip_invalid: bool = True,
+        warn: Warn = print
+) -> tuple[Table, int]:
+    """
+    Парсит записи диапазона байтов в таблицу, возвращает её и конец.
+
+    В таблицу попадают столбцы с номерами indices. Целое поле не из
+    schema с дробным значением расширяется до дробного, поэтому типы
+    полей таблицы могут отличаться от field_types. Запись с неверным
+    значением пропускается с предупреждением warn, а при
+    skip_invalid=False вызывает исключение.
+    """
+    records, end = _read_records(file_path, start, stop)
+    converters = ParserCsv._converters(field_types)
+    table = Table(field_types)
+    for record in records:
+        record = [
+            record[index] if index < len(record) else '' for index in indices
+        ]
+        try:
+            try:
+                values = ParserCsv._convert_record(record, converters)
+            except InvalidCsvFormatError:
+                widened = ParserCsv._widen_types(
+                    table.field_types, record, schema
+                )
+                if widened == table.field_types:
+                    raise
+                table = table.cast(widened)
+                converters = ParserCsv._converters(widened)
+                values = ParserCsv._convert_record(record, converters)
+        except InvalidCsvFormatError as e:
+            if not skip_invalid:
+                raise
+            warn(f'Пропущена строка: {e}')
+            continue
+        table.append(values)
+    return table, end
+
+
+def _parse_chunk_speculative(
+        file_path: str,
+        start: int,
+        stop: int,
+        field_types: Dict[str, type],
+        indices: List[int],
+        schema: Dict[str, type]
+) -> tuple[Optional[Table], int]:
+    """
+    Парсит диапазон в процессе-обработчике.
+
+    Начало диапазона может оказаться внутри значения в кавычках, тогда
+    ошибка разбора не означает ошибку в данных: возвращается None, и
+    диапазон перечитывается с правильного места в основном процессе.
+    Там же пропускаются записи с неверными значениями.
+    """
+    try:
+        return _parse_chunk(
+            file_path, start, stop, field_types, indices, schema, False
+        )
+    except (csv.Error, ValueError):
+        return None, start
+
+
+class ChunkedParserCsv:
+    """
+    Класс для параллельного парсинга одного большого CSV-файла.
+
+    Файл делится на диапазоны байтов, выровненные по началу строки, и
+    каждый диапазон парсится в отдельном процессе. Граница диапазона
+    может оказаться внутри значения в кавычках с переводом строки,
+    поэтому после парсинга диапазоны сшиваются последовательно: если
+    предыдущий диапазон закончился не там, где начался следующий,
+    следующий диапазон перечитывается с правильного места. Если задан
+    fields, разбираются только перечисленные поля, типы полей из schema
+    не определяются по данным. Целое поле, расширенное до дробного в
+    одном диапазоне, расширяется и во всей таблице. Записи с неверными
+    значениями перечитываются в основном процессе, предупреждения о них
+    передаются функции warn.
+    """
+
+    def __init__(
+            self,
+            file_path: str,
+            infer_rows: int = INFER_ROWS,
+            fields: Optional[Sequence[str]] = None,
+            schema: Optional[Dict[str, type]] = None,
+            warn: Warn = print
+    ):
+        self.file_path = file_path
+        self.infer_rows = infer_rows
+        self.fields = fields
+        self.schema = schema or {}
+        self.warn = warn
+        self.field_types: Dict[str, type] = {}
+
+    def parse_table(
+            self, executor: Executor, chunks: int
+    ) -> tuple[Table, Dict[str, type]]:
+        """Парсит файл в таблицу, разбивая его на chunks диапазонов."""
+        size = os.path.getsize(self.file_path)
+        header, data_start = _read_records(self.file_path, 0, 1)
+        if not header:
+            raise InvalidCsvFormatError('CSV-файл не содержит заголовков')
+        indices = ParserCsv._field_indices(header[0], self.fields)
+        fieldnames = [header[0][index] for index in indices]
+
+        prefix, _ = _read_records(
+            self.file_path, data_start, size, ParserCsv._sample_size(
+                fieldnames, self.schema, self.infer_rows
+            )
+        )
+        if not prefix:
+            self.field_types = {}
+            return Table({}), {}
+        self.field_types = ParserCsv._resolve_types(fieldnames, [
+            [record[index] if index < len(record) else '' for index in indices]
+            for record in prefix
+        ], self.schema)
+
+        bounds = self._chunk_bounds(data_start, size, chunks)
+        futures = [
+            executor.submit(
+                _parse_chunk_speculative,
+                self.file_path, start, stop, self.field_types, indices,
+                self.schema
+            )
+            for start, stop in zip(bounds, bounds[1:])
+        ]
+
+        table = Table(self.field_types)
+        expected = data_start
+        for (start, stop), future in zip(zip(bounds, bounds[1:]), futures):
+            chunk, end = future.result()
+            if chunk is None or start != expected:
+                # Предыдущая запись закончилась дальше начала диапазона:
+                # граница попала внутрь значения в кавычках
+                if expected >= stop:
+                    continue
+                chunk, end = _parse_chunk(
+                    self.file_path, expected, stop, self.field_types,
+                    indices, self.schema, warn=self.warn
+                )
+            if chunk.field_types != table.field_types:
+                # В диапазоне целое поле расширено до дробного
+                merged = common_types(table.field_types, chunk.field_types)
+                table = table.cast(merged)
+                chunk = chunk.cast(merged)
+            table.extend(chunk)
+            expected = end
+        self.field_types = table.field_types
+        return table, self.field_types
+
+    def _chunk_bounds(self, start: int, size: int, chunks: int) -> List[int]:
+        """Возвращает границы диапазонов, выровненные по началу строк."""
+        bounds = [start]
+        with open(self.file_path, 'rb') as file:
+            for index in range(1, chunks):
+                offset = start + (size - start) * index // chunks
+                if offset <= bounds[-1]:
+                    continue
+                file.seek(offset - 1)
+                bound = offset - 1 + len(file.readline())
+                if bounds[-1] < bound < size:
+                    bounds.append(bound)
+        bounds.append(size)
+        return bounds
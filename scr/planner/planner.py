@@ -0,0 +1,165 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from scr.constants import (AGGR_PATTERN, AGGREGATE, EXTERNAL_SORT, FILTER,
+                           GROUP_PATTERN, LIMIT, ORDER_PATTERN, SORT, TOP_K,
+                           WHERE_PATTERN)
+
+
+@dataclass
+class QueryPlan:
+    """
+    План выполнения запроса.
+
+    `stages` — стадии в порядке выполнения. `streaming` означает, что
+    ни одной стадии не нужны все строки сразу и данные можно читать
+    потоково. `fused` означает, что фильтрация и следующая стадия
+    выполняются за один проход: строки читаются прямо из ленивого фильтра.
+    `fields` — поля, которые нужны запросу, в порядке упоминания; None
+    означает, что нужны все поля.
+    """
+
+    where: Optional[str] = None
+    order_by: Optional[str] = None
+    aggregate: Optional[str] = None
+    group_by: Optional[str] = None
+    limit: Optional[int] = None
+    offset: int = 0
+    sort_buffer: Optional[int] = None
+    stages: List[str] = field(default_factory=list)
+    streaming: bool = False
+    fused: bool = False
+    fields: Optional[List[str]] = None
+
+
+class QueryPlanner:
+    """
+    Класс для построения плана выполнения запроса.
+
+    Убирает стадии, которые не влияют на результат, и объединяет
+    фильтрацию с агрегацией в один проход. Векторный движок обрабатывает
+    столбцы целиком, поэтому для него потоковое чтение не используется.
+    Если задан sort_buffer, полная сортировка выполняется внешней
+    сортировкой слиянием с порциями не больше sort_buffer строк. При
+    включённом кэше таблица загружается из него быстрее, чем потоковый
+    парсинг CSV, поэтому потоковое чтение тоже не используется. Фильтру
+    по индексам (indexed) нужна вся таблица, поэтому при нём данные тоже
+    не читаются потоково. Потоковое чтение идёт в одном процессе, поэтому
+    при jobs > 1 файлы разбираются параллельно в таблицу, кроме внешней
+    сортировки: её ограничение памяти важнее параллельного разбора.
+    """
+
+    def __init__(
+            self,
+            vectorized: bool = False,
+            sort_buffer: Optional[int] = None,
+            cached: bool = False,
+            indexed: bool = False,
+            jobs: int = 1
+    ):
+        self.vectorized = vectorized
+        self.sort_buffer = sort_buffer
+        self.cached = cached
+        self.indexed = indexed
+        self.jobs = jobs
+
+    def plan(
+            self,
+            where: Optional[str] = None,
+            order_by: Optional[str] = None,
+            aggregate: Optional[str] = None,
+            limit: Optional[int] = None,
+            offset: int = 0,
+            group_by: Optional[str] = None
+    ) -> QueryPlan:
+        """
+        Строит план по аргументам запроса.
+
+        Учитываются --where, --order-by, --aggregate, --limit, --offset и
+        --group-by. Ограничение строк относится к выводу строк, поэтому
+        при агрегации оно не применяется. Агрегация по группам, как и
+        обычная, выполняется за один проход по строкам.
+        """
+        plan = QueryPlan(
+            where=where if where and where.strip() else None,
+            order_by=order_by or None,
+            aggregate=aggregate or None,
+            group_by=group_by or None
+        )
+        if not plan.aggregate:
+            plan.limit = limit
+            plan.offset = offset or 0
+
+        if plan.where:
+            plan.stages.append(FILTER)
+        if plan.aggregate:
+            # Агрегаты avg, min и max не зависят от порядка строк,
+            # поэтому сортировка перед агрегацией не нужна
+            plan.stages.append(AGGREGATE)
+        elif plan.order_by and plan.limit is not None:
+            # Сортировка с ограничением — выборка первых k через кучу
+            plan.stages.append(TOP_K)
+        else:
+            if plan.order_by and self.sort_buffer and not self.vectorized:
+                # Данные могут не помещаться в память: сортировка порциями
+                plan.sort_buffer = self.sort_buffer
+                plan.stages.append(EXTERNAL_SORT)
+            elif plan.order_by:
+                plan.stages.append(SORT)
+            if plan.limit is not None or plan.offset:
+                plan.stages.append(LIMIT)
+
+        streamed_stages = {AGGREGATE, TOP_K, EXTERNAL_SORT, LIMIT}
+        parallel = self.jobs > 1 and EXTERNAL_SORT not in plan.stages
+        plan.streaming = not self.vectorized and not self.cached \
+            and not self.indexed and not parallel \
+            and SORT not in plan.stages \
+            and bool(streamed_stages & set(plan.stages))
+        plan.fused = plan.streaming and FILTER in plan.stages
+        if plan.aggregate:
+            # В отчёт попадает только результат агрегации
+            plan.fields = self._referenced_fields(plan)
+        return plan
+
+    @staticmethod
+    def _referenced_fields(plan: QueryPlan) -> Optional[List[str]]:
+        """
+        Возвращает поля из --where, --order-by, --aggregate и --group-by.
+
+        Поле сортировки учитывается, даже если сортировка исключена из
+        плана: аргумент всё равно проверяется. Если аргумент имеет
+        неверный формат, возвращается None, чтобы ошибку сообщила
+        валидация по всем полям данных.
+        """
+        fields: List[str] = []
+        conditions = [
+            condition.strip()
+            for group in (plan.where or '').split('|')
+            for condition in group.split(';')
+        ]
+        for condition in filter(None, conditions):
+            match = re.match(WHERE_PATTERN, condition)
+            if not match:
+                return None
+            fields.append(match.group(1))
+        # Несколько ключей сортировки и агрегаций перечисляются через запятую
+        arguments = []
+        for argument, pattern in (
+                (plan.order_by, ORDER_PATTERN),
+                (plan.aggregate, AGGR_PATTERN)
+        ):
+            if argument is not None:
+                arguments.extend(
+                    (item.strip(), pattern) for item in argument.split(',')
+                )
+        for argument, pattern in arguments:
+            match = re.match(pattern, argument)
+            if not match:
+                return None
+            fields.append(match.group(1))
+        if plan.group_by is not None:
+            if not re.match(GROUP_PATTERN, plan.group_by):
+                return None
+            fields.extend(field.strip() for field in plan.group_by.split(','))
+        return list(dict.fromkeys(fields))
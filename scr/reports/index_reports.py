@@ -0,0 +1,83 @@
+from typing import List, Sequence, Set, Tuple, Union
+
+from scr.indexes.indexes import HashIndex, Index, SortedIndex
+from scr.reports.reports import Condition, Filter
+from scr.tables.tables import is_numeric
+
+
+class IndexedFilter(Filter):
+    """
+    Фильтрация колоночной таблицы по индексам полей.
+
+    Для строковых полей строятся хеш-индексы `HashIndex`, для числовых —
+    отсортированные индексы `SortedIndex`. Для каждой группы условий (И)
+    индекс даёт номера строк самого избирательного условия, номера строк
+    групп объединяются (ИЛИ), поэтому таблица не просматривается целиком.
+    Индексы строятся при первом обращении к полю и хранятся в
+    `Table.indexes`, поэтому повторные запросы к той же таблице их
+    переиспользуют. Для обычных списков объектов используется фильтрация
+    родительского класса.
+    """
+
+    def _filter_indices(
+            self, or_groups: List[List[Tuple[str, str, Union[str, float]]]]
+    ) -> List[int]:
+        """Возвращает номера строк, удовлетворяющих условиям, по порядку."""
+        selected: Set[int] = set()
+        for group in self._merge_alternatives(or_groups):
+            selected |= self._group_rows(group)
+        return sorted(selected)
+
+    def _group_rows(self, group: List[Tuple[str, str, Condition]]) -> Set[int]:
+        """
+        Возвращает номера строк, удовлетворяющих всем условиям группы.
+
+        Строки отбираются по индексу самого избирательного условия, кроме
+        !=, а остальные условия проверяются только для этих строк. Если
+        в группе есть только условия !=, из всех строк исключаются
+        строки, равные значениям.
+        """
+        lookups = sorted(
+            (
+                (self._lookup(field, operator, value), index)
+                for index, (field, operator, value) in enumerate(group)
+                if operator != '!='
+            ),
+            key=lambda item: len(item[0])
+        )
+        if not lookups:
+            rows = set(range(len(self.data)))
+            for field, _, value in group:
+                rows.difference_update(self._lookup(field, '=', value))
+            return rows
+        candidates, selected = lookups[0]
+        rest = [
+            condition for index, condition in enumerate(group)
+            if index != selected
+        ]
+        if not rest:
+            return set(candidates)
+        predicate = self._row_predicate([rest])
+        return set(filter(predicate, candidates))
+
+    def _lookup(
+            self, field: str, operator: str, value: Condition
+    ) -> Sequence[int]:
+        """Возвращает номера строк, удовлетворяющих одному условию."""
+        index = self._index(field)
+        if isinstance(index, SortedIndex):
+            return index.lookup(operator, value)
+        if isinstance(value, frozenset):
+            return index.lookup(value)
+        return index.lookup([value.lower()])
+
+    def _index(self, field: str) -> Index:
+        """Возвращает индекс поля, при необходимости строит его."""
+        index = self.data.indexes.get(field)
+        if index is None:
+            if is_numeric(self.field_types[field]):
+                index = SortedIndex.build(self.data.column(field))
+            else:
+                index = HashIndex.build(self.data.folded(field))
+            self.data.indexes[field] = index
+        return index
@@ -0,0 +1,178 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from scr.constants import PERCENTILES
+from scr.exceptions import UnsupportedEngineError
+from scr.reports.reports import (AggregateState, Aggregator, Filter, Report,
+                                 Sorter, SortKey)
+from scr.tables.tables import Table, is_numeric
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def numpy_available() -> bool:
+    """Проверяет, установлен ли пакет numpy."""
+    return np is not None
+
+
+class NumpyReport(Report):
+    """
+    Базовый класс отчётов на NumPy.
+
+    Столбцы колоночной таблицы `Table` загружаются в массивы NumPy.
+    Для обычных списков объектов используется реализация на чистом
+    Python из родительских классов.
+    """
+
+    def __init__(self, data: Iterable[Any], field_types: Dict[str, type]):
+        if not numpy_available():
+            raise UnsupportedEngineError(
+                'Движок numpy недоступен: установите пакет numpy'
+            )
+        super().__init__(data, field_types)
+        self._arrays: Dict[str, Any] = {}
+
+    def _array(self, field: str) -> Any:
+        """Возвращает столбец таблицы в виде массива NumPy."""
+        if field not in self._arrays:
+            column = self.data.column(field)
+            if is_numeric(self.field_types[field]):
+                # array('d') и array('q') поддерживают буферный протокол:
+                # массив создаётся без копирования
+                dtype = np.float64 if column.typecode == 'd' else np.int64
+                self._arrays[field] = np.frombuffer(column, dtype=dtype)
+            else:
+                self._arrays[field] = np.array(list(column), dtype=str)
+        return self._arrays[field]
+
+    def _folded_array(self, field: str) -> Any:
+        """Возвращает строковый столбец в нижнем регистре массивом NumPy."""
+        key = f'{field}\0folded'
+        if key not in self._arrays:
+            self._arrays[key] = np.array(self.data.folded(field), dtype=str)
+        return self._arrays[key]
+
+
+class NumpyFilter(NumpyReport, Filter):
+    """Фильтрация данных булевыми масками NumPy."""
+
+    def _filter_indices(
+            self, or_groups: List[List[Tuple[str, str, Union[str, float]]]]
+    ) -> List[int]:
+        """Вычисляет условия масками и возвращает номера строк."""
+        mask = np.zeros(len(self.data), dtype=bool)
+        for group in or_groups:
+            group_mask = np.ones(len(self.data), dtype=bool)
+            for field, operator, value in group:
+                group_mask &= self._mask(field, operator, value)
+            mask |= group_mask
+        return np.flatnonzero(mask).tolist()
+
+    def _mask(
+            self, field: str, operator: str, value: Union[str, float]
+    ) -> Any:
+        """Возвращает булеву маску строк для одного условия."""
+        if isinstance(value, str):
+            # Столбец в нижнем регистре строится один раз для всех условий
+            values = self._folded_array(field)
+            value = value.lower()
+        else:
+            values = self._array(field)
+        if operator == '=':
+            return values == value
+        elif operator == '!=':
+            return values != value
+        elif operator == '>':
+            return values > value
+        elif operator == '<':
+            return values < value
+        elif operator == '>=':
+            return values >= value
+        return values <= value
+
+
+class NumpyAggregator(NumpyReport, Aggregator):
+    """Агрегация данных редукциями массивов NumPy."""
+
+    def _accumulate(
+            self,
+            field: str,
+            operation: Optional[str] = None,
+            distinct: str = 'exact'
+    ) -> AggregateState:
+        """
+        Накапливает состояние агрегации редукциями массива столбца.
+
+        Медиана, перцентили и различные значения накапливаются реализацией
+        на чистом Python.
+        """
+        if not isinstance(self.data, Table) \
+                or operation in ('median', 'count_distinct') \
+                or operation in PERCENTILES:
+            return super()._accumulate(field, operation, distinct)
+        state = AggregateState.create(operation)
+        values = self._array(field)
+        if values.dtype.kind == 'f':
+            # Пустые значения NaN не учитываются, как в `AggregateState`
+            values = values[~np.isnan(values)]
+        if not len(values):
+            return state
+        state.count = len(values)
+        state.total = values.sum().item()
+        state.minimum = values.min().item()
+        state.maximum = values.max().item()
+        if state.moments:
+            state.mean = float(values.mean())
+            state.m2 = float(((values - state.mean) ** 2).sum())
+        return state
+
+
+class NumpySorter(NumpyReport, Sorter):
+    """Сортировка данных через `argsort` NumPy."""
+
+    def _sort_indices(self, keys: List[SortKey]) -> List[int]:
+        """
+        Возвращает номера строк в порядке устойчивой сортировки.
+
+        Как и в реализации на чистом Python, массивы сортируются
+        проходами от последнего ключа к первому. Для убывающего порядка
+        сортируется перевёрнутый массив, чтобы равные значения сохранили
+        порядок предыдущего прохода, как в `sorted`. Пустые значения (NaN
+        и "") переносятся в начало или конец прохода без сравнения.
+        """
+        indices = np.arange(len(self.data))
+        for field, order, nulls in reversed(keys):
+            values = self._array(field)[indices]
+            if order == 'desc':
+                last = len(values) - 1
+                positions = last - np.argsort(
+                    values[::-1], kind='stable'
+                )[::-1]
+            else:
+                positions = np.argsort(values, kind='stable')
+            missing = self._missing(values)
+            if missing is not None:
+                empty = np.flatnonzero(missing)
+                present = positions[~missing[positions]]
+                positions = np.concatenate(
+                    (empty, present) if nulls == 'first' else (present, empty)
+                )
+            indices = indices[positions]
+        return indices.tolist()
+
+    def _top_indices(self, keys: List[SortKey], count: int) -> List[int]:
+        """Возвращает номера count первых строк устойчивой сортировки."""
+        return self._sort_indices(keys)[:count]
+
+    @staticmethod
+    def _missing(values: Any) -> Optional[Any]:
+        """Возвращает маску пустых значений или None, если их нет."""
+        if values.dtype.kind == 'f':
+            missing = np.isnan(values)
+        elif values.dtype.kind == 'U':
+            missing = values == ''
+        else:
+            return None
+        return missing if missing.any() else None
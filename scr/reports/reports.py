@@ -1,18 +1,50 @@
+import heapq
+import pickle
 import re
+import tempfile
 from abc import ABC
-from typing import Any, Dict, List, Optional, Tuple, Union
+from array import array
+from dataclasses import dataclass
+from itertools import islice
+from math import sqrt
+from operator import attrgetter, eq, ge, gt, itemgetter, le, lt, ne
+from statistics import median
+from typing import (IO, Any, Callable, Dict, FrozenSet, Iterable, Iterator,
+                    List, Optional, Sequence, Set, Tuple, Union)
 
-from scr.constants import WHERE_PATTERN
+from scr.constants import (AGGREGATIONS, NULLS_DEFAULT, PERCENTILES,
+                           SPILL_BATCH_ROWS, WHERE_PATTERN)
 from scr.exceptions import (InvalidAggregationError,
                             InvalidFilterConditionError, InvalidSortError,
                             UnsupportedFieldTypeError,
                             UnsupportedOperatorError)
+from scr.schemas.schemas import TYPE_NAMES
+from scr.sketches.sketches import HyperLogLog, KllSketch
+from scr.tables.tables import CategoryColumn, Table, is_numeric, is_string
+
+# Значение условия: строка, число или множество строк в нижнем регистре
+# после объединения альтернатив `field=value`
+Condition = Union[str, float, FrozenSet[str]]
+
+# Ключ сортировки: поле, порядок "asc"/"desc" и место пустых значений
+# "first"/"last"
+SortKey = Tuple[str, str, str]
+
+# Функции сравнения для операторов условий фильтрации
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    '=': eq,
+    '!=': ne,
+    '>': gt,
+    '<': lt,
+    '>=': ge,
+    '<=': le,
+}
 
 
 class Report(ABC):
     """Базовый класс для работы с отчётами."""
 
-    def __init__(self, data: List[Any], field_types: Dict[str, type]):
+    def __init__(self, data: Iterable[Any], field_types: Dict[str, type]):
         self.data = data
         self.field_types = field_types
 
@@ -59,14 +91,15 @@ class Report(ABC):
                     )
 
                 # Проверка операторов для строковых полей
-                if field_types[field] == str and operator not in ['=', '!=']:
+                if is_string(field_types[field]) \
+                        and operator not in ['=', '!=']:
                     raise UnsupportedOperatorError(
                         f'Для строкового поля "{field}" '
                         f'поддерживаются только операторы = и !='
                     )
 
                 # Преобразование значения для числовых полей
-                if field_types[field] == float:
+                if is_numeric(field_types[field]):
                     try:
                         value = float(value)
                     except ValueError:
@@ -94,8 +127,15 @@ class Report(ABC):
             value: Union[str, float]
     ) -> bool:
         """Проверяет, удовлетворяет ли объект одному условию."""
-        good_value = getattr(good, field)
+        return Report._compare_value(getattr(good, field), operator, value)
 
+    @staticmethod
+    def _compare_value(
+            good_value: Any,
+            operator: str,
+            value: Union[str, float]
+    ) -> bool:
+        """Проверяет, удовлетворяет ли значение поля одному условию."""
         if good_value is None:
             return False
 
@@ -120,77 +160,958 @@ class Report(ABC):
             return good_value <= value
         return False
 
+    @staticmethod
+    def _compile_condition(
+            or_groups: List[List[Tuple[str, str, Union[str, float]]]],
+            getters: Dict[str, Callable[[Any], Any]],
+            categories: Optional[Dict[str, CategoryColumn]] = None,
+            folded: Optional[Dict[str, Callable[[Any], str]]] = None
+    ) -> Callable[[Any], bool]:
+        """
+        Компилирует разобранные условия в одну функцию-предикат.
+
+        Функции сравнения из модуля `operator`, приведённые к нижнему
+        регистру строковые значения и функции получения полей из `getters`
+        выбираются один раз, а не на каждой строке, как в `_compare`.
+        Условия по полям из `categories` проверяются по номерам значений
+        категориального столбца, предикат получает номер строки. Функции
+        из `folded` возвращают значения строковых полей уже в нижнем
+        регистре, поэтому строки сравниваются без преобразования.
+        Альтернативы `field=value` одного поля проверяются одним поиском
+        в множестве значений (`_merge_alternatives`).
+        """
+        categories = categories or {}
+        folded = folded or {}
+
+        def compile_compare(
+                field: str, operator: str, value: Condition
+        ) -> Callable[[Any], bool]:
+            if field in categories:
+                return Report._compile_category(
+                    categories[field], operator, value
+                )
+            if field in folded:
+                return Report._compile_compare(
+                    folded[field], operator, value, folded=True
+                )
+            return Report._compile_compare(getters[field], operator, value)
+
+        group_predicates = [
+            Report._combine(
+                [
+                    compile_compare(field, operator, value)
+                    for field, operator, value in group
+                ],
+                all_required=True
+            )
+            for group in Report._merge_alternatives(or_groups)
+        ]
+        return Report._combine(group_predicates, all_required=False)
+
+    @staticmethod
+    def _merge_alternatives(
+            or_groups: List[List[Tuple[str, str, Union[str, float]]]]
+    ) -> List[List[Tuple[str, str, Condition]]]:
+        """
+        Объединяет альтернативы вида field=value одного строкового поля.
+
+        Группы `brand=apple|brand=xiaomi` заменяются одним условием со
+        множеством значений в нижнем регистре. Порядок групп ИЛИ на
+        результат не влияет.
+        """
+        merged: List[Any] = []
+        alternatives: Dict[str, Set[str]] = {}
+        for group in or_groups:
+            field, operator, value = group[0]
+            if len(group) > 1 or operator != '=' \
+                    or not isinstance(value, str):
+                merged.append(group)
+            elif field in alternatives:
+                alternatives[field].add(value.lower())
+            else:
+                # Место условия в списке групп занимает имя поля
+                alternatives[field] = {value.lower()}
+                merged.append(field)
+        return [
+            [(item, '=', frozenset(alternatives[item]))]
+            if isinstance(item, str) else item
+            for item in merged
+        ]
+
+    @staticmethod
+    def _compile_compare(
+            getter: Callable[[Any], Any],
+            operator: str,
+            value: Condition,
+            folded: bool = False
+    ) -> Callable[[Any], bool]:
+        """
+        Компилирует одно условие, повторяя семантику `_compare`.
+
+        Если folded, getter возвращает строковые значения уже в нижнем
+        регистре. Множество значений проверяется как несколько условий
+        `=`, объединённых через ИЛИ.
+        """
+        compare = OPERATORS[operator]
+
+        if isinstance(value, frozenset):
+            if folded:
+                return lambda item: getter(item) in value
+
+            def predicate(item: Any) -> bool:
+                good_value = getter(item)
+                return good_value is not None \
+                    and str(good_value).lower() in value
+        elif folded:
+            literal = value.lower()
+            return lambda item: compare(getter(item), literal)
+        elif isinstance(value, str):
+            literal = value.lower()
+
+            def predicate(item: Any) -> bool:
+                good_value = getter(item)
+                return good_value is not None and compare(
+                    str(good_value).lower(), literal
+                )
+        else:
+            def predicate(item: Any) -> bool:
+                good_value = getter(item)
+                return good_value is not None and compare(good_value, value)
+        return predicate
+
+    @staticmethod
+    def _compile_category(
+            column: CategoryColumn,
+            operator: str,
+            value: Condition
+    ) -> Callable[[int], bool]:
+        """
+        Компилирует условие = или != по категориальному столбцу.
+
+        Значения без учёта регистра сравниваются один раз для каждой
+        категории, а на каждой строке проверяется только её номер.
+        """
+        literals = value if isinstance(value, frozenset) \
+            else {str(value).lower()}
+        codes = column.codes
+        matched = {
+            code for code, category in enumerate(column.categories)
+            if category.lower() in literals
+        }
+        if operator == '=':
+            return lambda index: codes[index] in matched
+        return lambda index: codes[index] not in matched
+
+    @staticmethod
+    def _combine(
+            predicates: List[Callable[[Any], bool]], all_required: bool
+    ) -> Callable[[Any], bool]:
+        """Объединяет предикаты через И (all_required) или через ИЛИ."""
+        if len(predicates) == 1:
+            return predicates[0]
+        if len(predicates) == 2:
+            first, second = predicates
+            if all_required:
+                return lambda item: first(item) and second(item)
+            return lambda item: first(item) or second(item)
+
+        if all_required:
+            return lambda item: all(
+                predicate(item) for predicate in predicates
+            )
+        return lambda item: any(predicate(item) for predicate in predicates)
+
+    def _values(self, field: str) -> Iterable[Any]:
+        """Возвращает значения поля для всех строк данных."""
+        if isinstance(self.data, Table):
+            return self.data.column(field)
+        return (getattr(good, field) for good in self.data)
+
 
 class Filter(Report):
     """Класс для фильтрации данных."""
 
-    def filter_goods(self, condition: str) -> List[Any]:
-        """Фильтрует список объектов на основе условий."""
+    def filter_goods(self, condition: str) -> Union[List[Any], Table]:
+        """
+        Фильтрует список объектов на основе условий.
+
+        Для колоночной таблицы возвращает новую таблицу `Table`.
+        """
+        if isinstance(self.data, Table):
+            or_groups = self._parse_condition(condition, self.field_types)
+            return self.data.take(self._filter_indices(or_groups))
+        return list(self.iter_goods(condition))
+
+    def iter_goods(self, condition: str) -> Iterator[Any]:
+        """
+        Лениво фильтрует объекты на основе условий.
+
+        Условие разбирается сразу при вызове, поэтому ошибки в нём
+        обнаруживаются до начала чтения данных.
+        """
         or_groups = self._parse_condition(condition, self.field_types)
-        filtered = []
+        return self._iter_filtered(or_groups)
 
-        for good in self.data:
-            for group in or_groups:
-                satisfies_group = all(
-                    self._compare(good, field, operator, value)
-                    for field, operator, value in group
-                )
-                if satisfies_group:
-                    filtered.append(good)
-                    break
+    def _iter_filtered(
+            self, or_groups: List[List[Tuple[str, str, Union[str, float]]]]
+    ) -> Iterator[Any]:
+        """Возвращает объекты, удовлетворяющие хотя бы одной группе."""
+        getters = {field: attrgetter(field) for field in self.field_types}
+        return filter(self._compile_condition(or_groups, getters), self.data)
+
+    def _filter_indices(
+            self, or_groups: List[List[Tuple[str, str, Union[str, float]]]]
+    ) -> Iterator[int]:
+        """Возвращает номера строк таблицы, удовлетворяющих условиям."""
+        return filter(self._row_predicate(or_groups), range(len(self.data)))
+
+    def _row_predicate(
+            self, or_groups: List[List[Tuple[str, str, Condition]]]
+    ) -> Callable[[int], bool]:
+        """
+        Компилирует условия в предикат номера строки таблицы.
+
+        Столбцы в нижнем регистре строятся только для полей из условий.
+        """
+        columns = self.data.columns
+        fields = {field for group in or_groups for field, _, _ in group}
+        getters = {field: columns[field].__getitem__ for field in fields}
+        categories = {
+            field: columns[field]
+            for field in fields
+            if isinstance(columns[field], CategoryColumn)
+        }
+        folded = {
+            field: self.data.folded(field).__getitem__
+            for field in fields
+            if isinstance(columns[field], list)
+        }
+        return self._compile_condition(or_groups, getters, categories, folded)
+
+
+def _distinct_key(value: Any) -> Any:
+    """
+    Возвращает значение для подсчёта различных значений.
+
+    Строки сравниваются без учёта регистра, как в условиях фильтрации.
+    """
+    return value.lower() if isinstance(value, str) else value
+
+
+@dataclass
+class AggregateState:
+    """
+    Частичное состояние агрегации числового поля.
+
+    Хранит количество, сумму, минимум и максимум, поэтому занимает O(1)
+    памяти независимо от числа строк. Для var и stddev дополнительно
+    накапливаются среднее и сумма квадратов отклонений (алгоритм
+    Уэлфорда), для перцентилей p50, p95 и p99 — скетч `KllSketch`
+    ограниченного размера. Точная медиана требует всех значений, поэтому
+    для median значения сохраняются в `array('d')`. Для count_distinct
+    накапливается только множество различных значений (`distinct`) или
+    скетч `HyperLogLog` фиксированного размера (`hll`), поле может быть
+    любого типа. Нужные данные включаются методом `create`. Состояния,
+    посчитанные по частям данных (файлам, диапазонам, процессам),
+    объединяются методом `merge`.
+    """
+
+    count: int = 0
+    total: float = 0.0
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    mean: float = 0.0
+    m2: float = 0.0
+    moments: bool = False
+    values: Optional[array] = None
+    sketch: Optional[KllSketch] = None
+    distinct: Optional[Set[Any]] = None
+    hll: Optional[HyperLogLog] = None
+
+    @classmethod
+    def create(
+            cls, operation: Optional[str] = None, distinct: str = 'exact'
+    ) -> 'AggregateState':
+        """
+        Создаёт пустое состояние с данными, нужными для операции.
+
+        distinct — режим count_distinct из `DISTINCT_MODES`.
+        """
+        counting = operation == 'count_distinct'
+        return cls(
+            moments=operation in ('var', 'stddev'),
+            values=array('d') if operation == 'median' else None,
+            sketch=KllSketch() if operation in PERCENTILES else None,
+            distinct=set() if counting and distinct == 'exact' else None,
+            hll=HyperLogLog() if counting and distinct == 'hll' else None
+        )
+
+    def add(self, value: Any) -> None:
+        """Учитывает одно значение, пустое значение NaN пропускается."""
+        if value != value:
+            return
+        self.count += 1
+        if self.distinct is not None:
+            self.distinct.add(_distinct_key(value))
+            return
+        if self.hll is not None:
+            self.hll.add(_distinct_key(value))
+            return
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        if self.moments:
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        if self.values is not None:
+            self.values.append(value)
+        if self.sketch is not None:
+            self.sketch.add(value)
 
-        return filtered
+    def update(self, values: Sequence[Any]) -> None:
+        """
+        Учитывает столбец значений, уже загруженный в память.
+
+        Пустые значения NaN пропускаются. Сумма с NaN сама равна NaN,
+        поэтому столбец без пропусков не просматривается лишний раз.
+        """
+        if not values:
+            return
+        if self.distinct is not None or self.hll is not None:
+            # Повторы отбрасываются до приведения и хеширования значений
+            unique = [value for value in set(values) if value == value]
+            if not unique:
+                return
+            self.count += len(values)
+            keys = {_distinct_key(value) for value in unique}
+            if self.distinct is not None:
+                self.distinct.update(keys)
+            else:
+                self.hll.update(keys)
+            return
+        total = sum(values)
+        if total != total:
+            values = [value for value in values if value == value]
+            if not values:
+                return
+            total = sum(values)
+        count = len(values)
+        if self.moments:
+            # Два прохода по столбцу точнее, чем обновление по одному
+            mean = total / count
+            self._merge_moments(
+                count, mean, sum((value - mean) ** 2 for value in values)
+            )
+        if self.values is not None:
+            self.values.extend(array('d', values))
+        if self.sketch is not None:
+            self.sketch.update(values)
+        self.merge(AggregateState(count, total, min(values), max(values)))
+
+    def merge(self, other: 'AggregateState') -> 'AggregateState':
+        """Добавляет к состоянию другое частичное состояние."""
+        if not other.count:
+            return self
+        if self.distinct is not None or self.hll is not None:
+            self.count += other.count
+            if self.distinct is not None and other.distinct is not None:
+                self.distinct.update(other.distinct)
+            if self.hll is not None and other.hll is not None:
+                self.hll.merge(other.hll)
+            return self
+        if not self.count:
+            self.minimum, self.maximum = other.minimum, other.maximum
+        else:
+            self.minimum = min(self.minimum, other.minimum)
+            self.maximum = max(self.maximum, other.maximum)
+        if self.moments and other.moments:
+            self._merge_moments(other.count, other.mean, other.m2)
+        self.count += other.count
+        self.total += other.total
+        if self.values is not None and other.values is not None:
+            self.values.extend(other.values)
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        return self
+
+    def _merge_moments(self, count: int, mean: float, m2: float) -> None:
+        """
+        Объединяет среднее и сумму квадратов отклонений с другой частью.
+
+        Вызывается до увеличения `count` на count другой части.
+        """
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+
+    def result(self, operation: str) -> Optional[float]:
+        """Возвращает значение агрегации из `AGGREGATIONS`."""
+        if operation == 'count':
+            return self.count
+        if operation == 'count_distinct':
+            if self.hll is not None:
+                return self.hll.cardinality() if self.count else 0
+            return len(self.distinct or ())
+        if not self.count:
+            return None
+
+        if operation == 'avg':
+            return self.total / self.count
+        elif operation == 'min':
+            return self.minimum
+        elif operation == 'max':
+            return self.maximum
+        elif operation == 'sum':
+            # Сумма целого поля NumPy считается в int64, а на Python —
+            # начиная с 0.0: результат приводится к одному типу
+            return float(self.total)
+        elif operation in ('var', 'stddev'):
+            # Выборочная дисперсия не определена для одного значения
+            if self.count < 2:
+                return None
+            variance = self.m2 / (self.count - 1)
+            return variance if operation == 'var' else sqrt(variance)
+        elif operation == 'median':
+            return median(self.values)
+        elif operation in PERCENTILES:
+            return self.sketch.quantile(PERCENTILES[operation])
+        return None
+
+
+def aggregate_labels(aggregates: List[Tuple[str, str]]) -> List[str]:
+    """
+    Возвращает названия результатов агрегаций (field, operation).
+
+    Если все агрегации относятся к одному полю, результат называется
+    операцией, например, "avg", иначе — полем и операцией, например,
+    "price_avg".
+    """
+    if len({field for field, _ in aggregates}) == 1:
+        return [operation for _, operation in aggregates]
+    return [f'{field}_{operation}' for field, operation in aggregates]
 
 
 class Aggregator(Report):
     """Класс для агрегации данных."""
 
     def calculate_aggregation(
-            self, field: str, operation: str
+            self, field: str, operation: str, distinct: str = 'exact'
     ) -> Optional[float]:
-        """Вычисляет агрегацию (avg, min, max) для указанного поля."""
+        """
+        Вычисляет агрегацию из `AGGREGATIONS` для указанного поля.
+
+        distinct — режим count_distinct: "exact" или "hll".
+        """
+        self._validate_operation(operation)
+        self._validate_field(field, operation)
+        return self._accumulate(field, operation, distinct).result(operation)
+
+    def calculate_aggregations(
+            self,
+            aggregates: List[Tuple[str, str]],
+            distinct: str = 'exact'
+    ) -> Dict[str, Optional[float]]:
+        """
+        Вычисляет несколько агрегаций (field, operation) за один проход.
+
+        Результаты возвращаются по порядку aggregates под ключами
+        `aggregate_labels`.
+        """
+        self._validate_aggregates(aggregates)
+        states = self._accumulate_many(aggregates, distinct)
+        return {
+            label: state.result(operation)
+            for label, (_, operation), state in zip(
+                aggregate_labels(aggregates), aggregates, states
+            )
+        }
+
+    def calculate_group_aggregations(
+            self,
+            group_by: List[str],
+            aggregates: List[Tuple[str, str]],
+            distinct: str = 'exact'
+    ) -> List[Dict[str, Any]]:
+        """
+        Вычисляет несколько агрегаций для каждой группы строк.
+
+        Группу образуют строки с равными значениями полей group_by,
+        строковые значения сравниваются без учёта регистра, как в
+        условиях фильтрации. Группы возвращаются в порядке первого
+        появления, все агрегации накапливаются за один проход.
+        Результаты агрегаций следуют за значениями полей группировки из
+        первой строки группы под ключами `aggregate_labels`.
+        """
+        self._validate_aggregates(aggregates)
+        for group_field in group_by:
+            if group_field not in self.field_types:
+                raise InvalidAggregationError(
+                    f'Поле "{group_field}" отсутствует в данных'
+                )
+        labels = aggregate_labels(aggregates)
+        operations = [operation for _, operation in aggregates]
+        return [
+            {
+                **dict(zip(group_by, label)),
+                **{
+                    name: state.result(operation)
+                    for name, operation, state in zip(
+                        labels, operations, states
+                    )
+                }
+            }
+            for label, states in self._accumulate_groups(
+                group_by, aggregates, distinct
+            ).items()
+        ]
+
+    def _validate_field(
+            self, field: str, operation: Optional[str] = None
+    ) -> None:
+        """
+        Проверяет, что поле существует и является числовым.
+
+        Для count_distinct допускаются поля любого типа.
+        """
         if field not in self.field_types:
             raise InvalidAggregationError(
                 f'Поле "{field}" отсутствует в данных'
             )
-        if self.field_types[field] != float:
+        if operation != 'count_distinct' \
+                and not is_numeric(self.field_types[field]):
             raise UnsupportedFieldTypeError(
                 f'Агрегация возможна только для числовых полей, '
-                f'"{field}" имеет тип {self.field_types[field]}')
-        if operation not in ['avg', 'min', 'max']:
+                f'"{field}" имеет тип '
+                f'{TYPE_NAMES[self.field_types[field]]}')
+
+    def _validate_aggregates(
+            self, aggregates: List[Tuple[str, str]]
+    ) -> None:
+        """Проверяет список агрегаций (field, operation)."""
+        if not aggregates:
+            raise InvalidAggregationError('Не указано ни одной агрегации')
+        for field, operation in aggregates:
+            self._validate_operation(operation)
+            self._validate_field(field, operation)
+
+    @staticmethod
+    def _validate_operation(operation: str) -> None:
+        """Проверяет, что операция агрегации поддерживается."""
+        if operation not in AGGREGATIONS:
             raise InvalidAggregationError(
                 f'Недопустимая операция агрегации: {operation}'
             )
 
-        values = [
-            getattr(good, field) for good in self.data
-            if getattr(good, field) is not None
+    def _accumulate(
+            self,
+            field: str,
+            operation: Optional[str] = None,
+            distinct: str = 'exact'
+    ) -> AggregateState:
+        """Накапливает состояние агрегации по значениям поля."""
+        state = AggregateState.create(operation, distinct)
+        if isinstance(self.data, Table):
+            # Столбец уже в памяти: считаем встроенными функциями
+            state.update(self.data.column(field))
+            return state
+
+        for value in self._values(field):
+            if value is not None:
+                state.add(value)
+        return state
+
+    def _accumulate_many(
+            self,
+            aggregates: List[Tuple[str, str]],
+            distinct: str = 'exact'
+    ) -> List[AggregateState]:
+        """
+        Накапливает состояния нескольких агрегаций за один проход.
+
+        Столбцы таблицы уже в памяти, поэтому агрегируются по отдельности
+        через `_accumulate`. Строки остальных данных читаются один раз, и
+        значения каждой строки добавляются во все состояния. Одинаковые
+        агрегации вычисляются один раз.
+        """
+        unique = list(dict.fromkeys(aggregates))
+        if isinstance(self.data, Table):
+            states = {
+                aggregate: self._accumulate(*aggregate, distinct)
+                for aggregate in unique
+            }
+        else:
+            states = {
+                aggregate: AggregateState.create(aggregate[1], distinct)
+                for aggregate in unique
+            }
+            targets = [
+                (attrgetter(field), state)
+                for (field, _), state in states.items()
+            ]
+            for good in self.data:
+                for get_value, state in targets:
+                    value = get_value(good)
+                    if value is not None:
+                        state.add(value)
+        return [states[aggregate] for aggregate in aggregates]
+
+    def _accumulate_groups(
+            self,
+            group_by: List[str],
+            aggregates: List[Tuple[str, Optional[str]]],
+            distinct: str = 'exact'
+    ) -> Dict[Tuple[Any, ...], List[AggregateState]]:
+        """
+        Накапливает состояния агрегаций групп за один проход по данным.
+
+        Ключ группы — значения полей group_by, строковые приводятся к
+        нижнему регистру, а пустые значения NaN заменяются на None и
+        образуют одну группу. В результате группы обозначены значениями
+        из своей первой строки, состояния идут в порядке aggregates.
+        """
+        fields = [field for field, _ in aggregates]
+        string_fields = [
+            is_string(self.field_types[group_field])
+            for group_field in group_by
         ]
-        if not values:
-            return None
+        if isinstance(self.data, Table):
+            columns = [
+                _nan_to_none(self.data.column(group_field))
+                for group_field in group_by
+            ]
+            labels: Iterable[Tuple[Any, ...]] = zip(*columns)
+            keys: Iterable[Tuple[Any, ...]] = zip(*(
+                self.data.folded(group_field) if is_string_field
+                else column
+                for group_field, is_string_field, column in zip(
+                    group_by, string_fields, columns
+                )
+            ))
+            rows = zip(
+                keys, labels,
+                zip(*(self.data.column(field) for field in fields))
+            )
+        else:
+            get_label = attrgetter(*group_by)
+            get_values = attrgetter(*fields)
 
-        if operation == 'avg':
-            return sum(values) / len(values)
-        elif operation == 'min':
-            return min(values)
-        elif operation == 'max':
-            return max(values)
-        return None
+            def row(good: Any) -> Tuple[Any, ...]:
+                label = get_label(good)
+                if len(group_by) == 1:
+                    label = (label,)
+                label = tuple(
+                    None if value != value else value for value in label
+                )
+                key = tuple(
+                    str(value).lower() if is_string_field else value
+                    for value, is_string_field in zip(label, string_fields)
+                )
+                values = get_values(good)
+                if len(fields) == 1:
+                    values = (values,)
+                return key, label, values
+
+            rows = map(row, self.data)
+
+        states: Dict[Tuple[Any, ...], List[AggregateState]] = {}
+        groups: Dict[Tuple[Any, ...], List[AggregateState]] = {}
+        for key, label, values in rows:
+            group = states.get(key)
+            if group is None:
+                group = states[key] = groups[label] = [
+                    AggregateState.create(operation, distinct)
+                    for _, operation in aggregates
+                ]
+            for state, value in zip(group, values):
+                if value is not None:
+                    state.add(value)
+        return groups
 
 
 class Sorter(Report):
-    """Класс для сортировки данных."""
+    """
+    Класс для сортировки данных.
+
+    Сортировка выполняется по ключам `SortKey` (field, order, nulls).
+    Пустые значения — None, NaN и пустая строка — не сравниваются с
+    остальными, а ставятся в начало (nulls="first") или в конец
+    (nulls="last") независимо от порядка. Пустая ячейка числового поля
+    CSV при разборе становится NaN.
+    """
+
+    def sort_goods(
+            self, field: str, order: str
+    ) -> Union[List[Any], Table]:
+        """Сортирует объекты по одному полю, пустые значения — в конце."""
+        return self.sort_goods_by([(field, order, NULLS_DEFAULT)])
+
+    def sort_goods_by(self, keys: List[SortKey]) -> Union[List[Any], Table]:
+        """
+        Сортирует объекты по нескольким ключам.
+
+        Значения каждого поля выбираются один раз, затем номера строк
+        устойчиво сортируются по ключам, начиная с последнего, — каждым
+        проходом `list.sort` по готовому списку значений. Для колоночной
+        таблицы результатом будет новая таблица `Table`.
+        """
+        self._validate_keys(keys)
+        if isinstance(self.data, Table):
+            return self.data.take(self._sort_indices(keys))
+        goods = list(self.data)
+        columns = [
+            [getattr(good, field) for good in goods] for field, _, _ in keys
+        ]
+        return [
+            goods[index]
+            for index in self._ordered_indices(columns, keys, len(goods))
+        ]
 
-    def sort_goods(self, field: str, order: str) -> List[Any]:
-        """Сортирует список объектов по указанному полю и порядку."""
+    def top_goods(
+            self, field: str, order: str, limit: int, offset: int = 0
+    ) -> Union[List[Any], Table]:
+        """Выбирает первые объекты по одному полю, см. `top_goods_by`."""
+        return self.top_goods_by(
+            [(field, order, NULLS_DEFAULT)], limit, offset
+        )
+
+    def top_goods_by(
+            self, keys: List[SortKey], limit: int, offset: int = 0
+    ) -> Union[List[Any], Table]:
+        """
+        Возвращает limit первых объектов после offset в порядке сортировки.
+
+        Вместо полной сортировки используется выборка через кучу
+        (`heapq.nsmallest`): O(n log k) времени и O(k) памяти, где
+        k = offset + limit. Данные читаются за один проход, поэтому могут
+        быть ленивым итератором. Результат совпадает с
+        `sort_goods_by(keys)[offset:offset + limit]`.
+        """
+        self._validate_keys(keys)
+        count = offset + limit
+        if isinstance(self.data, Table):
+            return self.data.take(self._top_indices(keys, count)[offset:])
+        key = self._composite_key(
+            [attrgetter(field) for field, _, _ in keys], keys
+        )
+        return heapq.nsmallest(count, self.data, key=key)[offset:]
+
+    def external_sort_goods(
+            self, field: str, order: str, buffer_rows: int
+    ) -> Iterator[Any]:
+        """Сортирует объекты по одному полю, см. `external_sort_goods_by`."""
+        return self.external_sort_goods_by(
+            [(field, order, NULLS_DEFAULT)], buffer_rows
+        )
+
+    def external_sort_goods_by(
+            self, keys: List[SortKey], buffer_rows: int
+    ) -> Iterator[Any]:
+        """
+        Сортирует объекты внешней сортировкой слиянием.
+
+        Данные читаются порциями по buffer_rows строк, каждая порция
+        сортируется в памяти. Если данных больше одной порции, отсортированные
+        порции сбрасываются во временные файлы и сливаются через
+        `heapq.merge`. В памяти одновременно находится не больше одной
+        порции, результат возвращается ленивым итератором и совпадает с
+        `sort_goods_by(keys)`.
+        """
+        self._validate_keys(keys)
+        rows = iter(self.data)
+        chunk = list(islice(rows, buffer_rows))
+        if not chunk:
+            return iter(())
+
+        row_type = type(chunk[0])
+        row_fields = list(vars(chunk[0]))
+        key = self._composite_key(
+            [itemgetter(row_fields.index(field)) for field, _, _ in keys],
+            keys
+        )
+
+        runs = []
+        while chunk:
+            run = sorted(
+                (tuple(vars(good).values()) for good in chunk), key=key
+            )
+            chunk = list(islice(rows, buffer_rows))
+            if not chunk and not runs:
+                # Все данные поместились в одну порцию
+                return (row_type(*values) for values in run)
+            runs.append(self._spill_run(run))
+
+        merged = heapq.merge(
+            *(self._read_run(file) for file in runs), key=key
+        )
+        return (row_type(*values) for values in merged)
+
+    @staticmethod
+    def _spill_run(run: List[Tuple[Any, ...]]) -> IO[bytes]:
+        """Записывает отсортированную порцию во временный файл."""
+        file = tempfile.TemporaryFile()
+        for start in range(0, len(run), SPILL_BATCH_ROWS):
+            pickle.dump(
+                run[start:start + SPILL_BATCH_ROWS],
+                file,
+                protocol=pickle.HIGHEST_PROTOCOL
+            )
+        file.seek(0)
+        return file
+
+    @staticmethod
+    def _read_run(file: IO[bytes]) -> Iterator[Tuple[Any, ...]]:
+        """Читает порцию из временного файла и удаляет его после чтения."""
+        try:
+            while True:
+                try:
+                    batch = pickle.load(file)
+                except EOFError:
+                    break
+                yield from batch
+        finally:
+            file.close()
+
+    def _validate_keys(self, keys: List[SortKey]) -> None:
+        """Проверяет поля, порядки и места пустых значений ключей."""
+        if not keys:
+            raise InvalidSortError('Не указано ни одного поля сортировки')
+        for field, order, nulls in keys:
+            self._validate_sort(field, order)
+            if nulls not in ('first', 'last'):
+                raise InvalidSortError(
+                    f'Недопустимое место пустых значений: {nulls}'
+                )
+
+    def _validate_sort(self, field: str, order: str) -> None:
+        """Проверяет поле и порядок сортировки."""
         if field not in self.field_types:
             raise InvalidSortError(f'Поле "{field}" отсутствует в данных')
         if order not in ['asc', 'desc']:
             raise InvalidSortError(f'Недопустимый порядок сортировки: {order}')
 
-        reverse = order == 'desc'
-        return sorted(
-            self.data,
-            key=lambda good: getattr(good, field) or '',
-            reverse=reverse
+    def _sort_indices(self, keys: List[SortKey]) -> List[int]:
+        """Возвращает номера строк таблицы в порядке сортировки."""
+        columns = [self.data.column(field) for field, _, _ in keys]
+        return self._ordered_indices(columns, keys, len(self.data))
+
+    def _top_indices(self, keys: List[SortKey], count: int) -> List[int]:
+        """Возвращает номера count первых строк таблицы по порядку."""
+        columns = [self.data.column(field) for field, _, _ in keys]
+        rows = range(len(self.data))
+        if len(keys) == 1 and not _missing_rows(columns[0]):
+            # Без пустых значений ключом служит само значение столбца
+            select = heapq.nlargest if keys[0][1] == 'desc' \
+                else heapq.nsmallest
+            return select(count, rows, key=columns[0].__getitem__)
+        key = self._composite_key(
+            [column.__getitem__ for column in columns], keys
         )
+        return heapq.nsmallest(count, rows, key=key)
+
+    @staticmethod
+    def _ordered_indices(
+            columns: List[Sequence[Any]], keys: List[SortKey], size: int
+    ) -> List[int]:
+        """
+        Возвращает номера строк, упорядоченные по столбцам ключей.
+
+        Проходы идут от последнего ключа к первому, каждый проход
+        устойчив, поэтому строки с равными значениями ключа сохраняют
+        порядок по следующим ключам. Строки с пустыми значениями
+        отделяются от остальных и ставятся в начало или конец без
+        сравнения значений.
+        """
+        indices = list(range(size))
+        for column, (_, order, nulls) in zip(
+                reversed(columns), reversed(keys)
+        ):
+            missing = _missing_rows(column)
+            present = indices
+            if missing:
+                present = [index for index in indices if index not in missing]
+                empty = [index for index in indices if index in missing]
+            present.sort(key=column.__getitem__, reverse=order == 'desc')
+            if missing:
+                present = empty + present if nulls == 'first' \
+                    else present + empty
+            indices = present
+        return indices
+
+    def _composite_key(
+            self,
+            getters: List[Callable[[Any], Any]],
+            keys: List[SortKey]
+    ) -> Callable[[Any], Tuple[Any, ...]]:
+        """
+        Возвращает функцию ключа сортировки по возрастанию для всех ключей.
+
+        Для каждого ключа в кортеж входит признак пустого значения и
+        значение: числа для убывающего порядка берутся с обратным знаком,
+        строки оборачиваются в `_Descending`. Так кучей и слиянием можно
+        пользоваться без reverse, даже если порядки ключей разные.
+        """
+        parts = [
+            (
+                getter,
+                order == 'desc',
+                is_numeric(self.field_types[field]),
+                0 if nulls == 'first' else 2,
+            )
+            for getter, (field, order, nulls) in zip(getters, keys)
+        ]
+
+        def key(row: Any) -> Tuple[Any, ...]:
+            result: List[Any] = []
+            for getter, descending, numeric, null_rank in parts:
+                value = getter(row)
+                if value is None or value != value or value == '':
+                    result.append((null_rank,))
+                elif not descending:
+                    result.append((1, value))
+                elif numeric:
+                    result.append((1, -value))
+                else:
+                    result.append((1, _Descending(value)))
+            return tuple(result)
+
+        return key
+
+
+class _Descending:
+    """Обёртка значения с обратным порядком сравнения."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+    def __lt__(self, other: '_Descending') -> bool:
+        return other.value < self.value
+
+
+def _nan_to_none(column: Sequence[Any]) -> Sequence[Any]:
+    """Заменяет значения NaN дробного столбца на None."""
+    if isinstance(column, array) and column.typecode == 'd':
+        return [None if value != value else value for value in column]
+    return column
+
+
+def _missing_rows(column: Sequence[Any]) -> Set[int]:
+    """
+    Возвращает номера строк с пустыми значениями: None, NaN или "".
+
+    В целочисленных столбцах пустых значений нет.
+    """
+    if isinstance(column, array) and column.typecode == 'q':
+        return set()
+    return {
+        index for index, value in enumerate(column)
+        if value is None or value != value or value == ''
+    }
@@ -0,0 +1,84 @@
+import json
+import os
+from typing import Dict, Optional
+
+from scr.constants import SCHEMA_SUFFIX
+from scr.exceptions import InvalidSchemaError
+from scr.tables.tables import Category
+
+# Имена типов полей в файле схемы
+TYPE_NAMES: Dict[type, str] = {
+    float: 'float',
+    int: 'int',
+    str: 'str',
+    Category: 'category',
+}
+TYPES: Dict[str, type] = {name: type_ for type_, name in TYPE_NAMES.items()}
+
+
+def schema_path(file_path: str) -> str:
+    """Возвращает путь файла схемы, сохраняемого рядом с CSV-файлом."""
+    return f'{file_path}{SCHEMA_SUFFIX}'
+
+
+def load_schema(path: str) -> Dict[str, type]:
+    """
+    Загружает схему из JSON-файла.
+
+    Схема — объект, где ключи — имена полей, а значения — типы "float",
+    "int", "str" или "category" (строки с небольшим числом различных
+    значений), например: {"name": "str", "price": "float"}.
+    """
+    try:
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+    except OSError as e:
+        raise InvalidSchemaError(f'Не удалось прочитать схему "{path}": {e}')
+    except json.JSONDecodeError as e:
+        raise InvalidSchemaError(f'Схема "{path}" не является JSON: {e}')
+    if not isinstance(data, dict):
+        raise InvalidSchemaError(
+            f'Схема "{path}" должна быть объектом вида {{"поле": "тип"}}'
+        )
+    schema = {}
+    for field, type_name in data.items():
+        if type_name not in TYPES:
+            raise InvalidSchemaError(
+                f'Неизвестный тип "{type_name}" поля "{field}" в схеме '
+                f'"{path}", ожидается один из: {", ".join(TYPES)}'
+            )
+        schema[field] = TYPES[type_name]
+    return schema
+
+
+def save_schema(path: str, field_types: Dict[str, type]) -> None:
+    """Сохраняет типы полей в JSON-файл схемы."""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(
+            {field: TYPE_NAMES[type_] for field, type_ in field_types.items()},
+            file,
+            ensure_ascii=False,
+            indent=2
+        )
+
+
+def load_sidecar_schema(file_path: str) -> Optional[Dict[str, type]]:
+    """Загружает схему, сохранённую рядом с CSV-файлом, если она есть."""
+    path = schema_path(file_path)
+    if not os.path.exists(path):
+        return None
+    return load_schema(path)
+
+
+def save_sidecar_schema(
+        file_path: str, field_types: Dict[str, type]
+) -> None:
+    """
+    Сохраняет типы полей в схему рядом с CSV-файлом.
+
+    Типы полей, которые не разбирались в этот раз, сохраняются из
+    прежней схемы.
+    """
+    schema = load_sidecar_schema(file_path) or {}
+    schema.update(field_types)
+    save_schema(schema_path(file_path), schema)
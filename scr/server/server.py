@@ -0,0 +1,190 @@
+import asyncio
+import io
+import os
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from scr.constants import SERVE_HOST, SERVE_POLL_INTERVAL, SERVE_PORT
+from scr.tables.tables import Table
+from scr.writers.writers import JsonWriter
+
+# Загрузка таблицы и типов полей из файлов
+Loader = Callable[[], Tuple[Table, Dict[str, type]]]
+
+# Выполнение запроса с параметрами к таблице
+Query = Callable[[Table, Dict[str, type], Dict[str, str]], Any]
+
+# Отметка файла для отслеживания изменений: время изменения и размер
+Stamp = Optional[Tuple[int, int]]
+
+
+class QueryServer:
+    """
+    Локальный HTTP-сервер запросов к таблице, загруженной в память.
+
+    Файлы разбираются один раз функцией load, после чего запросы
+    `GET /query?where=...&aggregate=...` выполняются функцией query над
+    той же таблицей, поэтому повторный запрос не разбирает CSV заново, а
+    построенные индексы и столбцы в нижнем регистре переиспользуются.
+    Ответ — JSON, ошибка в параметрах запроса — ответ 400 с полем
+    "error".
+
+    Сервер раз в poll_interval секунд проверяет время изменения и размер
+    файлов. Изменённые файлы разбираются заново в отдельном потоке, до
+    окончания разбора запросы обслуживаются по прежней таблице. Если
+    файлы не удалось разобрать, прежняя таблица сохраняется.
+    """
+
+    def __init__(
+            self,
+            load: Loader,
+            query: Query,
+            file_paths: List[str],
+            host: str = SERVE_HOST,
+            port: int = SERVE_PORT,
+            poll_interval: float = SERVE_POLL_INTERVAL
+    ):
+        self.load = load
+        self.query = query
+        self.file_paths = file_paths
+        self.host = host
+        self.port = port
+        self.poll_interval = poll_interval
+        self.table: Optional[Table] = None
+        self.field_types: Dict[str, type] = {}
+        self._stamps: Dict[str, Stamp] = {}
+
+    def run(self) -> None:
+        """Запускает сервер и обслуживает запросы до прерывания."""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print('Сервер остановлен')
+
+    async def serve(self) -> None:
+        """Загружает файлы, запускает сервер и отслеживает изменения."""
+        server = await self.start()
+        print(f'Сервер запросов: http://{self.host}:{self.port}/query')
+        watcher = asyncio.create_task(self._watch())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+    async def start(self) -> asyncio.AbstractServer:
+        """
+        Загружает файлы и начинает принимать соединения.
+
+        Если при создании указан порт 0, self.port заменяется портом,
+        выбранным системой.
+        """
+        stamps = self._file_stamps()
+        loop = asyncio.get_running_loop()
+        self.table, self.field_types = await loop.run_in_executor(
+            None, self.load
+        )
+        self._stamps = stamps
+        server = await asyncio.start_server(
+            self._handle, self.host, self.port
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        return server
+
+    async def refresh(self) -> bool:
+        """
+        Перезагружает таблицу, если файлы изменились.
+
+        Возвращает True, если таблица заменена новой.
+        """
+        stamps = self._file_stamps()
+        if stamps == self._stamps:
+            return False
+        # Отметки обновляются и при ошибке, чтобы не разбирать
+        # повреждённый файл повторно до его следующего изменения
+        self._stamps = stamps
+        loop = asyncio.get_running_loop()
+        try:
+            table, field_types = await loop.run_in_executor(None, self.load)
+        except (SystemExit, OSError, ValueError) as e:
+            print(f'Предупреждение: файлы не перезагружены: {e}')
+            return False
+        self.table, self.field_types = table, field_types
+        print('Файлы изменились, таблица перезагружена')
+        return True
+
+    async def _watch(self) -> None:
+        """Периодически проверяет изменения файлов."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.refresh()
+
+    def _file_stamps(self) -> Dict[str, Stamp]:
+        """Возвращает отметки файлов, для недоступных файлов — None."""
+        stamps: Dict[str, Stamp] = {}
+        for file_path in self.file_paths:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                stamps[file_path] = None
+                continue
+            stamps[file_path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    async def _handle(
+            self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Читает один HTTP-запрос, отправляет ответ и закрывает соединение."""
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()).strip():
+                # Заголовки запроса серверу не нужны
+                pass
+            status, body = self._respond(request_line)
+        except (asyncio.LimitOverrunError, ValueError):
+            status, body = HTTPStatus.BAD_REQUEST, {
+                'error': 'Неверный HTTP-запрос'
+            }
+        payload = self._encode(body)
+        writer.write(
+            f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+            'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(payload)}\r\n'
+            'Connection: close\r\n\r\n'.encode('ascii') + payload
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, request_line: bytes) -> Tuple[HTTPStatus, Any]:
+        """Выполняет запрос по строке запроса, возвращает статус и тело."""
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            return HTTPStatus.BAD_REQUEST, {'error': 'Неверный HTTP-запрос'}
+        method, target, _ = parts
+        url = urlsplit(target)
+        if url.path != '/query':
+            return HTTPStatus.NOT_FOUND, {
+                'error': f'Неизвестный путь: {url.path}'
+            }
+        if method != 'GET':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {
+                'error': 'Поддерживается только метод GET'
+            }
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        try:
+            result = self.query(self.table, self.field_types, params)
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {'error': str(e)}
+        return HTTPStatus.OK, result
+
+    @staticmethod
+    def _encode(body: Any) -> bytes:
+        """Сериализует тело ответа в JSON."""
+        buffer = io.StringIO()
+        JsonWriter(buffer).write(body)
+        return buffer.getvalue().encode('utf-8')
@@ -0,0 +1,164 @@
+from hashlib import blake2b
+from math import ceil, log
+from typing import Any, Iterable, List, Optional
+
+from scr.constants import HLL_PRECISION, KLL_K
+
+
+class KllSketch:
+    """
+    Скетч KLL для приближённых перцентилей.
+
+    Значения хранятся по уровням: элемент уровня i представляет 2^i
+    исходных значений. Когда скетч заполнен, первый переполненный уровень
+    сортируется, и каждое второе значение переносится на следующий
+    уровень, поэтому скетч занимает O(k) памяти независимо от числа
+    значений. Ошибка ранга убывает примерно как 1/k. Уровни сжимаются
+    с чередованием чётных и нечётных позиций, без случайности, поэтому
+    результат воспроизводим. Скетчи разных частей данных объединяются
+    методом `merge`.
+    """
+
+    def __init__(self, k: int = KLL_K):
+        self.k = k
+        self.count = 0
+        self.compactors: List[List[float]] = [[]]
+        self.size = 0
+        self._max_size = self._capacity(0)
+        self._offset = 0
+
+    def add(self, value: float) -> None:
+        """Учитывает одно значение."""
+        self.count += 1
+        self.size += 1
+        self.compactors[0].append(value)
+        if self.size >= self._max_size:
+            self._compress()
+
+    def update(self, values: Iterable[float]) -> None:
+        """Учитывает последовательность значений."""
+        level = self.compactors[0]
+        size = len(level)
+        level.extend(values)
+        self.count += len(level) - size
+        self.size += len(level) - size
+        self._compress()
+
+    def merge(self, other: 'KllSketch') -> 'KllSketch':
+        """Добавляет к скетчу значения другого скетча."""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        self.size += other.size
+        self._compress()
+        return self
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Возвращает приближённое значение перцентиля доли fraction."""
+        items = sorted(
+            (value, 1 << level)
+            for level, values in enumerate(self.compactors)
+            for value in values
+        )
+        if not items:
+            return None
+        target = fraction * sum(weight for _, weight in items)
+        cumulative = 0
+        for value, weight in items:
+            cumulative += weight
+            if cumulative >= target:
+                return value
+        return items[-1][0]
+
+    def _capacity(self, level: int) -> int:
+        """Ёмкость уровня: убывает в 3/2 раза от верхнего уровня вниз."""
+        depth = len(self.compactors) - level - 1
+        return max(2, ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self) -> None:
+        """Сжимает переполненные уровни, пока скетч не уложится в ёмкость."""
+        self._max_size = sum(map(self._capacity, range(len(self.compactors))))
+        while self.size >= self._max_size:
+            level = next(
+                level for level, items in enumerate(self.compactors)
+                if len(items) >= self._capacity(level)
+            )
+            if level + 1 == len(self.compactors):
+                self.compactors.append([])
+            items = self.compactors[level]
+            items.sort()
+            # При нечётной длине наибольшее значение остаётся на уровне
+            kept = [items.pop()] if len(items) % 2 else []
+            promoted = items[self._offset::2]
+            self.compactors[level + 1].extend(promoted)
+            self.compactors[level] = kept
+            self._offset ^= 1
+            self.size -= len(items) - len(promoted)
+            self._max_size = sum(
+                map(self._capacity, range(len(self.compactors)))
+            )
+
+
+class HyperLogLog:
+    """
+    Скетч HyperLogLog для приближённого подсчёта различных значений.
+
+    Значение хешируется blake2b в 64 бита: первые precision бит выбирают
+    регистр, в котором хранится наибольшая позиция первой единицы в
+    остальных битах. Скетч занимает 2^precision байт независимо от числа
+    значений, относительная ошибка около 1.04 / sqrt(2^precision).
+    Скетчи с одинаковой точностью объединяются методом `merge`
+    поэлементным максимумом регистров.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: Any) -> None:
+        """
+        Учитывает одно значение.
+
+        Числа хешируются как float, поэтому 1 и 1.0 — одно значение.
+        """
+        if isinstance(value, str):
+            data = b's' + value.encode('utf-8')
+        else:
+            data = repr(float(value)).encode('ascii')
+        hashed = int.from_bytes(
+            blake2b(data, digest_size=8).digest(), 'big'
+        )
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[Any]) -> None:
+        """Учитывает последовательность значений."""
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Добавляет к скетчу значения другого скетча."""
+        if other.precision != self.precision:
+            raise ValueError('Нельзя объединить скетчи разной точности')
+        self.registers = bytearray(
+            map(max, self.registers, other.registers)
+        )
+        return self
+
+    def cardinality(self) -> int:
+        """Возвращает оценку количества различных значений."""
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(
+            2.0 ** -register for register in self.registers
+        )
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Для малого числа значений точнее линейный подсчёт
+            estimate = size * log(size / zeros)
+        return round(estimate)
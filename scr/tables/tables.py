@@ -0,0 +1,306 @@
+import sys
+from array import array
+from dataclasses import make_dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from scr.exceptions import InvalidCsvFormatError
+
+
+class Category(str):
+    """
+    Тип строкового поля с небольшим числом различных значений.
+
+    Используется только как тип поля в `field_types`: значения такого
+    поля — обычные строки, а столбец хранится в `CategoryColumn`.
+    """
+
+
+# Числовые и строковые типы полей
+NUMERIC_TYPES = (float, int)
+STRING_TYPES = (str, Category)
+
+
+def is_numeric(field_type: type) -> bool:
+    """Проверяет, является ли тип поля числовым."""
+    return field_type in NUMERIC_TYPES
+
+
+def is_string(field_type: type) -> bool:
+    """Проверяет, является ли тип поля строковым."""
+    return field_type in STRING_TYPES
+
+
+def common_types(
+        first: Dict[str, type], second: Dict[str, type]
+) -> Optional[Dict[str, type]]:
+    """
+    Возвращает общие типы полей двух файлов или None, если их нет.
+
+    Поля должны совпадать. Целое и дробное поле объединяются в дробное,
+    категориальное и строковое — в строковое.
+    """
+    if list(first) != list(second):
+        return None
+    field_types = {}
+    for field, field_type in first.items():
+        other = second[field]
+        if field_type == other:
+            field_types[field] = field_type
+        elif is_numeric(field_type) and is_numeric(other):
+            field_types[field] = float
+        elif is_string(field_type) and is_string(other):
+            field_types[field] = str
+        else:
+            return None
+    return field_types
+
+
+class CategoryColumn:
+    """
+    Строковый столбец с кодированием значений словарём.
+
+    Каждое различное значение хранится один раз в `categories`, а строки
+    хранят только его номер в `array('i')`. Проверка равенства значений
+    сводится к сравнению номеров. Столбец ведёт себя как
+    последовательность строк.
+    """
+
+    def __init__(self):
+        self.codes = array('i')
+        self.categories: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Возвращает количество строк столбца."""
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> str:
+        """Возвращает значение строки с указанным номером."""
+        return self.categories[self.codes[index]]
+
+    def __iter__(self) -> Iterator[str]:
+        """Последовательно возвращает значения строк."""
+        return map(self.categories.__getitem__, self.codes)
+
+    def __eq__(self, other: Any) -> bool:
+        """Сравнивает значения строк с другой последовательностью."""
+        if not isinstance(other, (CategoryColumn, list)):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            value == other_value for value, other_value in zip(self, other)
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Состояние для pickle: словарь номеров восстанавливается."""
+        return {'codes': self.codes, 'categories': self.categories}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Восстанавливает столбец после pickle."""
+        self.codes = state['codes']
+        self.categories = state['categories']
+        self._codes = {
+            value: code for code, value in enumerate(self.categories)
+        }
+
+    def append(self, value: str) -> None:
+        """Добавляет значение в конец столбца."""
+        self.codes.append(self._encode(value))
+
+    def extend(self, values: Iterable[str]) -> None:
+        """Добавляет значения в конец столбца."""
+        if isinstance(values, CategoryColumn):
+            # Перекодируем только словарь другого столбца
+            mapping = [self._encode(value) for value in values.categories]
+            self.codes.extend([mapping[code] for code in values.codes])
+            return
+        encode = self._encode
+        self.codes.extend([encode(value) for value in values])
+
+    def take(self, indices: List[int]) -> 'CategoryColumn':
+        """
+        Возвращает столбец из строк с указанными номерами.
+
+        Словарь значений не копируется, а разделяется с исходным столбцом.
+        """
+        column = CategoryColumn()
+        column.categories = self.categories
+        column._codes = self._codes
+        codes = self.codes
+        column.codes.extend([codes[index] for index in indices])
+        return column
+
+    def _encode(self, value: str) -> int:
+        """Возвращает номер значения, добавляя его в словарь."""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(sys.intern(value))
+            self._codes[value] = code
+        return code
+
+
+# Столбец таблицы: array('d') или array('q') для чисел, список строк или
+# CategoryColumn для категориальных строк
+Column = Sequence[Any]
+
+
+class Table:
+    """
+    Колоночная таблица товаров.
+
+    Дробные поля хранятся в `array('d')`, целые — в `array('q')`,
+    строковые — в списках интернированных строк, категориальные — в
+    `CategoryColumn`. Объекты `Good` создаются только при обращении к
+    строкам таблицы, например при выводе отчёта. Для сравнения строк без
+    учёта регистра таблица лениво строит столбцы значений в нижнем
+    регистре (`folded`). В `indexes` хранятся индексы полей из
+    `scr.indexes`; они, как и `folded`, сбрасываются при изменении
+    таблицы.
+    """
+
+    def __init__(self, field_types: Dict[str, type]):
+        self.field_types = dict(field_types)
+        self.columns: Dict[str, Column] = {
+            field: self._new_column(field_type)
+            for field, field_type in self.field_types.items()
+        }
+        self._row_type: Optional[type] = None
+        self._folded: Dict[str, List[str]] = {}
+        self.indexes: Dict[str, Any] = {}
+
+    @staticmethod
+    def _new_column(field_type: type) -> Column:
+        """Создаёт пустой столбец для указанного типа поля."""
+        if field_type == float:
+            return array('d')
+        if field_type == int:
+            return array('q')
+        if field_type == Category:
+            return CategoryColumn()
+        return []
+
+    def __len__(self) -> int:
+        """Возвращает количество строк таблицы."""
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def __iter__(self) -> Iterator[Any]:
+        """Последовательно создаёт объекты `Good` для строк таблицы."""
+        row_type = self.row_type
+        for values in zip(*self.columns.values()):
+            yield row_type(*values)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Состояние для pickle: динамический класс `Good` не сохраняется."""
+        state = self.__dict__.copy()
+        state['_row_type'] = None
+        state['_folded'] = {}
+        return state
+
+    @property
+    def row_type(self) -> type:
+        """Динамический класс `Good` для материализации строк."""
+        if self._row_type is None:
+            self._row_type = make_dataclass(
+                'Good', list(self.field_types.items()), repr=True
+            )
+        return self._row_type
+
+    def column(self, field: str) -> Column:
+        """Возвращает столбец указанного поля."""
+        return self.columns[field]
+
+    def folded(self, field: str) -> List[str]:
+        """
+        Возвращает значения строкового поля в нижнем регистре.
+
+        Столбец строится при первом обращении и хранится до изменения
+        таблицы. Каждое различное значение приводится к нижнему регистру
+        один раз.
+        """
+        folded = self._folded.get(field)
+        if folded is None:
+            column = self.columns[field]
+            lower = {
+                value: sys.intern(value.lower()) for value in set(column)
+            }
+            folded = self._folded[field] = list(map(lower.__getitem__, column))
+        return folded
+
+    def row(self, index: int) -> Any:
+        """Создаёт объект `Good` для строки с указанным номером."""
+        return self.row_type(
+            *(column[index] for column in self.columns.values())
+        )
+
+    def append(self, values: Sequence[Any]) -> None:
+        """Добавляет строку, значения передаются в порядке полей."""
+        self._folded.clear()
+        self.indexes.clear()
+        for column, field_type, value in zip(
+                self.columns.values(), self.field_types.values(), values
+        ):
+            column.append(sys.intern(value) if field_type == str else value)
+
+    def extend(self, other: 'Table') -> None:
+        """Добавляет в конец таблицы строки другой таблицы."""
+        if other.field_types != self.field_types:
+            raise InvalidCsvFormatError(
+                'Нельзя объединить таблицы с разными типами полей'
+            )
+        self._folded.clear()
+        self.indexes.clear()
+        for field, column in self.columns.items():
+            column.extend(other.columns[field])
+
+    def cast(self, field_types: Dict[str, type]) -> 'Table':
+        """
+        Возвращает таблицу с полями, приведёнными к типам field_types.
+
+        Поддерживается приведение целых полей к дробным и категориальных
+        к строковым, как в `common_types`. Столбцы, тип которых не
+        меняется, разделяются с исходной таблицей.
+        """
+        table = Table(field_types)
+        for field, column in self.columns.items():
+            if field_types[field] == self.field_types[field]:
+                table.columns[field] = column
+            else:
+                # array.extend принимает массив только того же типа
+                table.columns[field].extend(iter(column))
+        return table
+
+    def select(self, fields: Iterable[str]) -> 'Table':
+        """
+        Возвращает таблицу только с указанными полями.
+
+        Поля берутся в порядке таблицы, отсутствующие поля пропускаются.
+        Столбцы и индексы не копируются, а разделяются с исходной
+        таблицей.
+        """
+        fields = set(fields)
+        table = Table({
+            field: field_type
+            for field, field_type in self.field_types.items()
+            if field in fields
+        })
+        for field in table.field_types:
+            table.columns[field] = self.columns[field]
+            if field in self.indexes:
+                table.indexes[field] = self.indexes[field]
+        return table
+
+    def take(self, indices: Iterable[int]) -> 'Table':
+        """Возвращает новую таблицу из строк с указанными номерами."""
+        if not isinstance(indices, list):
+            indices = list(indices)
+        table = Table(self.field_types)
+        for field, column in self.columns.items():
+            if isinstance(column, CategoryColumn):
+                table.columns[field] = column.take(indices)
+                continue
+            values: List[Any] = [column[index] for index in indices]
+            table.columns[field].extend(values)
+        table._row_type = self._row_type
+        return table
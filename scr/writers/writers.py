@@ -0,0 +1,172 @@
+import json
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, List, TextIO
+
+from scr.constants import TABLE_SAMPLE_ROWS, WRITE_BUFFER_ROWS
+
+
+def missing_to_none(row: Any) -> Any:
+    """
+    Заменяет пустые значения NaN строки отчёта на None.
+
+    Строка — словарь или список значений. В JSON None записывается как
+    null, а NaN не входит в стандарт JSON.
+    """
+    if isinstance(row, dict):
+        return {
+            key: None if value != value else value
+            for key, value in row.items()
+        }
+    if isinstance(row, (list, tuple)):
+        return [None if value != value else value for value in row]
+    return row
+
+
+class JsonWriter:
+    """
+    Класс для потоковой записи отчёта в JSON.
+
+    Строки отчёта сериализуются пачками по buffer_rows строк одним
+    вызовом `JSONEncoder.encode`, поэтому весь отчёт не собирается в
+    памяти, а кодировщик не создаётся заново для каждой строки. Результат
+    совпадает с `json.dump(data, file, ensure_ascii=False, indent=2)`, но
+    пустые значения NaN записываются как null.
+    """
+
+    def __init__(self, file: TextIO, buffer_rows: int = WRITE_BUFFER_ROWS):
+        self.file = file
+        self.buffer_rows = buffer_rows
+        self.encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+    def write(self, data: Any) -> None:
+        """Записывает словарь целиком или последовательность строк."""
+        if isinstance(data, dict):
+            self.file.write(self.encoder.encode(missing_to_none(data)))
+            return
+
+        rows = map(missing_to_none, data)
+        separator = '['
+        for batch in iter(lambda: list(islice(rows, self.buffer_rows)), []):
+            # Пачка кодируется массивом "[\n  ...\n]": скобки отрезаются,
+            # а элементы соседних пачек соединяются запятой
+            self.file.write(separator)
+            self.file.write(self.encoder.encode(batch)[1:-2])
+            separator = ','
+        # Пустой массив json.dump записывает как []
+        self.file.write('[]' if separator == '[' else '\n]')
+
+
+class NdjsonWriter:
+    """
+    Класс для потоковой записи отчёта в NDJSON.
+
+    Каждая строка отчёта записывается компактным JSON-объектом на
+    отдельной строке файла, пустые значения NaN — как null.
+    """
+
+    def __init__(self, file: TextIO, buffer_rows: int = WRITE_BUFFER_ROWS):
+        self.file = file
+        self.buffer_rows = buffer_rows
+        self.encoder = json.JSONEncoder(
+            ensure_ascii=False, separators=(',', ':')
+        )
+
+    def write(self, data: Any) -> None:
+        """Записывает словарь одной строкой или каждую строку отчёта."""
+        rows: Iterable[Any] = [data] if isinstance(data, dict) else data
+        buffer: List[str] = []
+        for row in rows:
+            buffer.append(self.encoder.encode(missing_to_none(row)))
+            buffer.append('\n')
+            if len(buffer) >= 2 * self.buffer_rows:
+                self.file.write(''.join(buffer))
+                buffer.clear()
+        self.file.write(''.join(buffer))
+
+
+class TextTableWriter:
+    """
+    Класс для потоковой записи отчёта текстовой таблицей.
+
+    В формате "plain" ширина столбцов вычисляется по заголовкам и первым
+    sample_rows строкам, после чего строки записываются по мере чтения;
+    более длинные значения не обрезаются. В формате "tsv" значения
+    разделяются табуляцией без выравнивания. Пустые значения None и NaN
+    выводятся пустыми ячейками. В отличие от `tabulate`, отчёт не
+    собирается в памяти целиком.
+    """
+
+    def __init__(
+            self,
+            file: TextIO,
+            fmt: str = 'plain',
+            floatfmt: str = '.1f',
+            sample_rows: int = TABLE_SAMPLE_ROWS,
+            buffer_rows: int = WRITE_BUFFER_ROWS
+    ):
+        self.file = file
+        self.fmt = fmt
+        self.floatfmt = floatfmt
+        self.sample_rows = sample_rows
+        self.buffer_rows = buffer_rows
+
+    def write(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Записывает строки отчёта, заданные словарями."""
+        rows = iter(rows)
+        sample = list(islice(rows, self.sample_rows))
+        if not sample:
+            return
+        headers = list(sample[0])
+
+        if self.fmt == 'tsv':
+            format_line = self._tsv_line
+            buffer = [self._tsv_line(headers)]
+        else:
+            numeric = [
+                isinstance(value, (int, float))
+                for value in sample[0].values()
+            ]
+            widths = [len(header) for header in headers]
+            for row in sample:
+                for index, value in enumerate(row.values()):
+                    widths[index] = max(widths[index], len(self._cell(value)))
+
+            def format_line(values: Iterable[Any]) -> str:
+                return self._align(
+                    [self._cell(value) for value in values], widths, numeric
+                )
+
+            buffer = [
+                self._align(headers, widths, numeric),
+                '  '.join('-' * width for width in widths)
+            ]
+
+        buffer = [line + '\n' for line in buffer]
+        for row in chain(sample, rows):
+            buffer.append(format_line(row.values()) + '\n')
+            if len(buffer) >= self.buffer_rows:
+                self.file.write(''.join(buffer))
+                buffer.clear()
+        self.file.write(''.join(buffer))
+
+    @staticmethod
+    def _align(
+            cells: List[str], widths: List[int], numeric: List[bool]
+    ) -> str:
+        """Выравнивает ячейки: числа по правому краю, строки по левому."""
+        return '  '.join(
+            cell.rjust(width) if is_numeric else cell.ljust(width)
+            for cell, width, is_numeric in zip(cells, widths, numeric)
+        ).rstrip()
+
+    def _cell(self, value: Any) -> str:
+        """Форматирует значение ячейки в одну строку."""
+        if value is None or value != value:
+            return ''
+        if isinstance(value, float):
+            return format(value, self.floatfmt)
+        return str(value).replace('\t', ' ').replace('\n', ' ')
+
+    def _tsv_line(self, values: Iterable[Any]) -> str:
+        """Форматирует строку TSV."""
+        return '\t'.join(self._cell(value) for value in values)
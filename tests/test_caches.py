@@ -0,0 +1,150 @@
+import os
+
+import pytest
+
+from scr.caches.caches import TableCache
+from scr.parsers.parsers import ParserCsv
+from scr.reports.index_reports import IndexedFilter
+
+CSV_CONTENT = (
+    'name,brand,price\n'
+    'iphone 15 pro,apple,999\n'
+    '"galaxy, s23",samsung,\n'
+    'redmi note 12,,199\n'
+)
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    """Создаёт CSV-файл с товарами."""
+    path = tmp_path / 'products.csv'
+    path.write_text(CSV_CONTENT, encoding='utf-8')
+    return str(path)
+
+
+def parse(file_path):
+    """Парсит CSV-файл в таблицу."""
+    with open(file_path, encoding='utf-8', newline='') as file:
+        return ParserCsv(file).parse_table()[0]
+
+
+def test_table_cache_round_trip(csv_file, tmp_path):
+    """Тест сохранения таблицы в кэш и загрузки из него."""
+    cache = TableCache(str(tmp_path / 'cache'))
+    assert cache.load(csv_file) is None
+
+    table = parse(csv_file)
+    cache.store(csv_file, table)
+    cached, field_types = cache.load(csv_file)
+
+    # Пустая цена — NaN, а NaN не равен сам себе: сравниваются repr
+    assert field_types == {'name': str, 'brand': str, 'price': float}
+    assert repr(cached.columns) == repr(table.columns)
+    assert [repr(good.__dict__) for good in cached] == [
+        repr(good.__dict__) for good in table
+    ]
+
+
+def test_table_cache_fields(csv_file, tmp_path):
+    """Тест: нужные поля берутся из записи всего файла."""
+    cache = TableCache(str(tmp_path / 'cache'))
+    cache.store(csv_file, parse(csv_file))
+
+    cached, field_types = cache.load(csv_file, ['price'])
+
+    assert field_types == {'price': float}
+    assert repr(list(cached.column('price'))) == '[999.0, nan, 199.0]'
+
+    # Поля нет в файле: запись возвращается целиком, как при разборе
+    _, field_types = cache.load(csv_file, ['price', 'missing'])
+    assert field_types == {'name': str, 'brand': str, 'price': float}
+
+
+def test_table_cache_indexes(csv_file, tmp_path):
+    """Тест сохранения индексов таблицы рядом с её записью."""
+    cache = TableCache(str(tmp_path / 'cache'))
+    table = parse(csv_file)
+    cache.store(csv_file, table)
+    IndexedFilter(table, table.field_types).filter_goods(
+        'brand=apple|price>100'
+    )
+    cache.store_indexes(csv_file, table)
+
+    cached, _ = cache.load(csv_file)
+    assert set(cached.indexes) == {'brand', 'price'}
+    assert cached.indexes['brand'].rows == table.indexes['brand'].rows
+    # Строка с пустой ценой в индекс не входит
+    assert list(cached.indexes['price'].order) == [2, 0]
+
+    selected, _ = cache.load(csv_file, ['price'])
+    assert set(selected.indexes) == {'price'}
+
+
+def test_table_cache_projection_indexes(csv_file, tmp_path):
+    """Тест: индексы проекции сохраняются рядом с записью всего файла."""
+    cache = TableCache(str(tmp_path / 'cache'))
+    table = parse(csv_file)
+    cache.store(csv_file, table)
+    IndexedFilter(table, table.field_types).filter_goods('brand=apple')
+    cache.store_indexes(csv_file, table)
+
+    selected, field_types = cache.load(csv_file, ['price'])
+    IndexedFilter(selected, field_types).filter_goods('price>100')
+    cache.store_indexes(csv_file, selected, ['price'])
+
+    selected, _ = cache.load(csv_file, ['price'])
+    assert set(selected.indexes) == {'price'}
+    # Индексы других полей записи всего файла не теряются
+    cached, _ = cache.load(csv_file)
+    assert set(cached.indexes) == {'brand', 'price'}
+
+
+def test_table_cache_invalidation(csv_file, tmp_path):
+    """Тест: изменённый файл не загружается из кэша."""
+    cache = TableCache(str(tmp_path / 'cache'))
+    cache.store(csv_file, parse(csv_file))
+    stat = os.stat(csv_file)
+
+    # Тот же размер и время изменения, другое содержимое
+    with open(csv_file, 'w', encoding='utf-8') as file:
+        file.write(CSV_CONTENT.replace('999', '899'))
+    os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert cache.load(csv_file) is None
+
+
+def test_table_cache_corrupted_entry(csv_file, tmp_path):
+    """Тест: повреждённая запись удаляется, а не ломает обработку."""
+    cache_dir = tmp_path / 'cache'
+    cache = TableCache(str(cache_dir))
+    cache.store(csv_file, parse(csv_file))
+    (entry,) = cache_dir.glob('*.bin')
+    entry.write_bytes(entry.read_bytes()[:20])
+
+    assert cache.load(csv_file) is None
+    assert not entry.exists()
+
+
+def test_table_cache_eviction(tmp_path):
+    """Тест удаления давно не использованных записей сверх размера."""
+    cache_dir = tmp_path / 'cache'
+    paths = []
+    for index in range(3):
+        path = tmp_path / f'data{index}.csv'
+        path.write_text(CSV_CONTENT, encoding='utf-8')
+        paths.append(str(path))
+
+    cache = TableCache(str(cache_dir))
+    entries = [cache._entry_path(path) for path in paths]
+    cache.store(paths[0], parse(paths[0]))
+    cache.max_size = 2 * entries[0].stat().st_size
+    cache.store(paths[1], parse(paths[1]))
+    os.utime(entries[0], ns=(0, 0))
+    os.utime(entries[1], ns=(1, 1))
+    # Загрузка отмечает запись как недавно использованную
+    cache.load(paths[0])
+    cache.store(paths[2], parse(paths[2]))
+
+    assert sorted(cache_dir.glob('*.bin')) == sorted(
+        [entries[0], entries[2]]
+    )
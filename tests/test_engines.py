@@ -0,0 +1,248 @@
+import pytest
+
+from scr.reports.index_reports import IndexedFilter
+from scr.reports.numpy_reports import (NumpyAggregator, NumpyFilter,
+                                       NumpySorter, numpy_available)
+from scr.reports.reports import Aggregator, Filter, Sorter
+from scr.tables.tables import Table
+
+NAN = float('nan')
+
+ENGINES = [
+    pytest.param((Filter, Aggregator, Sorter), id='python'),
+    pytest.param((IndexedFilter, Aggregator, Sorter), id='index'),
+    pytest.param(
+        (NumpyFilter, NumpyAggregator, NumpySorter),
+        id='numpy',
+        marks=pytest.mark.skipif(
+            not numpy_available(), reason='numpy не установлен'
+        )
+    ),
+]
+
+
+@pytest.fixture
+def field_types():
+    """Типы полей тестовой таблицы."""
+    return {'name': str, 'brand': str, 'price': float, 'rating': float}
+
+
+@pytest.fixture
+def goods_table(field_types):
+    """Таблица товаров с повторяющимися значениями и разным регистром."""
+    table = Table(field_types)
+    for row in [
+        ['iphone 15 pro', 'apple', 999.0, 4.9],
+        ['galaxy s23 ultra', 'samsung', 1199.0, 4.8],
+        ['redmi note 12', 'xiaomi', 199.0, 4.6],
+        ['poco x5 pro', 'xiaomi', 299.0, 4.4],
+        ['43" Телевизор Xiaomi MI TV A 43 2025', 'Xiaomi', 28990.0, 4.6],
+        ['43" Телевизор Digma DM-LED43UBB41', 'Digma', 16490.0, 4.9],
+        ['32" Телевизор Samsung UE32H5000FUXRU', 'Samsung', 29990.0, 4.7],
+    ]:
+        table.append(row)
+    return table
+
+
+def names(goods):
+    """Возвращает имена товаров в порядке следования."""
+    return [good.name for good in goods]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize(
+    'condition, expected',
+    [
+        ('brand=xiaomi', [
+            'redmi note 12',
+            'poco x5 pro',
+            '43" Телевизор Xiaomi MI TV A 43 2025',
+        ]),
+        ('brand!=XIAOMI;price<1000', ['iphone 15 pro']),
+        ('rating>=4.8|price<=199', [
+            'iphone 15 pro',
+            'galaxy s23 ultra',
+            'redmi note 12',
+            '43" Телевизор Digma DM-LED43UBB41',
+        ]),
+        ('price>30000', []),
+        ('brand=APPLE|brand=digma|price=199', [
+            'iphone 15 pro',
+            'redmi note 12',
+            '43" Телевизор Digma DM-LED43UBB41',
+        ]),
+        ('price!=199;price!=299;rating<4.8', [
+            '43" Телевизор Xiaomi MI TV A 43 2025',
+            '32" Телевизор Samsung UE32H5000FUXRU',
+        ]),
+    ]
+)
+def test_engine_filter(engine, condition, expected, goods_table, field_types):
+    """Тест одинаковой фильтрации во всех движках."""
+    filter_class, _, _ = engine
+    result = filter_class(goods_table, field_types).filter_goods(condition)
+    assert names(result) == expected
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize(
+    'field, operation, expected',
+    [
+        ('price', 'min', 199.0),
+        ('price', 'max', 29990.0),
+        ('rating', 'avg', 32.9 / 7),
+        ('price', 'avg', 78166.0 / 7),
+        ('price', 'count', 7),
+        ('price', 'sum', 78166.0),
+        ('rating', 'var', 1 / 30),
+        ('rating', 'stddev', (1 / 30) ** 0.5),
+        ('price', 'median', 1199.0),
+        ('price', 'p50', 1199.0),
+        ('price', 'p95', 29990.0),
+    ]
+)
+def test_engine_aggregate(
+        engine, field, operation, expected, goods_table, field_types
+):
+    """Тест одинаковой агрегации во всех движках."""
+    _, aggregator_class, _ = engine
+    aggregator = aggregator_class(goods_table, field_types)
+    assert aggregator.calculate_aggregation(field, operation) == (
+        pytest.approx(expected)
+    )
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize(
+    'operation, expected',
+    [
+        ('min', 3),
+        ('max', 2504060000),
+        ('sum', 2504060528.0),
+        ('avg', 2504060528 / 4),
+        ('count', 4),
+        ('median', 262.5),
+        ('p50', 25),
+    ]
+)
+def test_engine_aggregate_int(engine, operation, expected):
+    """Тест: агрегации целого поля возвращают одинаковые типы в движках."""
+    _, aggregator_class, _ = engine
+    field_types = {'name': str, 'stock': int}
+    table = Table(field_types)
+    for row in [['a', 25], ['b', 3], ['c', 2504060000], ['d', 500]]:
+        table.append(row)
+    result = aggregator_class(table, field_types).calculate_aggregation(
+        'stock', operation
+    )
+    assert (result, type(result)) == (expected, type(expected))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize(
+    'operation, expected',
+    [
+        ('min', 199.0),
+        ('max', 999.0),
+        ('sum', 1198.0),
+        ('avg', 599.0),
+        ('count', 2),
+        ('median', 599.0),
+        ('count_distinct', 2),
+    ]
+)
+def test_engine_aggregate_missing(engine, operation, expected):
+    """Тест: пустые значения NaN не учитываются в агрегациях движков."""
+    _, aggregator_class, _ = engine
+    field_types = {'brand': str, 'price': float}
+    table = Table(field_types)
+    for row in [
+        ['apple', 999.0], ['xiaomi', NAN], ['xiaomi', 199.0], ['', NAN]
+    ]:
+        table.append(row)
+    aggregator = aggregator_class(table, field_types)
+    assert aggregator.calculate_aggregation('price', operation) == expected
+    # Потоковые данные агрегируются по одному значению
+    assert aggregator_class(
+        iter(list(table)), field_types
+    ).calculate_aggregation('price', operation) == expected
+    assert aggregator.calculate_group_aggregations(
+        ['price'], [('brand', 'count_distinct')]
+    ) == [
+        {'price': 999.0, 'count_distinct': 1},
+        {'price': None, 'count_distinct': 2},
+        {'price': 199.0, 'count_distinct': 1},
+    ]
+    assert aggregator_class(
+        iter(list(table)), field_types
+    ).calculate_group_aggregations(
+        ['price'], [('brand', 'count_distinct')]
+    )[1] == {'price': None, 'count_distinct': 2}
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('distinct', ['exact', 'hll'])
+@pytest.mark.parametrize(
+    'field, expected',
+    [('brand', 4), ('rating', 5), ('name', 7)]
+)
+def test_engine_count_distinct(
+        engine, distinct, field, expected, goods_table, field_types
+):
+    """Тест подсчёта различных значений без учёта регистра во всех движках."""
+    _, aggregator_class, _ = engine
+    aggregator = aggregator_class(goods_table, field_types)
+    assert aggregator.calculate_aggregation(
+        field, 'count_distinct', distinct=distinct
+    ) == expected
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('field', ['brand', 'rating', 'price'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_engine_sort(engine, field, order, goods_table, field_types):
+    """Тест одинаковой устойчивой сортировки во всех движках."""
+    _, _, sorter_class = engine
+    result = sorter_class(goods_table, field_types).sort_goods(field, order)
+    expected = Sorter(list(goods_table), field_types).sort_goods(field, order)
+    assert names(result) == names(expected)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('field', ['brand', 'rating'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_engine_top(engine, field, order, goods_table, field_types):
+    """Тест одинаковой выборки первых строк во всех движках."""
+    _, _, sorter_class = engine
+    sorter = sorter_class(goods_table, field_types)
+    expected = Sorter(list(goods_table), field_types).sort_goods(field, order)
+    assert names(sorter.top_goods(field, order, 3, 2)) == names(expected[2:5])
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize(
+    'keys, expected',
+    [
+        ([('price', 'asc', 'last')], ['a', 'b', 'd', 'c', 'e']),
+        ([('price', 'desc', 'first')], ['c', 'e', 'b', 'd', 'a']),
+        ([('brand', 'asc', 'last'), ('price', 'desc', 'last')],
+         ['d', 'a', 'c', 'b', 'e']),
+        ([('brand', 'desc', 'first'), ('price', 'asc', 'last')],
+         ['b', 'e', 'c', 'a', 'd']),
+    ]
+)
+def test_engine_sort_by_keys(engine, keys, expected, field_types):
+    """Тест сортировки по нескольким ключам с пустыми значениями."""
+    _, _, sorter_class = engine
+    table = Table(field_types)
+    for row in [
+        ['a', 'x', 0.0, 4.0],
+        ['b', '', 5.0, 4.0],
+        ['c', 'y', float('nan'), 4.0],
+        ['d', 'x', 5.0, 4.0],
+        ['e', '', float('nan'), 4.0],
+    ]:
+        table.append(row)
+    sorter = sorter_class(table, field_types)
+    assert names(sorter.sort_goods_by(keys)) == expected
+    assert names(sorter.top_goods_by(keys, 3, 1)) == expected[1:4]
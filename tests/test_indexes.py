@@ -0,0 +1,51 @@
+from array import array
+
+import pytest
+
+from scr.indexes.indexes import HashIndex, SortedIndex
+
+
+@pytest.fixture
+def sorted_index():
+    """Отсортированный индекс столбца с повторами и NaN."""
+    return SortedIndex.build(
+        array('d', [300.0, 100.0, float('nan'), 200.0, 100.0])
+    )
+
+
+def test_hash_index():
+    """Тест поиска строк по значениям хеш-индекса."""
+    index = HashIndex.build(['apple', 'xiaomi', 'apple', 'samsung'])
+    assert list(index.lookup(['apple'])) == [0, 2]
+    assert sorted(index.lookup({'xiaomi', 'samsung', 'huawei'})) == [1, 3]
+    assert list(index.lookup(['huawei'])) == []
+
+
+@pytest.mark.parametrize(
+    'operator, value, expected',
+    [
+        ('=', 100.0, [1, 4]),
+        ('>', 100.0, [3, 0]),
+        ('>=', 200.0, [3, 0]),
+        ('<', 200.0, [1, 4]),
+        ('<=', 200.0, [1, 4, 3]),
+        ('=', 150.0, []),
+        ('>=', float('nan'), []),
+    ]
+)
+def test_sorted_index(operator, value, expected, sorted_index):
+    """Тест поиска строк двоичным поиском, NaN не входит в индекс."""
+    assert list(sorted_index.lookup(operator, value)) == expected
+
+
+def test_index_sections(sorted_index):
+    """Тест восстановления индексов из байтов."""
+    hash_index = HashIndex.build(['apple', 'xiaomi', 'apple'])
+    restored = HashIndex.from_sections(hash_index.to_sections())
+    assert restored.rows == hash_index.rows
+
+    restored = SortedIndex.from_sections(sorted_index.to_sections())
+    assert restored.order == sorted_index.order
+    assert restored.values == sorted_index.values
+    with pytest.raises(ValueError):
+        SortedIndex.from_sections(sorted_index.to_sections()[:2] + [b''])
@@ -1,12 +1,19 @@
 import io
+import json
 import re
 import sys
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 
-from scr.main import (ValidateFilesAction, main, print_table, save_json,
-                      validate_aggregate, validate_order_by)
+from scr.caches.caches import TableCache
+from scr.main import (ValidateFilesAction, main, parse_arguments, print_table,
+                      process_files, save_json, store_indexes, stream_files,
+                      validate_aggregate, validate_aggregates,
+                      validate_group_by, validate_order_by)
+from scr.parsers.parsers import ChunkedParserCsv, ParseOptions
+from scr.reports.index_reports import IndexedFilter
+from scr.tables.tables import Category
 
 
 class MockGood:
@@ -72,6 +79,31 @@ def mock_goods():
     ]
 
 
+@pytest.mark.parametrize(
+    'aggregate, expected',
+    [
+        ('price=avg', [('price', 'avg')]),
+        ('price=min, price=max,rating=avg',
+         [('price', 'min'), ('price', 'max'), ('rating', 'avg')]),
+    ]
+)
+def test_validate_aggregates(aggregate, expected):
+    """Тест разбора нескольких агрегаций через запятую."""
+    field_types = {'brand': str, 'price': float, 'rating': float}
+    assert validate_aggregates(aggregate, field_types) == expected
+    with pytest.raises(ValueError):
+        validate_aggregates(f'{aggregate},brand=avg', field_types)
+    with pytest.raises(ValueError):
+        validate_aggregates(f'{aggregate},', field_types)
+
+
+def test_validate_aggregate_count_distinct():
+    """Тест: count_distinct допускается для строковых полей."""
+    assert validate_aggregate(
+        'brand=count_distinct', {'brand': str, 'price': float}
+    ) == ('brand', 'count_distinct')
+
+
 @pytest.mark.parametrize(
     'aggregate, field_types, expected_message',
     [
@@ -84,7 +116,8 @@ def mock_goods():
             'gh=gh',
             {'price': float},
             'Неверный формат агрегации: должен быть "field=operation", '
-            'где operation в ["avg", "min", "max"]'),
+            'где operation в ["avg", "min", "max", "count", "sum", "var", '
+            '"stddev", "median", "p50", "p95", "p99", "count_distinct"]'),
         (
             'unknown=avg',
             {'price': float},
@@ -93,7 +126,12 @@ def mock_goods():
             'brand=avg',
             {'brand': str, 'price': float},
             'Агрегация возможна только для числовых полей, "brand" '
-            'имеет тип <class \'str\'>'),
+            'имеет тип str'),
+        (
+            'brand=sum',
+            {'brand': Category, 'price': float},
+            'Агрегация возможна только для числовых полей, "brand" '
+            'имеет тип category'),
     ]
 )
 def test_not_valid_validate_aggregate(
@@ -106,6 +144,21 @@ def test_not_valid_validate_aggregate(
         validate_aggregate(aggregate, field_types)
 
 
+@pytest.mark.parametrize(
+    'order_by, expected',
+    [
+        ('price=asc', [('price', 'asc', 'last')]),
+        ('brand=asc, price=desc nulls first',
+         [('brand', 'asc', 'last'), ('price', 'desc', 'first')]),
+        ('price=desc nulls last', [('price', 'desc', 'last')]),
+    ]
+)
+def test_validate_order_by(order_by, expected):
+    """Тест разбора нескольких ключей сортировки."""
+    field_types = {'brand': str, 'price': float}
+    assert validate_order_by(order_by, field_types) == expected
+
+
 @pytest.mark.parametrize(
     'order_by, field_types, expected_message',
     [
@@ -117,6 +170,12 @@ def test_not_valid_validate_aggregate(
         ('unknown=asc',
          {'price': float},
          'Поле "unknown" отсутствует в данных'),
+        ('price=asc,unknown=desc',
+         {'price': float},
+         'Поле "unknown" отсутствует в данных'),
+        ('price=asc nulls middle',
+         {'price': float},
+         'после порядка можно указать "nulls first" или "nulls last"'),
     ]
 )
 def test_not_valid_validate_order_by(order_by, field_types, expected_message):
@@ -125,6 +184,29 @@ def test_not_valid_validate_order_by(order_by, field_types, expected_message):
         validate_order_by(order_by, field_types)
 
 
+@pytest.mark.parametrize(
+    'group_by, expected_message',
+    [
+        (' ', 'Аргумент --group-by не может быть пустым'),
+        ('brand;price',
+         'Неверный формат группировки: должны быть поля через запятую, '
+         'например "brand" или "brand,rating"'),
+        ('brand,unknown', 'Поле "unknown" отсутствует в данных'),
+    ]
+)
+def test_not_valid_validate_group_by(group_by, expected_message):
+    """Тест не валидных данных для группировки."""
+    with pytest.raises(ValueError, match=re.escape(expected_message)):
+        validate_group_by(group_by, {'brand': str, 'price': float})
+
+
+def test_validate_group_by():
+    """Тест разбора полей группировки."""
+    assert validate_group_by(
+        ' brand, rating,brand', {'brand': str, 'rating': float}
+    ) == ['brand', 'rating']
+
+
 @pytest.mark.parametrize(
     'data_selector, headers, floatfmt, where, aggregate, expected_description',
     [
@@ -275,6 +357,29 @@ def test_validate_files_action(
         assert mock_namespace.files == expected_files
 
 
+@pytest.mark.parametrize(
+    'options, rejected',
+    [
+        (['--index'], False),
+        (['--engine', 'numpy'], False),
+        (['--engine', 'numpy', '--index'], True),
+    ]
+)
+def test_parse_arguments_index_engine(options, rejected, tmp_path, capsys):
+    """Тест: --index несовместим с --engine numpy."""
+    path = tmp_path / 'data.csv'
+    path.write_text('name,price\niphone,100\n', encoding='utf-8')
+
+    with patch.object(sys, 'argv', ['main.py', str(path), *options]):
+        if rejected:
+            with pytest.raises(SystemExit):
+                parse_arguments()
+        else:
+            assert parse_arguments().files == [str(path)]
+    assert ('--index нельзя использовать вместе с --engine numpy'
+            in capsys.readouterr().err) == rejected
+
+
 @pytest.mark.parametrize(
     'data, output, output_dir, expected_filename, expected_output',
     [
@@ -302,11 +407,9 @@ def test_validate_files_action(
     ]
 )
 @patch('scr.main.Path')
-@patch('scr.main.json.dump')
 @patch('scr.main.open')
 def test_save_json(
         mock_open,
-        mock_json_dump,
         mock_path,
         data,
         output,
@@ -334,9 +437,10 @@ def test_save_json(
         mock_open.assert_called_once_with(
             mock_output_file, 'w', encoding='utf-8'
         )
-        mock_json_dump.assert_called_once_with(
-            data, mock_file, ensure_ascii=False, indent=2
+        written = ''.join(
+            call.args[0] for call in mock_file.write.call_args_list
         )
+        assert written == json.dumps(data, ensure_ascii=False, indent=2)
         assert captured_output.getvalue().strip() == expected_output
     finally:
         sys.stdout = sys.__stdout__
@@ -352,9 +456,64 @@ def mock_args():
     args.aggregate = None
     args.report = 'terminal'
     args.output = 'output'
+    args.engine = 'python'
+    args.jobs = 1
+    args.limit = None
+    args.offset = 0
+    args.sort_buffer = None
+    args.cache = False
+    args.reader = 'csv'
+    args.infer_rows = 100
+    args.schema = None
+    args.save_schema = False
+    args.index = False
+    args.group_by = None
+    args.distinct = 'exact'
+    args.serve = False
     return args
 
 
+@pytest.mark.parametrize(
+    'files, started',
+    [
+        (['data.csv'], True),
+        (['data.csv', '-'], False),
+    ]
+)
+@patch('scr.main.parse_arguments')
+@patch('scr.main.QueryServer')
+@patch('scr.main.process_files')
+def test_main_serve(
+        mock_process_files,
+        mock_server,
+        mock_parse_arguments,
+        files,
+        started,
+        mock_args,
+        capsys
+):
+    """Тест запуска сервера запросов вместо обработки файлов."""
+    mock_args.serve = True
+    mock_args.port = 8765
+    mock_args.files = files
+    mock_parse_arguments.return_value = mock_args
+
+    if started:
+        main()
+        (server_load, _, server_files), kwargs = mock_server.call_args
+        assert server_files == files
+        assert kwargs == {'port': 8765}
+        mock_server.return_value.run.assert_called_once_with()
+        server_load()
+        mock_process_files.assert_called_once()
+    else:
+        with pytest.raises(SystemExit):
+            main()
+        mock_server.assert_not_called()
+        assert 'стандартного ввода' in capsys.readouterr().out
+    assert mock_process_files.call_count == int(started)
+
+
 @patch('scr.main.parse_arguments')
 @patch('scr.main.process_files')
 @patch('scr.main.print_table')
@@ -412,10 +571,10 @@ def test_main_no_filter_sort_aggregate_json(
 
     try:
         main()
-        mock_save_json.assert_called_once_with(
-            [good.__dict__ for good in mock_goods],
-            'output'
-        )
+        mock_save_json.assert_called_once()
+        data, output = mock_save_json.call_args.args
+        assert list(data) == [good.__dict__ for good in mock_goods]
+        assert output == 'output'
         mock_print_table.assert_not_called()
     finally:
         sys.stdout = sys.__stdout__
@@ -454,10 +613,10 @@ def test_main_with_filter(
         mock_filter_instance.filter_goods.assert_called_once_with(
             'brand=apple'
         )
-        mock_save_json.assert_called_once_with(
-            [good.__dict__ for good in mock_goods],
-            'output'
-        )
+        mock_save_json.assert_called_once()
+        data, output = mock_save_json.call_args.args
+        assert list(data) == [good.__dict__ for good in mock_goods]
+        assert output == 'output'
         mock_print_table.assert_not_called()
     finally:
         sys.stdout = sys.__stdout__
@@ -488,8 +647,8 @@ def test_main_with_sort(
 
     mock_sorter_instance = MagicMock()
     mock_sorter.return_value = mock_sorter_instance
-    mock_sorter_instance.sort_goods.return_value = mock_goods
-    mock_validate_order_by.return_value = ('price', 'asc')
+    mock_sorter_instance.sort_goods_by.return_value = mock_goods
+    mock_validate_order_by.return_value = [('price', 'asc', 'last')]
 
     captured_output = io.StringIO()
     sys.stdout = captured_output
@@ -499,7 +658,9 @@ def test_main_with_sort(
         mock_validate_order_by.assert_called_once_with(
             'price=asc', mock_field_types
         )
-        mock_sorter_instance.sort_goods.assert_called_once_with('price', 'asc')
+        mock_sorter_instance.sort_goods_by.assert_called_once_with(
+            [('price', 'asc', 'last')]
+        )
         mock_print_table.assert_called_once_with(
             [good.__dict__ for good in mock_goods],
             headers='keys',
@@ -512,7 +673,7 @@ def test_main_with_sort(
 
 
 @patch('scr.main.parse_arguments')
-@patch('scr.main.process_files')
+@patch('scr.main.stream_files')
 @patch('scr.main.Aggregator')
 @patch('scr.main.validate_aggregate')
 @patch('scr.main.print_table')
@@ -522,7 +683,7 @@ def test_main_with_aggregate(
         mock_print_table,
         mock_validate_aggregate,
         mock_aggregator,
-        mock_process_files,
+        mock_stream_files,
         mock_parse_arguments,
         mock_args,
         mock_goods,
@@ -532,11 +693,13 @@ def test_main_with_aggregate(
     mock_args.aggregate = 'price=avg'
     mock_args.report = 'terminal'
     mock_parse_arguments.return_value = mock_args
-    mock_process_files.return_value = (mock_goods, mock_field_types)
+    mock_stream_files.return_value = (iter(mock_goods), mock_field_types)
 
     mock_aggregator_instance = MagicMock()
     mock_aggregator.return_value = mock_aggregator_instance
-    mock_aggregator_instance.calculate_aggregation.return_value = 150.0
+    mock_aggregator_instance.calculate_aggregations.return_value = {
+        'avg': 150.0
+    }
     mock_validate_aggregate.return_value = ('price', 'avg')
 
     captured_output = io.StringIO()
@@ -547,8 +710,8 @@ def test_main_with_aggregate(
         mock_validate_aggregate.assert_called_once_with(
             'price=avg', mock_field_types
         )
-        (mock_aggregator_instance.calculate_aggregation
-         .assert_called_once_with('price', 'avg'))
+        (mock_aggregator_instance.calculate_aggregations
+         .assert_called_once_with([('price', 'avg')], distinct='exact'))
         mock_print_table.assert_called_once_with(
             [[150.0]],
             headers=['avg'],
@@ -559,3 +722,334 @@ def test_main_with_aggregate(
         mock_save_json.assert_not_called()
     finally:
         sys.stdout = sys.__stdout__
+
+
+@patch('scr.main.parse_arguments')
+def test_main_with_group_by(mock_parse_arguments, mock_args, tmp_path):
+    """Тест main: агрегация по группам сохраняется в JSON."""
+    path = tmp_path / 'data.csv'
+    path.write_text(
+        'name,brand,price\niphone,apple,100\nredmi,xiaomi,50\n'
+        'poco,Xiaomi,70\n',
+        encoding='utf-8'
+    )
+    mock_args.files = [str(path)]
+    mock_args.aggregate = 'price=avg'
+    mock_args.group_by = 'brand'
+    mock_args.report = 'json'
+    mock_args.output = str(tmp_path / 'groups')
+    mock_parse_arguments.return_value = mock_args
+
+    with patch('scr.main.save_json') as mock_save_json:
+        main()
+
+    mock_save_json.assert_called_once_with(
+        [{'brand': 'apple', 'avg': 100.0}, {'brand': 'xiaomi', 'avg': 60.0}],
+        str(tmp_path / 'groups'),
+        fmt='json'
+    )
+
+
+@patch('scr.main.parse_arguments')
+def test_main_group_by_without_aggregate(
+        mock_parse_arguments, mock_args, capsys
+):
+    """Тест main: --group-by без --aggregate завершается ошибкой."""
+    mock_args.group_by = 'brand'
+    mock_parse_arguments.return_value = mock_args
+
+    with pytest.raises(SystemExit):
+        main()
+    assert capsys.readouterr().out == (
+        'Ошибка в агрегации: --group-by используется только вместе с '
+        '--aggregate\n'
+    )
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+@patch('scr.main.parse_arguments')
+def test_main_aggregate_missing_field(
+        mock_parse_arguments, jobs, mock_args, tmp_path, capsys
+):
+    """Тест main: агрегация по полю, которого нет в файле."""
+    path = tmp_path / 'data.csv'
+    path.write_text('name,price\niphone,100\n', encoding='utf-8')
+    mock_args.files = [str(path)]
+    mock_args.aggregate = 'foo=avg'
+    mock_args.jobs = jobs
+    mock_parse_arguments.return_value = mock_args
+
+    with pytest.raises(SystemExit):
+        main()
+    assert capsys.readouterr().out == (
+        'Ошибка в агрегации: Поле "foo" отсутствует в данных\n'
+    )
+
+
+def test_stream_files(tmp_path, capsys):
+    """Тест потокового чтения нескольких CSV-файлов."""
+    first = tmp_path / 'first.csv'
+    first.write_text('name,price\niphone,100\nredmi,50\n', encoding='utf-8')
+    second = tmp_path / 'second.csv'
+    second.write_text('name,price\npoco,70\n', encoding='utf-8')
+
+    goods, field_types = stream_files([str(first), str(second)])
+
+    assert field_types == {'name': str, 'price': int}
+    assert [good.name for good in goods] == ['iphone', 'redmi', 'poco']
+    assert capsys.readouterr().out == ''
+
+
+@pytest.mark.parametrize('jobs', [1, 3])
+def test_process_files_jobs(jobs, tmp_path, capsys):
+    """Тест параллельного парсинга: порядок строк и сообщений сохраняется."""
+    paths = []
+    for index, content in enumerate([
+        'name,price\niphone,100\n',
+        '',
+        'goods,price2\nredmi,50\n',
+        'name,price\npoco,70.5\nredmi,60\n',
+    ]):
+        path = tmp_path / f'data{index}.csv'
+        path.write_text(content, encoding='utf-8')
+        paths.append(str(path))
+
+    goods, field_types = process_files(paths, jobs)
+
+    # Целое и дробное поле разных файлов объединяются в дробное
+    assert field_types == {'name': str, 'price': float}
+    assert [good.name for good in goods] == ['iphone', 'poco', 'redmi']
+    assert list(goods.column('price')) == [100.0, 70.5, 60.0]
+    assert capsys.readouterr().out.splitlines() == [
+        f'Ошибка данных в файле "{paths[1]}": '
+        f'CSV-файл не содержит заголовков',
+        f'Предупреждение: файл "{paths[2]}" имеет разные типы полей и '
+        f'пропущен',
+    ]
+
+
+@pytest.mark.parametrize(
+    'cpus, chunked', [(1, False), (None, False), (4, True)]
+)
+def test_process_files_chunks_by_cpus(cpus, chunked, tmp_path):
+    """Тест: на одном ядре большой файл не делится на части."""
+    path = tmp_path / 'data.csv'
+    path.write_text('name,price\niphone,100\nredmi,50\n', encoding='utf-8')
+
+    with patch('scr.main.CHUNK_MIN_SIZE', 0), \
+            patch('scr.main.os.cpu_count', return_value=cpus), \
+            patch('scr.main.ChunkedParserCsv', wraps=ChunkedParserCsv) as \
+            chunked_parser:
+        goods, _ = process_files([str(path)], 3)
+
+    assert [good.name for good in goods] == ['iphone', 'redmi']
+    assert chunked_parser.called == chunked
+
+
+@pytest.mark.parametrize('reader', ['csv', 'mmap'])
+@pytest.mark.parametrize('jobs', [1, 3])
+def test_process_files_skipped_rows(reader, jobs, tmp_path, capsys):
+    """Тест: предупреждения о пропущенных строках идут в порядке файлов."""
+    paths = []
+    for index in range(4):
+        path = tmp_path / f'data{index}.csv'
+        path.write_text(
+            'name,price\n' + 'item,1\n' * 3 + f'bad,abc{index}\nitem,2\n',
+            encoding='utf-8'
+        )
+        paths.append(str(path))
+
+    goods, _ = process_files(
+        paths, jobs, options=ParseOptions(reader, infer_rows=3)
+    )
+
+    assert len(goods) == 16
+    line = ' 5' if reader == 'csv' else ''
+    assert capsys.readouterr().out.splitlines() == [
+        f'Файл "{path}": Пропущена строка{line}: ожидается целое число, '
+        f'получено "abc{index}"'
+        for index, path in enumerate(paths)
+    ]
+
+
+@pytest.mark.parametrize('reader', ['csv', 'mmap'])
+def test_process_files_reader(reader, tmp_path, capsys):
+    """Тест: из файлов разбираются только нужные запросу поля."""
+    path = tmp_path / 'data.csv'
+    path.write_text(
+        'name,brand,price\n"iphone, 15",apple,100\nredmi,xiaomi,50\n',
+        encoding='utf-8'
+    )
+
+    goods, field_types = process_files(
+        [str(path)], options=ParseOptions(reader, ['price'])
+    )
+
+    assert field_types == {'price': int}
+    assert list(goods.column('price')) == [100, 50]
+    assert capsys.readouterr().out == ''
+
+
+@pytest.mark.parametrize('reader', ['csv', 'mmap'])
+def test_process_files_missing_field(reader, tmp_path, capsys):
+    """Тест: файл без нужного запросу поля пропускается с предупреждением."""
+    first = tmp_path / 'first.csv'
+    first.write_text('name,price\niphone,100\n', encoding='utf-8')
+    second = tmp_path / 'second.csv'
+    second.write_text('name,cost\nredmi,50\n', encoding='utf-8')
+
+    goods, field_types = process_files(
+        [str(first), str(second)], options=ParseOptions(reader, ['price'])
+    )
+
+    assert field_types == {'price': int}
+    assert list(goods.column('price')) == [100]
+    assert capsys.readouterr().out == (
+        f'Предупреждение: файл "{second}" имеет разные типы полей и '
+        f'пропущен\n'
+    )
+
+
+def test_process_files_save_schema(tmp_path, capsys):
+    """Тест: сохранённая схема используется при следующем запуске."""
+    path = tmp_path / 'data.csv'
+    path.write_text('name,price\niphone,100\nredmi,n/a\n', encoding='utf-8')
+
+    _, field_types = process_files(
+        [str(path)], options=ParseOptions(infer_rows=1, save_schema=True)
+    )
+    assert field_types == {'name': str, 'price': int}
+    assert capsys.readouterr().out == (
+        f'Файл "{path}": Пропущена строка 3: ожидается целое число, '
+        f'получено "n/a"\n'
+    )
+
+    # Типы берутся из схемы, а не из выборки строк
+    _, field_types = process_files([str(path)])
+    assert field_types == {'name': str, 'price': int}
+    assert (tmp_path / 'data.csv.schema.json').exists()
+
+
+@patch('scr.main.parse_arguments')
+def test_main_save_schema_widened(
+        mock_parse_arguments, mock_args, tmp_path, capsys
+):
+    """Тест: сохраняется схема с полем, расширенным после выборки."""
+    path = tmp_path / 'data.csv'
+    path.write_text(
+        'name,price\n' + ''.join(
+            f'item{index},{index}\n' for index in range(150)
+        ) + 'item150,1000.5\n',
+        encoding='utf-8'
+    )
+    mock_args.files = [str(path)]
+    mock_args.aggregate = 'price=max,price=count'
+    mock_args.save_schema = True
+    mock_parse_arguments.return_value = mock_args
+
+    main()
+    first = capsys.readouterr().out
+    assert json.loads(
+        (tmp_path / 'data.csv.schema.json').read_text(encoding='utf-8')
+    ) == {'price': 'float'}
+
+    # Второй запуск берёт типы из сохранённой схемы
+    main()
+    assert capsys.readouterr().out == first
+    assert '1000.50' in first and '151' in first
+    assert 'Пропущена строка' not in first
+
+
+def test_process_files_cache(tmp_path, capsys):
+    """Тест: повторная обработка загружает файлы из кэша."""
+    path = tmp_path / 'data.csv'
+    path.write_text('name,price\niphone,100\nredmi,50\n', encoding='utf-8')
+    cache = TableCache(str(tmp_path / 'cache'))
+
+    goods, field_types = process_files([str(path)], cache=cache)
+    with patch('scr.main.ParserCsv') as mock_parser:
+        cached, cached_types = process_files([str(path)], cache=cache)
+        mock_parser.assert_not_called()
+
+    assert cached_types == field_types == {'name': str, 'price': int}
+    assert cached.columns == goods.columns
+    assert capsys.readouterr().out == ''
+
+
+def test_process_files_cache_schema(tmp_path, capsys):
+    """Тест: кэш учитывает схему рядом с файлом и сохраняет её из кэша."""
+    path = tmp_path / 'data.csv'
+    path.write_text('name,price\niphone,100\nredmi,50\n', encoding='utf-8')
+    schema = tmp_path / 'data.csv.schema.json'
+    cache = TableCache(str(tmp_path / 'cache'))
+
+    _, field_types = process_files([str(path)], cache=cache)
+    assert field_types == {'name': str, 'price': int}
+
+    # Изменённая схема рядом с файлом не даёт взять старую запись кэша
+    schema.write_text('{"price": "float"}', encoding='utf-8')
+    goods, field_types = process_files([str(path)], cache=cache)
+    assert field_types == {'name': str, 'price': float}
+    assert list(goods.column('price')) == [100.0, 50.0]
+
+    # При попадании в кэш схема тоже сохраняется
+    schema.unlink()
+    with patch('scr.main.ParserCsv') as mock_parser:
+        _, field_types = process_files(
+            [str(path)], cache=cache, options=ParseOptions(save_schema=True)
+        )
+        mock_parser.assert_not_called()
+    assert field_types == {'name': str, 'price': int}
+    assert json.loads(schema.read_text(encoding='utf-8')) == {
+        'name': 'str', 'price': 'int'
+    }
+    assert capsys.readouterr().out == ''
+
+
+def test_store_indexes(tmp_path):
+    """Тест: индексы одного файла сохраняются в кэш вместе с таблицей."""
+    path = tmp_path / 'data.csv'
+    path.write_text('name,price\niphone,100\nredmi,50\n', encoding='utf-8')
+    cache = TableCache(str(tmp_path / 'cache'))
+    options = ParseOptions()
+
+    table, field_types = process_files([str(path)], cache=cache)
+    IndexedFilter(table, field_types).filter_goods('price>60')
+    store_indexes([str(path), str(path)], table, [], cache, options)
+    assert process_files([str(path)], cache=cache)[0].indexes == {}
+
+    store_indexes([str(path)], table, [], cache, options)
+    cached, _ = process_files([str(path)], cache=cache)
+    assert list(cached.indexes) == ['price']
+
+
+@patch('scr.main.parse_arguments')
+@patch('scr.main.stream_files')
+@patch('scr.main.Sorter')
+@patch('scr.main.print_table')
+def test_main_aggregate_skips_sort(
+        mock_print_table,
+        mock_sorter,
+        mock_stream_files,
+        mock_parse_arguments,
+        mock_args,
+        mock_goods,
+        mock_field_types
+):
+    """Тест main: сортировка не выполняется перед агрегацией."""
+    mock_args.where = 'brand!=samsung'
+    mock_args.order_by = 'price=desc'
+    mock_args.aggregate = 'price=avg'
+    mock_parse_arguments.return_value = mock_args
+    mock_stream_files.return_value = (iter(mock_goods), mock_field_types)
+
+    main()
+
+    mock_sorter.assert_not_called()
+    mock_print_table.assert_called_once_with(
+        [[125.0]],
+        headers=['avg'],
+        floatfmt='.2f',
+        where='brand!=samsung',
+        aggregate='price=avg'
+    )
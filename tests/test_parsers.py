@@ -1,9 +1,14 @@
 import io
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock
 
 import pytest
 
-from scr.parsers.parsers import ParserCsv
+from scr.exceptions import InvalidCsvFormatError
+from scr.parsers.parsers import ChunkedParserCsv, MmapParserCsv, ParserCsv
+from scr.tables.tables import Category
+
+NAN = float('nan')
 
 
 @pytest.fixture
@@ -126,3 +131,320 @@ def test_parse_data_errors(
                 [item.__dict__ for item in expected_result[0]])
         assert result[1] == expected_result[1]
         assert captured.out.strip() == expected_message
+
+
+class NonSeekableStream(io.StringIO):
+    """Поток без возможности перемотки, как stdin или канал."""
+
+    def seekable(self):
+        return False
+
+    def seek(self, *args):
+        raise io.UnsupportedOperation('seek')
+
+
+def test_iter_rows_single_pass():
+    """Тест потокового чтения CSV без перемотки файла."""
+    stream = NonSeekableStream(
+        'name,brand,price,rating,stock\n'
+        'iphone 15 pro,apple,999.0,4.9,10.0\n'
+        'galaxy s23 ultra,samsung,1199.0,4.8,5.0\n'
+    )
+    parser = ParserCsv(stream)
+    rows = parser.iter_rows()
+    assert parser.field_types == {
+        'name': str,
+        'brand': str,
+        'price': float,
+        'rating': float,
+        'stock': float
+    }
+    assert [good.price for good in rows] == [999.0, 1199.0]
+
+
+@pytest.mark.parametrize(
+    'fields, expected',
+    [
+        (['price'], {'price': [999.0, 1199.0]}),
+        (['stock', 'name'], {
+            'name': ['iphone 15 pro', 'galaxy s23 ultra'],
+            'stock': [10.0, 5.0]
+        }),
+        # Поля нет в заголовке: разбираются все столбцы файла
+        (['stock', 'missing'], {
+            'name': ['iphone 15 pro', 'galaxy s23 ultra'],
+            'brand': ['apple', 'samsung'],
+            'price': [999.0, 1199.0],
+            'rating': [4.9, 4.8],
+            'stock': [10.0, 5.0]
+        }),
+        ([], {}),
+    ]
+)
+def test_parse_table_fields(valid_csv_file, fields, expected):
+    """Тест разбора только указанных полей в порядке файла."""
+    table, field_types = ParserCsv(
+        valid_csv_file, fields=fields
+    ).parse_table()
+    assert list(field_types) == list(expected)
+    assert {
+        field: list(column) for field, column in table.columns.items()
+    } == expected
+
+
+def test_parse_data_short_rows():
+    """Тест: недостающие значения в конце строки считаются пустыми."""
+    goods, _ = ParserCsv(
+        io.StringIO('name,price,rating\niphone,999,4.9\n\nredmi,199\n')
+    ).parse_data()
+    # NaN не равен сам себе, поэтому сравниваются repr
+    assert [repr(good.__dict__) for good in goods] == [
+        repr({'name': 'iphone', 'price': 999, 'rating': 4.9}),
+        repr({'name': 'redmi', 'price': 199, 'rating': NAN}),
+    ]
+
+
+@pytest.mark.parametrize(
+    'infer_rows, schema, expected_types, expected_prices, expected_output',
+    [
+        (
+            1,
+            None,
+            {'name': str, 'price': float},
+            [999.0, NAN, 1199.0],
+            'Пропущена строка 4: ожидается число, получено "n/a"',
+        ),
+        (
+            100,
+            {'price': int},
+            {'name': str, 'price': int},
+            [999, 1199],
+            'Пропущена строка 3: пустое значение целого поля, для пропусков '
+            'нужен тип float\n'
+            'Пропущена строка 4: ожидается целое число, получено "n/a"',
+        ),
+        (
+            100,
+            None,
+            {'name': str, 'price': str},
+            ['999', '', 'n/a', '1199'],
+            '',
+        ),
+        (
+            100,
+            {'price': float},
+            {'name': str, 'price': float},
+            [999.0, NAN, 1199.0],
+            'Пропущена строка 4: ожидается число, получено "n/a"',
+        ),
+        (
+            1,
+            {'name': str, 'price': str, 'unused': float},
+            {'name': str, 'price': str},
+            ['999', '', 'n/a', '1199'],
+            '',
+        ),
+    ]
+)
+def test_parse_types_sample_and_schema(
+        infer_rows,
+        schema,
+        expected_types,
+        expected_prices,
+        expected_output,
+        capsys
+):
+    """Тест определения типов по выборке строк и по схеме."""
+    csv_file = io.StringIO(
+        'name,price\niphone,999\nredmi,\nnokia,n/a\ngalaxy,1199\n'
+    )
+    table, field_types = ParserCsv(
+        csv_file, infer_rows, schema=schema
+    ).parse_table()
+    assert field_types == expected_types
+    assert repr(list(table.column('price'))) == repr(expected_prices)
+    assert capsys.readouterr().out.strip() == expected_output
+
+
+@pytest.mark.parametrize('reader', ['csv', 'mmap', 'chunked'])
+@pytest.mark.parametrize(
+    'schema, expected_types, expected_output',
+    [
+        (None, {'name': str, 'price': float}, ''),
+        (
+            {'price': int},
+            {'name': str, 'price': int},
+            'Пропущена строка 152: ожидается целое число, получено "12.5"',
+        ),
+    ]
+)
+def test_parse_types_widen_after_sample(
+        reader, schema, expected_types, expected_output, tmp_path, capsys
+):
+    """Тест: дробное значение после выборки расширяет целое поле."""
+    prices = [str(index) for index in range(150)] + ['12.5', '7']
+    path = tmp_path / 'data.csv'
+    path.write_text(
+        'name,price\n' + ''.join(
+            f'item{index},{price}\n' for index, price in enumerate(prices)
+        ),
+        encoding='utf-8'
+    )
+    if reader == 'csv':
+        with open(path, encoding='utf-8', newline='') as file:
+            table, field_types = ParserCsv(
+                file, schema=schema
+            ).parse_table()
+    elif reader == 'mmap':
+        table, field_types = MmapParserCsv(
+            str(path), schema=schema
+        ).parse_table()
+    else:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            table, field_types = ChunkedParserCsv(
+                str(path), schema=schema
+            ).parse_table(executor, 3)
+
+    assert field_types == table.field_types == expected_types
+    expected_prices = [
+        expected_types['price'](price) for price in prices
+        if expected_types['price'] is float or price != '12.5'
+    ]
+    assert list(table.column('price')) == expected_prices
+    output = capsys.readouterr().out.strip()
+    if reader != 'csv':
+        # Номер строки выводится только при чтении модулем csv
+        expected_output = expected_output.replace(' 152', '')
+    assert output == expected_output
+
+
+@pytest.mark.parametrize('reader', ['csv', 'mmap', 'chunked'])
+def test_parser_warn(reader, tmp_path, capsys):
+    """Тест: предупреждения о пропущенных строках передаются warn."""
+    path = tmp_path / 'data.csv'
+    path.write_text('name,price\niphone,100\nredmi,n/a\n', encoding='utf-8')
+    warnings = []
+    if reader == 'csv':
+        with open(path, encoding='utf-8', newline='') as file:
+            table, _ = ParserCsv(
+                file, 1, warn=warnings.append
+            ).parse_table()
+    elif reader == 'mmap':
+        table, _ = MmapParserCsv(
+            str(path), infer_rows=1, warn=warnings.append
+        ).parse_table()
+    else:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            table, _ = ChunkedParserCsv(
+                str(path), 1, warn=warnings.append
+            ).parse_table(executor, 2)
+
+    assert list(table.column('price')) == [100]
+    line = ' 3' if reader == 'csv' else ''
+    assert warnings == [
+        f'Пропущена строка{line}: ожидается целое число, получено "n/a"'
+    ]
+    assert capsys.readouterr().out == ''
+
+
+def test_parse_types_int_and_category():
+    """Тест определения целых и категориальных полей."""
+    rows = ''.join(
+        f'item{index},{brand},{index}\n'
+        for index, brand in enumerate(['apple', 'xiaomi'] * 15)
+    )
+    table, field_types = ParserCsv(
+        io.StringIO('name,brand,stock\n' + rows)
+    ).parse_table()
+    assert field_types == {'name': str, 'brand': Category, 'stock': int}
+    assert table.column('brand').categories == ['apple', 'xiaomi']
+    assert list(table.column('stock')) == list(range(30))
+
+
+def test_parse_table(valid_csv_file):
+    """Тест парсинга CSV-файла в колоночную таблицу."""
+    table, field_types = ParserCsv(valid_csv_file).parse_table()
+    assert len(table) == 2
+    assert list(table.column('price')) == [999.0, 1199.0]
+    assert table.column('brand') == ['apple', 'samsung']
+    assert field_types == table.field_types
+
+
+@pytest.fixture
+def quoted_csv_path(tmp_path):
+    """CSV-файл с кавычками внутри значений и переводами строк в кавычках."""
+    rows = ['name,brand,price,rating']
+    for index in range(40):
+        if index % 3 == 0:
+            name = f'"{index}"" Телевизор\nс переводом строки"'
+        elif index % 3 == 1:
+            name = f'{index}" Телевизор Xiaomi MI TV A 43'
+        else:
+            name = f'"телевизор, модель {index}"'
+        rows.append(f'{name},Xiaomi,{1000 + index},4.{index % 10}')
+    path = tmp_path / 'data_quoted.csv'
+    path.write_bytes(('\r\n'.join(rows) + '\r\n').encode('utf-8'))
+    return path
+
+
+@pytest.mark.parametrize(
+    'fields', [None, ['rating', 'name'], ['brand', 'missing']]
+)
+@pytest.mark.parametrize('chunks', [1, 2, 3, 7, 16, 64])
+def test_chunked_parser_matches_parser(quoted_csv_path, chunks, fields):
+    """Тест параллельного парсинга по частям с кавычками в значениях."""
+    with open(quoted_csv_path, encoding='utf-8', newline='') as file:
+        expected, expected_types = ParserCsv(
+            file, fields=fields
+        ).parse_table()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        table, field_types = ChunkedParserCsv(
+            str(quoted_csv_path), fields=fields
+        ).parse_table(executor, chunks)
+
+    assert field_types == expected_types
+    assert [good.__dict__ for good in table] == (
+        [good.__dict__ for good in expected]
+    )
+
+
+@pytest.mark.parametrize(
+    'fields',
+    [None, ['price'], ['rating', 'name'], ['brand', 'missing']]
+)
+def test_mmap_parser_matches_parser(quoted_csv_path, fields):
+    """Тест чтения через mmap: совпадает с csv с тем же набором полей."""
+    with open(quoted_csv_path, encoding='utf-8', newline='') as file:
+        expected, _ = ParserCsv(file, fields=fields).parse_table()
+
+    table, field_types = MmapParserCsv(
+        str(quoted_csv_path), fields
+    ).parse_table()
+
+    assert field_types == expected.field_types
+    assert [good.__dict__ for good in table] == (
+        [good.__dict__ for good in expected]
+    )
+
+
+@pytest.mark.parametrize(
+    'content, expected',
+    [
+        (b'', 'CSV-файл не содержит заголовков'),
+        (b'\n\n', 'CSV-файл не содержит заголовков'),
+    ]
+)
+def test_mmap_parser_errors(tmp_path, content, expected):
+    """Тест ошибок чтения пустого файла через mmap."""
+    path = tmp_path / 'empty.csv'
+    path.write_bytes(content)
+    with pytest.raises(InvalidCsvFormatError, match=expected):
+        MmapParserCsv(str(path)).parse_table()
+
+
+def test_mmap_parser_without_rows(tmp_path):
+    """Тест чтения через mmap файла только с заголовком."""
+    path = tmp_path / 'header.csv'
+    path.write_bytes(b'name,price\n')
+    assert MmapParserCsv(str(path)).parse_table()[1] == {}
@@ -0,0 +1,123 @@
+import pytest
+
+from scr.constants import AGGREGATE, EXTERNAL_SORT, FILTER, LIMIT, SORT, TOP_K
+from scr.planner.planner import QueryPlanner
+
+
+@pytest.mark.parametrize(
+    'where, order_by, aggregate, vectorized, stages, streaming, fused',
+    [
+        (None, None, None, False, [], False, False),
+        ('  ', None, None, False, [], False, False),
+        ('brand=xiaomi', 'price=asc', None, False,
+         [FILTER, SORT], False, False),
+        (None, 'price=asc', 'price=avg', False,
+         [AGGREGATE], True, False),
+        ('brand=xiaomi', 'price=asc', 'price=avg', False,
+         [FILTER, AGGREGATE], True, True),
+        ('brand=xiaomi', None, 'price=avg', True,
+         [FILTER, AGGREGATE], False, False),
+    ]
+)
+def test_query_planner(
+        where, order_by, aggregate, vectorized, stages, streaming, fused
+):
+    """Тест построения плана выполнения запроса."""
+    plan = QueryPlanner(vectorized).plan(where, order_by, aggregate)
+    assert plan.stages == stages
+    assert plan.streaming is streaming
+    assert plan.fused is fused
+    assert plan.order_by == order_by
+
+
+@pytest.mark.parametrize(
+    'order_by, aggregate, limit, offset, stages, streaming',
+    [
+        ('price=asc', None, 10, 0, [FILTER, TOP_K], True),
+        ('price=asc', None, None, 5, [FILTER, SORT, LIMIT], False),
+        (None, None, 10, 5, [FILTER, LIMIT], True),
+        (None, 'price=avg', 10, 5, [FILTER, AGGREGATE], True),
+    ]
+)
+def test_query_planner_limit(
+        order_by, aggregate, limit, offset, stages, streaming
+):
+    """Тест плана запроса с ограничением количества строк."""
+    plan = QueryPlanner().plan(
+        'brand=xiaomi', order_by, aggregate, limit, offset
+    )
+    assert plan.stages == stages
+    assert plan.streaming is streaming
+    assert plan.fused is streaming
+
+
+def test_query_planner_external_sort():
+    """Тест плана с внешней сортировкой при заданном буфере."""
+    plan = QueryPlanner(sort_buffer=1000).plan(None, 'price=asc', None)
+    assert plan.stages == [EXTERNAL_SORT]
+    assert plan.streaming is True
+    assert plan.sort_buffer == 1000
+    plan = QueryPlanner(True, 1000).plan(None, 'price=asc', None)
+    assert plan.stages == [SORT]
+
+
+@pytest.mark.parametrize(
+    'order_by, limit, stages',
+    [
+        (None, None, [FILTER, AGGREGATE]),
+        ('price=asc', 10, [FILTER, TOP_K]),
+        (None, 10, [FILTER, LIMIT]),
+    ]
+)
+def test_query_planner_jobs(order_by, limit, stages):
+    """Тест: при jobs > 1 файлы разбираются параллельно, а не потоково."""
+    aggregate = None if limit else 'price=avg'
+    plan = QueryPlanner(jobs=4).plan(
+        'brand=xiaomi', order_by, aggregate, limit
+    )
+    assert plan.stages == stages
+    assert plan.streaming is False
+    assert plan.fused is False
+    assert QueryPlanner(jobs=1).plan(
+        'brand=xiaomi', order_by, aggregate, limit
+    ).streaming is True
+    # Внешняя сортировка ограничивает память и остаётся потоковой
+    plan = QueryPlanner(sort_buffer=100, jobs=4).plan(None, 'price=asc')
+    assert plan.stages == [EXTERNAL_SORT]
+    assert plan.streaming is True
+
+
+@pytest.mark.parametrize(
+    'planner',
+    [QueryPlanner(cached=True), QueryPlanner(indexed=True)]
+)
+def test_query_planner_cached(planner):
+    """Тест: при включённом кэше или индексах таблица читается целиком."""
+    plan = planner.plan('brand=xiaomi', None, 'price=avg')
+    assert plan.stages == [FILTER, AGGREGATE]
+    assert plan.streaming is False
+    assert plan.fused is False
+
+
+@pytest.mark.parametrize(
+    'where, order_by, aggregate, group_by, fields',
+    [
+        (None, None, None, None, None),
+        ('brand=xiaomi', 'price=asc', None, None, None),
+        (None, None, 'price=avg', None, ['price']),
+        ('brand=xiaomi; rating>4|price<=5', 'name=desc', 'price=max', None,
+         ['brand', 'rating', 'price', 'name']),
+        ('brand', None, 'price=avg', None, None),
+        (None, None, 'price=mode', None, None),
+        (None, None, 'price=min, price=max,rating=avg', None,
+         ['price', 'rating']),
+        (None, None, 'price=min,', None, None),
+        ('rating>4', None, 'price=avg', 'brand, rating',
+         ['rating', 'price', 'brand']),
+        (None, None, 'price=avg', 'brand;name', None),
+    ]
+)
+def test_query_planner_fields(where, order_by, aggregate, group_by, fields):
+    """Тест вычисления полей, которые нужны запросу."""
+    plan = QueryPlanner().plan(where, order_by, aggregate, group_by=group_by)
+    assert plan.fields == fields
@@ -1,9 +1,16 @@
+import io
 import re
+from operator import attrgetter
 from unittest.mock import MagicMock
 
 import pytest
 
-from scr.reports.reports import Aggregator, Filter, Report, Sorter
+from scr.exceptions import (InvalidAggregationError, InvalidSortError,
+                            UnsupportedFieldTypeError)
+from scr.parsers.parsers import ParserCsv
+from scr.reports.reports import (AggregateState, Aggregator, Filter, Report,
+                                 Sorter, aggregate_labels)
+from scr.tables.tables import Category, Table
 
 
 @pytest.fixture
@@ -313,3 +320,410 @@ def test_valid_filter_compare(field, operator, value, result, mock_goods):
     """Тест сравнение одного товара с заданным условием фильтрации."""
     good = mock_goods[0]  # Берем первый товар (iphone)
     assert Report._compare(good, field, operator, value) is result
+
+
+@pytest.fixture
+def goods_table(mock_goods, mock_field_types):
+    """Колоночная таблица с теми же товарами, что и mock_goods."""
+    table = Table(mock_field_types)
+    for good in mock_goods:
+        table.append([good.__dict__[field] for field in mock_field_types])
+    return table
+
+
+def test_reports_on_table(goods_table, mock_field_types):
+    """Тест фильтрации, сортировки и агрегации колоночной таблицы."""
+    filtered = Filter(goods_table, mock_field_types).filter_goods(
+        'brand=xiaomi|price>170'
+    )
+    assert [good.name for good in filtered] == ['samsung', 'xiaomi']
+    filtered = Filter(goods_table, mock_field_types).filter_goods(
+        'brand=APPLE|brand=Xiaomi'
+    )
+    assert [good.name for good in filtered] == ['iphone', 'xiaomi']
+
+    ordered = Sorter(goods_table, mock_field_types).sort_goods(
+        'price', 'desc'
+    )
+    assert [good.name for good in ordered] == ['samsung', 'xiaomi', 'iphone']
+
+    aggregator = Aggregator(goods_table, mock_field_types)
+    assert aggregator.calculate_aggregation('price', 'avg') == 150.0
+
+
+@pytest.mark.parametrize(
+    'condition, expected',
+    [
+        ('brand=XIAOMI', ['poco', 'redmi']),
+        ('brand!=xiaomi;stock>1', ['iphone']),
+        ('brand=huawei|stock=1', ['poco']),
+    ]
+)
+def test_filter_category_column(condition, expected):
+    """Тест фильтрации категориального столбца по номерам значений."""
+    field_types = {'name': str, 'brand': Category, 'stock': int}
+    table = Table(field_types)
+    for row in [
+        ['iphone', 'apple', 5],
+        ['poco', 'Xiaomi', 1],
+        ['redmi', 'xiaomi', 0],
+        ['galaxy', 'samsung', 0],
+    ]:
+        table.append(row)
+    filtered = Filter(table, field_types).filter_goods(condition)
+    assert [good.name for good in filtered] == expected
+
+
+@pytest.mark.parametrize(
+    'condition',
+    [
+        'brand=APPLE',
+        'brand!=apple;price>=150',
+        'rating<4.7|rating>4.85|price=150',
+        'price<=150;rating>=4.8;stock!=8|name=samsung',
+        'brand=APPLE|brand=xiaomi|price>170|brand=huawei',
+    ]
+)
+def test_compiled_condition_matches_compare(
+        condition, mock_goods, mock_field_types
+):
+    """Тест совпадения скомпилированного предиката с _compare."""
+    or_groups = Report._parse_condition(condition, mock_field_types)
+    getters = {field: attrgetter(field) for field in mock_field_types}
+    predicate = Report._compile_condition(or_groups, getters)
+    for good in mock_goods:
+        expected = any(
+            all(Report._compare(good, *cond) for cond in group)
+            for group in or_groups
+        )
+        assert predicate(good) is expected
+
+
+@pytest.mark.parametrize('on_table', [False, True])
+@pytest.mark.parametrize(
+    'group_by, operation, expected',
+    [
+        (['brand'], 'avg', [
+            {'brand': 'apple', 'avg': 100.0},
+            {'brand': 'Xiaomi', 'avg': 125.0},
+            {'brand': 'samsung', 'avg': 200.0},
+        ]),
+        (['brand', 'stock'], 'max', [
+            {'brand': 'apple', 'stock': 10.0, 'max': 100.0},
+            {'brand': 'Xiaomi', 'stock': 8.0, 'max': 150.0},
+            {'brand': 'samsung', 'stock': 5.0, 'max': 200.0},
+        ]),
+    ]
+)
+def test_calculate_groups(
+        on_table, group_by, operation, expected, mock_goods, mock_field_types
+):
+    """Тест агрегации по группам без учёта регистра строковых значений."""
+    extra = MagicMock()
+    extra.__dict__ = {
+        'name': 'redmi',
+        'brand': 'Xiaomi',
+        'price': 100.0,
+        'rating': 4.5,
+        'stock': 8.0
+    }
+    goods = [mock_goods[0], extra, mock_goods[1], mock_goods[2]]
+    data = goods
+    if on_table:
+        data = Table(mock_field_types)
+        for good in goods:
+            data.append([good.__dict__[field] for field in mock_field_types])
+    aggregator = Aggregator(data, mock_field_types)
+    assert aggregator.calculate_group_aggregations(
+        group_by, [('price', operation)]
+    ) == expected
+    with pytest.raises(InvalidAggregationError):
+        aggregator.calculate_group_aggregations(
+            ['unknown'], [('price', operation)]
+        )
+
+
+@pytest.mark.parametrize('on_table', [False, True])
+def test_calculate_aggregations(on_table, mock_goods, mock_field_types):
+    """Тест нескольких агрегаций за один проход по данным и по группам."""
+    data = iter(mock_goods)
+    if on_table:
+        data = Table(mock_field_types)
+        for good in mock_goods:
+            data.append([good.__dict__[field] for field in mock_field_types])
+    aggregates = [
+        ('price', 'min'), ('price', 'max'), ('price', 'avg'),
+        ('rating', 'avg'), ('brand', 'count_distinct')
+    ]
+    aggregator = Aggregator(data, mock_field_types)
+    assert aggregator.calculate_aggregations(aggregates) == pytest.approx({
+        'price_min': 100.0,
+        'price_max': 200.0,
+        'price_avg': 150.0,
+        'rating_avg': 14.3 / 3,
+        'brand_count_distinct': 3,
+    })
+    if not on_table:
+        aggregator = Aggregator(mock_goods, mock_field_types)
+    assert aggregator.calculate_group_aggregations(
+        ['brand'], [('price', 'min'), ('price', 'avg')]
+    ) == [
+        {'brand': 'apple', 'min': 100.0, 'avg': 100.0},
+        {'brand': 'samsung', 'min': 200.0, 'avg': 200.0},
+        {'brand': 'xiaomi', 'min': 150.0, 'avg': 150.0},
+    ]
+    with pytest.raises(InvalidAggregationError):
+        aggregator.calculate_aggregations([])
+    with pytest.raises(InvalidAggregationError):
+        aggregator.calculate_aggregations([('price', 'min'), ('x', 'max')])
+    with pytest.raises(UnsupportedFieldTypeError, match='имеет тип str$'):
+        aggregator.calculate_aggregations([('brand', 'avg')])
+
+
+@pytest.mark.parametrize(
+    'aggregates, expected',
+    [
+        ([('price', 'avg')], ['avg']),
+        ([('price', 'min'), ('price', 'max')], ['min', 'max']),
+        ([('price', 'avg'), ('rating', 'avg')], ['price_avg', 'rating_avg']),
+    ]
+)
+def test_aggregate_labels(aggregates, expected):
+    """Тест названий результатов нескольких агрегаций."""
+    assert aggregate_labels(aggregates) == expected
+
+
+def test_merge_alternatives(mock_field_types):
+    """Тест объединения альтернатив field=value в множество значений."""
+    or_groups = Report._parse_condition(
+        'brand=Apple|price>150|brand=XIAOMI|brand!=samsung', mock_field_types
+    )
+    assert Report._merge_alternatives(or_groups) == [
+        [('brand', '=', frozenset({'apple', 'xiaomi'}))],
+        [('price', '>', 150.0)],
+        [('brand', '!=', 'samsung')],
+    ]
+
+
+def _merged_state(parts, operation=None, distinct='exact'):
+    """Объединяет состояния агрегации, накопленные по частям данных."""
+    state = AggregateState.create(operation, distinct)
+    for part in parts:
+        part_state = AggregateState.create(operation, distinct)
+        part_state.update(part)
+        state.merge(part_state)
+    return state
+
+
+def test_aggregate_state_merge():
+    """Тест объединения частичных состояний агрегации по частям данных."""
+    state = _merged_state([[100.0], [], [150.0, 200.0]])
+    assert state == AggregateState(3, 450.0, 100.0, 200.0)
+    assert state.result('avg') == 150.0
+    assert AggregateState().result('min') is None
+
+
+@pytest.mark.parametrize(
+    'operation, expected',
+    [
+        ('count', 3),
+        ('sum', 450.0),
+        ('var', 2500.0),
+        ('stddev', 50.0),
+        ('median', 150.0),
+        ('p50', 150.0),
+        ('p99', 200.0),
+    ]
+)
+def test_aggregate_state_merge_operations(operation, expected):
+    """Тест объединения состояний для всех операций агрегации."""
+    state = _merged_state([[100.0], [], [150.0, 200.0]], operation)
+    assert state.result(operation) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('distinct', ['exact', 'hll'])
+@pytest.mark.parametrize('on_table', [False, True])
+def test_count_distinct(on_table, distinct, mock_goods, mock_field_types):
+    """Тест подсчёта различных значений по частям данных и по группам."""
+    extra = MagicMock()
+    extra.__dict__ = {
+        'name': 'IPHONE',
+        'brand': 'Xiaomi',
+        'price': 100.0,
+        'rating': 4.5,
+        'stock': 8.0
+    }
+    goods = [*mock_goods, extra]
+    data = goods
+    if on_table:
+        data = Table(mock_field_types)
+        for good in goods:
+            data.append([good.__dict__[field] for field in mock_field_types])
+    aggregator = Aggregator(data, mock_field_types)
+    for field, expected in [('name', 3), ('brand', 3), ('price', 3)]:
+        assert aggregator.calculate_aggregation(
+            field, 'count_distinct', distinct
+        ) == expected
+    assert aggregator.calculate_group_aggregations(
+        ['brand'], [('name', 'count_distinct')], distinct
+    ) == [
+        {'brand': 'apple', 'count_distinct': 1},
+        {'brand': 'samsung', 'count_distinct': 1},
+        {'brand': 'xiaomi', 'count_distinct': 2},
+    ]
+
+    names = [good.name for good in goods]
+    state = _merged_state(
+        [names[:2], [], names[2:]], 'count_distinct', distinct
+    )
+    assert state.result('count_distinct') == 3
+
+
+def test_aggregate_state_empty():
+    """Тест результатов агрегации без значений и для одного значения."""
+    assert AggregateState.create('count').result('count') == 0
+    assert AggregateState.create('median').result('median') is None
+    for distinct in ('exact', 'hll'):
+        assert AggregateState.create('count_distinct', distinct).result(
+            'count_distinct'
+        ) == 0
+    state = AggregateState.create('var')
+    state.add(5.0)
+    assert state.result('var') is None
+
+
+@pytest.mark.parametrize(
+    'field, order, limit, offset',
+    [
+        ('price', 'asc', 2, 0),
+        ('price', 'desc', 1, 1),
+        ('brand', 'desc', 5, 0),
+        ('rating', 'asc', 0, 0),
+        ('stock', 'desc', 2, 2),
+    ]
+)
+def test_top_goods(
+        field, order, limit, offset, mock_goods, goods_table,
+        mock_field_types
+):
+    """Тест выборки первых строк кучей: совпадает с полной сортировкой."""
+    expected = Sorter(mock_goods, mock_field_types).sort_goods(field, order)
+    expected = [good.__dict__ for good in expected[offset:offset + limit]]
+    for data in (iter(mock_goods), goods_table):
+        result = Sorter(data, mock_field_types).top_goods(
+            field, order, limit, offset
+        )
+        assert [good.__dict__ for good in result] == expected
+
+
+@pytest.mark.parametrize('buffer_rows', [1, 2, 3, 100])
+@pytest.mark.parametrize('field', ['price', 'brand'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_external_sort_goods(field, order, buffer_rows, mock_field_types):
+    """Тест внешней сортировки: совпадает с сортировкой в памяти."""
+    table = Table(mock_field_types)
+    for index in range(7):
+        table.append([f'good {index}', f'brand {index % 3}',
+                      float(index % 4 + 1), 4.5, 1.0])
+    goods = list(table)
+    expected = Sorter(goods, mock_field_types).sort_goods(field, order)
+    result = Sorter(iter(goods), mock_field_types).external_sort_goods(
+        field, order, buffer_rows
+    )
+    assert [good.__dict__ for good in result] == (
+        [good.__dict__ for good in expected]
+    )
+
+
+@pytest.mark.parametrize(
+    'keys, expected',
+    [
+        ([('price', 'asc', 'last')], ['a', 'd', 'c', 'b', 'e']),
+        ([('price', 'desc', 'last')], ['b', 'c', 'a', 'd', 'e']),
+        ([('brand', 'desc', 'last'), ('price', 'asc', 'first')],
+         ['e', 'c', 'a', 'd', 'b']),
+        ([('brand', 'asc', 'first'), ('stock', 'desc', 'last')],
+         ['b', 'd', 'a', 'e', 'c']),
+    ]
+)
+def test_sort_goods_by_keys(keys, expected, mock_field_types):
+    """
+    Тест сортировки по нескольким ключам без приведения значений.
+
+    Нулевая цена сортируется как число, а не как пустая строка; None и
+    пустая строка считаются пустыми значениями.
+    """
+    goods = []
+    for name, brand, price, stock in [
+        ('a', 'x', 0.0, 1.0),
+        ('b', '', 7.0, 3.0),
+        ('c', 'y', 5.0, None),
+        ('d', 'x', 0.0, 2.0),
+        ('e', 'y', None, 1.0),
+    ]:
+        good = MagicMock()
+        good.__dict__ = {
+            'name': name, 'brand': brand, 'price': price,
+            'rating': 4.5, 'stock': stock
+        }
+        goods.append(good)
+    sorter = Sorter(goods, mock_field_types)
+    assert [good.name for good in sorter.sort_goods_by(keys)] == expected
+    top = Sorter(iter(goods), mock_field_types).top_goods_by(keys, 2, 2)
+    assert [good.name for good in top] == expected[2:4]
+    with pytest.raises(InvalidSortError):
+        sorter.sort_goods_by([])
+    with pytest.raises(InvalidSortError):
+        sorter.sort_goods_by([('price', 'asc', 'middle')])
+
+
+@pytest.mark.parametrize(
+    'keys, expected',
+    [
+        ([('price', 'desc', 'first')], ['b', 'a', 'c', 'd']),
+        ([('price', 'asc', 'last')], ['d', 'c', 'a', 'b']),
+        ([('price', 'desc', 'last')], ['a', 'c', 'd', 'b']),
+        ([('brand', 'asc', 'first')], ['c', 'a', 'd', 'b']),
+        ([('brand', 'asc', 'last')], ['a', 'd', 'b', 'c']),
+    ]
+)
+def test_sort_goods_by_empty_csv_cells(keys, expected):
+    """
+    Тест: пустые ячейки CSV сортируются как пропуски.
+
+    Пустая ячейка числового поля читается как NaN, поэтому nulls
+    first/last действует и на числовые, и на строковые поля.
+    """
+    table, field_types = ParserCsv(io.StringIO(
+        'name,brand,price\na,apple,10\nb,xiaomi,\nc,,5\nd,apple,0\n'
+    )).parse_table()
+    assert field_types['price'] is float
+    result = Sorter(table, field_types).sort_goods_by(keys)
+    assert [good.name for good in result] == expected
+    top = Sorter(iter(list(table)), field_types).top_goods_by(keys, 2)
+    assert [good.name for good in top] == expected[:2]
+
+
+@pytest.mark.parametrize('buffer_rows', [1, 3, 100])
+@pytest.mark.parametrize(
+    'keys',
+    [
+        [('brand', 'desc', 'last'), ('price', 'asc', 'last')],
+        [('price', 'desc', 'first'), ('name', 'asc', 'last')],
+    ]
+)
+def test_external_sort_goods_by_keys(keys, buffer_rows, mock_field_types):
+    """Тест внешней сортировки по нескольким ключам с пустыми значениями."""
+    table = Table(mock_field_types)
+    for index in range(9):
+        price = float('nan') if index % 4 == 0 else float(index % 3)
+        table.append([f'good {index}', f'brand {index % 2}' * (index % 5 > 0),
+                      price, 4.5, 1.0])
+    goods = list(table)
+    expected = Sorter(goods, mock_field_types).sort_goods_by(keys)
+    result = Sorter(iter(goods), mock_field_types).external_sort_goods_by(
+        keys, buffer_rows
+    )
+    assert [good.name for good in result] == [good.name for good in expected]
+    assert [good.name for good in Sorter(table, mock_field_types)
+            .sort_goods_by(keys)] == [good.name for good in expected]
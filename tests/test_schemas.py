@@ -0,0 +1,43 @@
+import pytest
+
+from scr.exceptions import InvalidSchemaError
+from scr.schemas.schemas import (load_schema, load_sidecar_schema,
+                                 save_sidecar_schema, schema_path)
+
+
+def test_schema_round_trip(tmp_path):
+    """Тест сохранения схемы рядом с CSV-файлом и её загрузки."""
+    csv_path = str(tmp_path / 'data.csv')
+    assert load_sidecar_schema(csv_path) is None
+
+    save_sidecar_schema(csv_path, {'name': str, 'price': float})
+    save_sidecar_schema(csv_path, {'price': str, 'rating': float})
+
+    assert schema_path(csv_path) == f'{csv_path}.schema.json'
+    assert load_sidecar_schema(csv_path) == {
+        'name': str,
+        'price': str,
+        'rating': float
+    }
+
+
+@pytest.mark.parametrize(
+    'content, expected_message',
+    [
+        ('{"price": "long"}', 'Неизвестный тип "long" поля "price"'),
+        ('["price"]', 'должна быть объектом'),
+        ('{price}', 'не является JSON'),
+    ]
+)
+def test_load_schema_errors(tmp_path, content, expected_message):
+    """Тест ошибок в файле схемы."""
+    path = tmp_path / 'schema.json'
+    path.write_text(content, encoding='utf-8')
+    with pytest.raises(InvalidSchemaError, match=expected_message):
+        load_schema(str(path))
+
+
+def test_load_schema_missing_file(tmp_path):
+    """Тест отсутствующего файла схемы."""
+    with pytest.raises(InvalidSchemaError, match='Не удалось прочитать'):
+        load_schema(str(tmp_path / 'missing.json'))
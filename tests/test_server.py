@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+from functools import partial
+
+import pytest
+
+from scr.main import execute_query, process_files
+from scr.server.server import QueryServer
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    """CSV-файл товаров для сервера запросов."""
+    path = tmp_path / 'goods.csv'
+    path.write_text(
+        'name,brand,price,rating\n'
+        'iphone 15 pro,apple,999,4.9\n'
+        'galaxy s23 ultra,samsung,1199,4.8\n'
+        'redmi note 12,xiaomi,199,4.6\n'
+        'poco x5 pro,xiaomi,299,4.4\n',
+        encoding='utf-8'
+    )
+    return str(path)
+
+
+def create_server(csv_file):
+    """Создаёт сервер на свободном порту для CSV-файла."""
+    return QueryServer(
+        partial(process_files, [csv_file]), execute_query, [csv_file],
+        port=0
+    )
+
+
+async def request(port, target, method='GET'):
+    """Отправляет HTTP-запрос серверу, возвращает статус и тело JSON."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'{method} {target} HTTP/1.1\r\nHost: localhost\r\n\r\n'
+                 .encode('ascii'))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b'\r\n\r\n', 1)
+    return int(head.split()[1]), json.loads(body)
+
+
+@pytest.mark.parametrize(
+    'target, status, expected',
+    [
+        ('/query?where=brand%3Dxiaomi&order_by=price%3Ddesc', 200, [
+            {'name': 'poco x5 pro', 'brand': 'xiaomi', 'price': 299,
+             'rating': 4.4},
+            {'name': 'redmi note 12', 'brand': 'xiaomi', 'price': 199,
+             'rating': 4.6},
+        ]),
+        ('/query?aggregate=price%3Dmin,price%3Dmax', 200,
+         {'min': 199, 'max': 1199}),
+        ('/query?aggregate=price%3Dcount&group_by=brand', 200, [
+            {'brand': 'apple', 'count': 1},
+            {'brand': 'samsung', 'count': 1},
+            {'brand': 'xiaomi', 'count': 2},
+        ]),
+        ('/query?order_by=price%3Dasc&limit=1&offset=1', 200, [
+            {'name': 'poco x5 pro', 'brand': 'xiaomi', 'price': 299,
+             'rating': 4.4},
+        ]),
+        ('/query?aggregate=brand%3Davg', 400, {
+            'error': 'Агрегация возможна только для числовых полей, '
+                     '"brand" имеет тип str'
+        }),
+        ('/query?limit=-1', 400, {
+            'error': 'Параметр limit должен быть целым неотрицательным '
+                     'числом, получено: -1'
+        }),
+        ('/query?brand=apple', 400,
+         {'error': 'Неизвестные параметры запроса: brand'}),
+        ('/goods', 404, {'error': 'Неизвестный путь: /goods'}),
+    ]
+)
+def test_server_query(target, status, expected, csv_file):
+    """Тест ответов сервера на запросы к загруженной таблице."""
+    async def scenario():
+        server = create_server(csv_file)
+        async with await server.start():
+            return await request(server.port, target)
+
+    assert asyncio.run(scenario()) == (status, expected)
+
+
+def test_server_method_not_allowed(csv_file):
+    """Тест: сервер принимает только запросы GET."""
+    async def scenario():
+        server = create_server(csv_file)
+        async with await server.start():
+            return await request(server.port, '/query', method='POST')
+
+    status, _ = asyncio.run(scenario())
+    assert status == 405
+
+
+def test_server_refresh(csv_file, capsys):
+    """Тест перезагрузки таблицы после изменения файла."""
+    async def scenario():
+        server = create_server(csv_file)
+        async with await server.start():
+            assert not await server.refresh()
+            with open(csv_file, 'a', encoding='utf-8') as file:
+                file.write('pixel 8,google,699,4.7\n')
+            stat = os.stat(csv_file)
+            os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+            assert await server.refresh()
+            first = await request(
+                server.port, '/query?aggregate=price%3Dcount'
+            )
+
+            # Повреждённый файл не заменяет загруженную таблицу
+            with open(csv_file, 'w', encoding='utf-8') as file:
+                file.write('name,brand,price\n')
+            assert not await server.refresh()
+            second = await request(server.port, '/query?aggregate=price%3Dsum')
+            return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == (200, {'count': 5})
+    assert second == (200, {'sum': 3395})
+    assert 'файлы не перезагружены' in capsys.readouterr().out
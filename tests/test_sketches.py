@@ -0,0 +1,73 @@
+import random
+from bisect import bisect_left
+
+import pytest
+
+from scr.sketches.sketches import HyperLogLog, KllSketch
+
+
+@pytest.fixture
+def values():
+    """Перемешанные различные значения от 0 до 99999."""
+    values = list(map(float, range(100000)))
+    random.Random(7).shuffle(values)
+    return values
+
+
+@pytest.mark.parametrize('fraction', [0.5, 0.95, 0.99])
+def test_kll_sketch_quantile(fraction, values):
+    """Тест точности перцентилей и размера скетча."""
+    sketch = KllSketch()
+    for value in values:
+        sketch.add(value)
+    assert sketch.count == len(values)
+    assert sketch.size < 4 * sketch.k
+    rank = bisect_left(sorted(values), sketch.quantile(fraction))
+    assert abs(rank / len(values) - fraction) < 0.01
+
+
+def test_kll_sketch_merge(values):
+    """Тест объединения скетчей частей данных."""
+    parts = [KllSketch() for _ in range(5)]
+    for index, value in enumerate(values):
+        parts[index % 5].add(value)
+    merged = KllSketch()
+    for part in parts:
+        merged.merge(part)
+    whole = KllSketch()
+    whole.update(values)
+
+    assert merged.count == whole.count == len(values)
+    for sketch in (merged, whole):
+        rank = bisect_left(sorted(values), sketch.quantile(0.95))
+        assert abs(rank / len(values) - 0.95) < 0.01
+
+
+def test_kll_sketch_small():
+    """Тест: пока скетч не заполнен, перцентили точные."""
+    sketch = KllSketch()
+    assert sketch.quantile(0.5) is None
+    sketch.update([5.0, 1.0, 4.0, 2.0, 3.0])
+    assert sketch.quantile(0.5) == 3.0
+    assert sketch.quantile(0.99) == 5.0
+
+
+@pytest.mark.parametrize('cardinality', [10, 1000, 100000])
+def test_hyperloglog_cardinality(cardinality):
+    """Тест точности оценки количества различных значений."""
+    sketch = HyperLogLog()
+    sketch.update(f'value {index % cardinality}' for index in range(100000))
+    assert sketch.cardinality() == pytest.approx(cardinality, rel=0.03)
+    assert len(sketch.registers) == 1 << sketch.precision
+
+
+def test_hyperloglog_merge(values):
+    """Тест объединения скетчей пересекающихся частей данных."""
+    first, second, whole = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    first.update(values[:60000])
+    second.update(values[40000:])
+    whole.update(values)
+    assert first.merge(second).registers == whole.registers
+    assert HyperLogLog().cardinality() == 0
+    with pytest.raises(ValueError):
+        whole.merge(HyperLogLog(precision=10))
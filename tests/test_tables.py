@@ -0,0 +1,117 @@
+from array import array
+
+import pytest
+
+from scr.exceptions import InvalidCsvFormatError
+from scr.tables.tables import Category, CategoryColumn, Table, common_types
+
+
+@pytest.fixture
+def table():
+    """Создаёт колоночную таблицу из трёх товаров."""
+    table = Table({'name': str, 'brand': str, 'price': float})
+    table.append(['iphone', 'apple', 100.0])
+    table.append(['samsung', 'samsung', 200.0])
+    table.append(['xiaomi', 'xiaomi', 150.0])
+    return table
+
+
+def test_table_columns(table):
+    """Тест хранения значений по столбцам."""
+    assert len(table) == 3
+    assert table.column('price') == array('d', [100.0, 200.0, 150.0])
+    assert table.column('brand') == ['apple', 'samsung', 'xiaomi']
+
+
+def test_table_rows(table):
+    """Тест материализации строк таблицы в объекты Good."""
+    assert table.row(1).__dict__ == {
+        'name': 'samsung',
+        'brand': 'samsung',
+        'price': 200.0
+    }
+    assert [good.name for good in table] == ['iphone', 'samsung', 'xiaomi']
+
+
+def test_table_take_and_extend(table):
+    """Тест выборки строк и объединения таблиц."""
+    selected = table.take([2, 0])
+    assert [good.name for good in selected] == ['xiaomi', 'iphone']
+    selected.extend(table)
+    assert len(selected) == 5
+    with pytest.raises(InvalidCsvFormatError):
+        selected.extend(Table({'name': str}))
+
+
+def test_table_select(table):
+    """Тест выборки столбцов таблицы без копирования."""
+    selected = table.select(['price', 'name', 'missing'])
+    assert selected.field_types == {'name': str, 'price': float}
+    assert selected.column('price') is table.column('price')
+    assert selected.row(2).__dict__ == {'name': 'xiaomi', 'price': 150.0}
+
+
+def test_category_column():
+    """Тест кодирования строкового столбца словарём."""
+    table = Table({'brand': Category, 'stock': int})
+    for brand, stock in [('apple', 5), ('xiaomi', 0), ('apple', 7)]:
+        table.append([brand, stock])
+    column = table.column('brand')
+    assert isinstance(column, CategoryColumn)
+    assert column.codes == array('i', [0, 1, 0])
+    assert column.categories == ['apple', 'xiaomi']
+    assert table.column('stock') == array('q', [5, 0, 7])
+
+    selected = table.take([2, 1])
+    assert selected.column('brand') == ['apple', 'xiaomi']
+    other = Table({'brand': Category, 'stock': int})
+    other.append(['samsung', 1])
+    other.append(['xiaomi', 2])
+    selected.extend(other)
+    assert selected.column('brand') == [
+        'apple', 'xiaomi', 'samsung', 'xiaomi'
+    ]
+    assert selected.column('brand').categories == [
+        'apple', 'xiaomi', 'samsung'
+    ]
+
+
+@pytest.mark.parametrize(
+    'first, second, expected',
+    [
+        (
+            {'price': int, 'brand': Category},
+            {'price': float, 'brand': str},
+            {'price': float, 'brand': str},
+        ),
+        ({'price': int}, {'price': int}, {'price': int}),
+        ({'price': int}, {'price': str}, None),
+        ({'price': int}, {'cost': int}, None),
+    ]
+)
+def test_common_types(first, second, expected):
+    """Тест объединения типов полей разных файлов."""
+    assert common_types(first, second) == expected
+
+
+def test_table_cast():
+    """Тест приведения столбцов таблицы к общим типам."""
+    table = Table({'brand': Category, 'stock': int})
+    table.append(['apple', 5])
+    cast = table.cast({'brand': str, 'stock': float})
+    assert cast.field_types == {'brand': str, 'stock': float}
+    assert cast.column('brand') == ['apple']
+    assert cast.column('stock') == array('d', [5.0])
+
+
+def test_table_folded(table):
+    """Тест столбца строковых значений в нижнем регистре."""
+    table.append(['Poco', 'Xiaomi', 70.0])
+    folded = table.folded('brand')
+    assert folded == ['apple', 'samsung', 'xiaomi', 'xiaomi']
+    assert table.folded('brand') is folded
+    table.append(['Redmi', 'XIAOMI', 60.0])
+    assert table.folded('name') == [
+        'iphone', 'samsung', 'xiaomi', 'poco', 'redmi'
+    ]
+    assert len(table.folded('brand')) == 5
@@ -0,0 +1,127 @@
+import io
+import json
+
+import pytest
+
+from scr.writers.writers import JsonWriter, NdjsonWriter, TextTableWriter
+
+ROWS = [
+    {'name': '43" Телевизор Xiaomi', 'brand': 'Xiaomi', 'price': 28990.0},
+    {'name': 'строка\nс переводом', 'brand': 'apple', 'price': 999.0},
+    {'name': 'poco x5 pro', 'brand': 'xiaomi', 'price': 299.0},
+]
+
+
+@pytest.mark.parametrize('buffer_rows', [1, 2, 4, 1000])
+@pytest.mark.parametrize(
+    'data',
+    [
+        ROWS, [], ROWS[:1], ROWS * 3, {'avg': 150.0},
+        [{'brand': 'apple', 'values': [1, {'a': None}], 'empty': {}}],
+    ]
+)
+def test_json_writer_matches_json_dump(data, buffer_rows):
+    """
+    Тест потоковой записи JSON: результат совпадает с json.dump.
+
+    Строки пишутся пачками по buffer_rows, в том числе неполной
+    последней пачкой.
+    """
+    file = io.StringIO()
+    rows = iter(data) if isinstance(data, list) else data
+    JsonWriter(file, buffer_rows).write(rows)
+    assert file.getvalue() == json.dumps(data, ensure_ascii=False, indent=2)
+
+
+@pytest.mark.parametrize(
+    'data, expected',
+    [
+        (
+            iter(ROWS[:2]),
+            '{"name":"43\\" Телевизор Xiaomi","brand":"Xiaomi",'
+            '"price":28990.0}\n'
+            '{"name":"строка\\nс переводом","brand":"apple","price":999.0}\n'
+        ),
+        ({'avg': 150.0}, '{"avg":150.0}\n'),
+        (iter([]), ''),
+    ]
+)
+def test_ndjson_writer(data, expected):
+    """Тест записи NDJSON: по одному компактному объекту на строку."""
+    file = io.StringIO()
+    NdjsonWriter(file, buffer_rows=1).write(data)
+    assert file.getvalue() == expected
+
+
+@pytest.mark.parametrize(
+    'fmt, sample_rows, expected',
+    [
+        (
+            'plain',
+            1000,
+            'name                  brand     price\n'
+            '--------------------  ------  -------\n'
+            '43" Телевизор Xiaomi  Xiaomi  28990.0\n'
+            'строка с переводом    apple     999.0\n'
+            'poco x5 pro           xiaomi    299.0\n'
+        ),
+        (
+            'plain',
+            1,
+            'name                  brand     price\n'
+            '--------------------  ------  -------\n'
+            '43" Телевизор Xiaomi  Xiaomi  28990.0\n'
+            'строка с переводом    apple     999.0\n'
+            'poco x5 pro           xiaomi    299.0\n'
+        ),
+        (
+            'plain',
+            0,
+            '',
+        ),
+        (
+            'tsv',
+            1,
+            'name\tbrand\tprice\n'
+            '43" Телевизор Xiaomi\tXiaomi\t28990.0\n'
+            'строка с переводом\tapple\t999.0\n'
+            'poco x5 pro\txiaomi\t299.0\n'
+        ),
+    ]
+)
+def test_text_table_writer(fmt, sample_rows, expected):
+    """Тест потокового вывода таблицы в форматах plain и tsv."""
+    file = io.StringIO()
+    TextTableWriter(file, fmt, sample_rows=sample_rows, buffer_rows=1).write(
+        iter(ROWS)
+    )
+    assert file.getvalue() == expected
+
+
+def test_text_table_writer_empty():
+    """Тест вывода пустого отчёта."""
+    file = io.StringIO()
+    TextTableWriter(file).write(iter([]))
+    assert file.getvalue() == ''
+
+
+def test_writers_missing_values():
+    """Тест: пустые значения NaN записываются как null и пустые ячейки."""
+    rows = [
+        {'name': 'iphone', 'price': float('nan')},
+        {'name': 'redmi', 'price': 199.0},
+    ]
+    file = io.StringIO()
+    JsonWriter(file).write(iter(rows))
+    assert json.loads(file.getvalue()) == [
+        {'name': 'iphone', 'price': None},
+        {'name': 'redmi', 'price': 199.0},
+    ]
+
+    file = io.StringIO()
+    NdjsonWriter(file).write({'avg': float('nan')})
+    assert file.getvalue() == '{"avg":null}\n'
+
+    file = io.StringIO()
+    TextTableWriter(file, 'tsv').write(iter(rows))
+    assert file.getvalue() == 'name\tprice\niphone\t\nredmi\t199.0\n'